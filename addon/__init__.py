@@ -13,6 +13,7 @@
 
 import bpy
 import bpy.utils.previews
+from bpy.app.handlers import persistent
 
 import json
 import os
@@ -58,6 +59,9 @@ from . esmini_preview_operators import DSC_OT_esmini_preview_stop
 from . esmini_preview_operators import DSC_OT_esmini_preview_step
 from . esmini_preview_operators import DSC_OT_esmini_open_preferences
 from . import esmini_preview
+from . import export
+from . import modal_road_object_base
+from . import helpers
 
 
 bl_info = {
@@ -220,6 +224,22 @@ class DSC_PT_panel_create(bpy.types.Panel):
         row = box.row(align=True)
         row.operator('dsc.popup_road_object_stencil_properties', text='Stencil',
             icon_value=dsc_custom_icons['road_object_stencil'].icon_id).operator = 'road_object_stencil'
+        row = box.row(align=True)
+        row.label(text='Road mesh tolerances')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_mesh_max_chordal_deviation', text='Chordal')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_mesh_max_elevation_deviation', text='Elevation')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_mesh_lod_preview_factor', text='Preview factor')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_mesh_lod_export_factor', text='Export factor')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_mesh_chunk_length', text='Chunk length')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'guard_rail_poles_as_instances', text='Instance guard rail poles')
+        row = box.row(align=True)
+        row.prop(context.scene.dsc_properties, 'road_preview_in_background', text='Background road preview')
 
         layout.label(text='OpenSCENARIO')
         box = layout.box()
@@ -276,6 +296,43 @@ class DSC_Properties(bpy.types.PropertyGroup):
         name='entity_properties_vehicle', type=DSC_entity_properties_vehicle)
     entity_properties_pedestrian: bpy.props.PointerProperty(
         name='entity_properties_pedestrian', type=DSC_entity_properties_pedestrian)
+    road_mesh_max_chordal_deviation: bpy.props.FloatProperty(
+        name='Max chordal deviation',
+        description='Maximum deviation of the road mesh from the exact road edges in plan view in meters',
+        default=0.02, min=0.001, max=1.0, step=1, precision=3,
+    )
+    road_mesh_max_elevation_deviation: bpy.props.FloatProperty(
+        name='Max elevation deviation',
+        description='Maximum deviation of the road mesh from the exact elevation profile in meters',
+        default=0.01, min=0.001, max=1.0, step=1, precision=3,
+    )
+    road_mesh_lod_preview_factor: bpy.props.FloatProperty(
+        name='Preview tolerance factor',
+        description='Factor applied to the road mesh tolerances for the preview while drawing roads',
+        default=5.0, min=1.0, max=100.0, step=10,
+    )
+    road_mesh_lod_export_factor: bpy.props.FloatProperty(
+        name='Export tolerance factor',
+        description='Factor applied to the road mesh tolerances for exported scene meshes',
+        default=0.25, min=0.01, max=1.0, step=1,
+    )
+    road_mesh_chunk_length: bpy.props.FloatProperty(
+        name='Road mesh chunk length',
+        description='Split the meshes of longer roads into chunks of this length in meters, 0 disables chunks',
+        default=0.0, min=0.0, max=10000.0, step=1000, precision=0,
+    )
+    guard_rail_poles_as_instances: bpy.props.BoolProperty(
+        name='Guard rail poles as instances',
+        description='Create guard rail poles as instances of one pole instead of road mesh geometry, '
+                    'exported scene meshes always contain the poles',
+        default=False,
+    )
+    road_preview_in_background: bpy.props.BoolProperty(
+        name='Background road preview',
+        description='Solve the geometry and mesh of the road preview while drawing in a background thread '
+                    'to keep the user interface responsive',
+        default=True,
+    )
 
 classes = (
     DSC_AddonPreferences,
@@ -325,6 +382,30 @@ classes = (
     DSC_Properties,
 )
 
+@persistent
+def callback_load_post(dummy):
+    # Cached data of the previous file is not valid anymore
+    modal_road_object_base.invalidate_geometry_cache()
+    helpers.invalidate_object_xodr_index()
+    export.invalidate_road_chunk_export_meshes()
+
+@persistent
+def callback_undo_redo_post(dummy):
+    # Undo and redo replace all objects
+    modal_road_object_base.invalidate_geometry_cache()
+    helpers.invalidate_object_xodr_index()
+
+@persistent
+def callback_depsgraph_update_post(scene, depsgraph):
+    helpers.invalidate_object_xodr_index_on_depsgraph_update(depsgraph)
+    modal_road_object_base.prune_geometry_cache_on_depsgraph_update(depsgraph)
+    helpers.remove_orphaned_road_parts_on_depsgraph_update(depsgraph)
+
+@persistent
+def callback_save_pre(dummy):
+    # Do not save meshes of removed stencils and previews
+    helpers.purge_orphan_temp_meshes()
+
 def register():
     global dsc_custom_icons
     global dsc_road_sign_previews
@@ -356,6 +437,12 @@ def register():
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     # Register addon property group
     bpy.types.Scene.dsc_properties = bpy.props.PointerProperty(type=DSC_Properties)
+    # Register handlers
+    bpy.app.handlers.load_post.append(callback_load_post)
+    bpy.app.handlers.save_pre.append(callback_save_pre)
+    bpy.app.handlers.undo_post.append(callback_undo_redo_post)
+    bpy.app.handlers.redo_post.append(callback_undo_redo_post)
+    bpy.app.handlers.depsgraph_update_post.append(callback_depsgraph_update_post)
 
     # Restore persisted esmini path for current runtime even if preferences were not explicitly saved.
     addon_prefs = _resolve_addon_preferences(bpy.context)
@@ -367,6 +454,17 @@ def register():
 def unregister():
     global dsc_custom_icons
     esmini_preview.ensure_preview_stopped_on_unregister()
+    # Unregister handlers
+    if callback_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(callback_load_post)
+    if callback_save_pre in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(callback_save_pre)
+    if callback_undo_redo_post in bpy.app.handlers.undo_post:
+        bpy.app.handlers.undo_post.remove(callback_undo_redo_post)
+    if callback_undo_redo_post in bpy.app.handlers.redo_post:
+        bpy.app.handlers.redo_post.remove(callback_undo_redo_post)
+    if callback_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(callback_depsgraph_update_post)
     # Unregister export menu
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     #  Unregister all addon classes
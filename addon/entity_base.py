@@ -85,11 +85,13 @@ class DSC_OT_entity(DSC_OT_modal_two_point_base):
             self.update_stencil(context, update_start=False)
             self.state = 'PLACE'
 
+        # Mouse moves are coalesced and rate limited, timer events catch up on them
+        mouse_moved = self.mouse_move_throttle.is_update_due(event)
         if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L',
-                          'WINDOW_DEACTIVATE'}:
+                          'WINDOW_DEACTIVATE'} and not mouse_moved:
             return {'PASS_THROUGH'}
 
-        if event.type == 'MOUSEMOVE':
+        if mouse_moved:
             # Raycast to road surface
             params_snap = helpers.mouse_to_road_surface_params(context, event)
             if params_snap['hit_type'] is not None:
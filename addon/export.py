@@ -13,6 +13,10 @@
 
 import bpy
 from . import helpers
+from . road import road
+from . modal_road_object_base import load_geometry_cached
+from . import export_manifest
+from . osgb_conversion_pool import osgb_conversion_pool
 
 from scenariogeneration import xosc
 from scenariogeneration import xodr
@@ -21,7 +25,6 @@ from mathutils import Vector
 from math import pi, copysign
 
 import pathlib
-import subprocess
 
 mapping_lane_type = {
     'driving': xodr.LaneType.driving,
@@ -79,6 +82,56 @@ mapping_contact_point = {
     'cp_end_r': xodr.ContactPoint.end,
 }
 
+# Export meshes of road chunks from previous exports, maps the OpenDRIVE ID
+# and s range of a chunk to the hash of the chunk inputs and its mesh buffers
+road_chunk_export_meshes = {}
+
+def invalidate_road_chunk_export_meshes():
+    '''
+        Drop all cached export meshes of road chunks.
+    '''
+    road_chunk_export_meshes.clear()
+
+def get_road_chunk_objects(obj):
+    '''
+        Return the objects holding the mesh chunks of a road object together
+        with their s range. The road object holds the first chunk. The s
+        range is None if the road is not split into chunks.
+    '''
+    s_ranges_chunks = obj.get('road_mesh_chunks_s_ranges', [])
+    if len(s_ranges_chunks) < 2:
+        return [(obj, None)]
+    objs_chunks = [(obj, tuple(s_ranges_chunks[0]))]
+    for obj_chunk in obj.children:
+        if 'road_chunk_s_range' in obj_chunk:
+            objs_chunks.append((obj_chunk, tuple(obj_chunk['road_chunk_s_range'])))
+    return objs_chunks
+
+def replace_road_chunk_mesh_export(context, road_model, obj, obj_chunk, s_range):
+    '''
+        Replace the mesh of a road chunk object with a mesh with export level
+        of detail. Only chunks whose road or mesh settings changed since the
+        last export are rebuilt, the others reuse the buffers of the last
+        export. Return True if the chunk has been rebuilt.
+    '''
+    key = (obj['id_odr'], s_range)
+    inputs_hash = export_manifest.get_hash(export_manifest.get_custom_properties_hash(obj),
+        helpers.get_road_mesh_tolerances(context, 'export'))
+    name = obj_chunk.data.name + '_export'
+    cached = road_chunk_export_meshes.get(key)
+    if cached is not None and cached[0] == inputs_hash:
+        obj_chunk.data = helpers.create_mesh_from_buffers(name, *cached[1])
+        helpers.assign_materials(obj_chunk)
+        return False
+    mesh_export = road_model.get_mesh_from_object(context, obj, 'export', s_range)
+    mesh_export.name = name
+    obj_chunk.data = mesh_export
+    helpers.assign_materials(obj_chunk)
+    helpers.remove_duplicate_vertices(context, obj_chunk)
+    helpers.triangulate_quad_mesh(obj_chunk)
+    road_chunk_export_meshes[key] = (inputs_hash, helpers.get_mesh_buffers(obj_chunk.data))
+    return True
+
 class DSC_OT_export(bpy.types.Operator):
     bl_idname = 'dsc.export_driving_scenario'
     bl_label = 'Export driving scenario'
@@ -96,6 +149,11 @@ class DSC_OT_export(bpy.types.Operator):
         default='osgb',
     )
 
+    incremental: bpy.props.BoolProperty(
+        name='Incremental export',
+        description='Only export files whose content changed since the last export to this directory',
+        default=False)
+
     dsc_export_filename = 'bdsc_export'
 
     @classmethod
@@ -107,11 +165,20 @@ class DSC_OT_export(bpy.types.Operator):
         row = layout.row()
         row.label(text="Mesh file:")
         row.prop(self, "mesh_file_type", expand=True)
+        row = layout.row()
+        row.prop(self, "incremental")
 
     def execute(self, context):
+        self.manifest = export_manifest.export_manifest(self.directory, self.incremental)
+        self.osgb_conversions = osgb_conversion_pool()
         self.export_entity_models(context)
         self.export_static_scene_model()
         self.export_openscenario()
+        # Convert all .obj intermediates to .osgb in parallel
+        errors = self.osgb_conversions.run()
+        if len(errors) > 0:
+            self.report({'ERROR'}, '\n'.join(sorted(set(errors))))
+        self.manifest.save()
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -124,6 +191,29 @@ class DSC_OT_export(bpy.types.Operator):
         '''
         file_path = pathlib.Path(self.directory) / 'models'/ 'static_scene' / 'bdsc_export.suffix'
         file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Export meshes of roads only depend on the road properties and mesh
+        # settings, hash before rebuilding them
+        self.select_static_scene_objects()
+        inputs = {'settings': export_manifest.get_hash(self.mesh_file_type,
+            helpers.get_road_mesh_tolerances(bpy.context, 'export'))}
+        for obj in bpy.context.selected_objects:
+            inputs['object:' + obj.name] = export_manifest.get_object_hash(obj)
+        bpy.ops.object.select_all(action='DESELECT')
+        if self.manifest.is_up_to_date('static_scene', inputs,
+                [file_path.with_suffix('.' + self.mesh_file_type)]):
+            print('Static scene model is up to date')
+            return
+        # Temporarily use road meshes with export level of detail
+        meshes_viewport = self.replace_road_meshes_export(bpy.context)
+        self.select_static_scene_objects()
+        self.export_mesh(file_path)
+        bpy.ops.object.select_all(action='DESELECT')
+        self.restore_road_meshes(meshes_viewport)
+
+    def select_static_scene_objects(self):
+        '''
+            Select all objects which are part of the static scene model.
+        '''
         bpy.ops.object.select_all(action='SELECT')
         if helpers.collection_exists(['OpenSCENARIO']):
             for obj in bpy.data.collections['OpenSCENARIO'].objects:
@@ -134,8 +224,47 @@ class DSC_OT_export(bpy.types.Operator):
             for obj in bpy.data.collections['OpenDRIVE'].objects:
                 if 'dsc_type' in obj and obj['dsc_type'] == 'junction_connecting_road':
                         obj.select_set(False)
-        self.export_mesh(file_path)
-        bpy.ops.object.select_all(action='DESELECT')
+        if helpers.collection_exists(['OpenDRIVE']):
+            # Exported road meshes contain the guard rail poles
+            for obj in bpy.data.collections['OpenDRIVE'].objects:
+                if 'guard_rail_poles_road_id' in obj:
+                    obj.select_set(False)
+
+    def replace_road_meshes_export(self, context):
+        '''
+            Replace the meshes of all road objects with meshes rebuilt with
+            export level of detail. Return the replaced viewport meshes.
+        '''
+        meshes_viewport = {}
+        if not helpers.collection_exists(['OpenDRIVE']):
+            return meshes_viewport
+        keys_exported = set()
+        for obj in bpy.data.collections['OpenDRIVE'].objects:
+            if 'lanes_left_types' not in obj or obj['dsc_type'] == 'junction_connecting_road':
+                continue
+            geometry = load_geometry_cached(obj)
+            if geometry is None:
+                continue
+            road_model = road(context, obj['dsc_type'], geometry, None)
+            for obj_chunk, s_range in get_road_chunk_objects(obj):
+                meshes_viewport[obj_chunk.name] = obj_chunk.data
+                replace_road_chunk_mesh_export(context, road_model, obj, obj_chunk, s_range)
+                keys_exported.add((obj['id_odr'], s_range))
+        # Forget the chunks of removed roads
+        for key in set(road_chunk_export_meshes) - keys_exported:
+            del road_chunk_export_meshes[key]
+        return meshes_viewport
+
+    def restore_road_meshes(self, meshes_viewport):
+        '''
+            Restore the viewport meshes of road objects and remove the export
+            meshes.
+        '''
+        for obj_name, mesh_viewport in meshes_viewport.items():
+            obj = bpy.data.objects[obj_name]
+            mesh_export = obj.data
+            obj.data = mesh_viewport
+            bpy.data.meshes.remove(mesh_export)
 
     def export_entity_models(self, context):
         '''
@@ -152,69 +281,26 @@ class DSC_OT_export(bpy.types.Operator):
         if helpers.collection_exists(['OpenSCENARIO','entities']):
             vehicle_catalog_file_created = False
             pedestrian_catalog_file_created = False
+            # Identical models are exported once and shared by all entities
+            model_names_exported = set()
             for obj in bpy.data.collections['OpenSCENARIO'].children['entities'].objects:
                 # Skip child objects (e.g. wheels, body); they are exported with their parent
                 if obj.parent is not None:
                     continue
                 if 'dsc_type' not in obj or obj['dsc_type'] != 'entity':
                     continue
-                print('Export entity object model for', obj.name)
-                model_path = pathlib.Path(self.directory) / 'models' / 'entities' / str(obj.name)
-                has_wheel_children = any(
-                    c.name.startswith('wheel_') for c in obj.children)
-                if has_wheel_children:
-                    # Build esmini-compatible hierarchy:
-                    #   empty (root) -> body (mesh) + wheel children
-                    # Create parent empty copy at origin
-                    root_export = bpy.data.objects.new(obj.name, None)
-                    helpers.link_object_openscenario(context, root_export, subcategory=None)
-                    # Copy body mesh, rename to "body"
-                    body_export = obj.copy()
-                    body_export.data = obj.data.copy()
-                    body_export.name = 'body'
-                    body_export.data.name = 'body'
-                    helpers.link_object_openscenario(context, body_export, subcategory=None)
-                    body_export.parent = root_export
-                    body_export.matrix_parent_inverse.identity()
-                    body_export.location = (0, 0, 0)
-                    body_export.rotation_euler = (0, 0, 0)
-                    copies = [root_export, body_export]
-                    # Copy wheel children
-                    for child in obj.children:
-                        child_export = child.copy()
-                        if child_export.data is not None:
-                            child_export.data = child_export.data.copy()
-                        helpers.link_object_openscenario(context, child_export, subcategory=None)
-                        child_export.parent = root_export
-                        child_export.matrix_parent_inverse.identity()
-                        # Keep the wheel's local offset
-                        child_export.location = child.location.copy()
-                        child_export.rotation_euler = child.rotation_euler.copy()
-                        copies.append(child_export)
-                    # Select all copies for export
-                    bpy.ops.object.select_all(action='DESELECT')
-                    for c in copies:
-                        c.select_set(True)
-                    bpy.context.view_layer.objects.active = root_export
+                model_hash = export_manifest.get_entity_model_hash(obj)
+                model_name = 'entity_model_' + model_hash[:16]
+                model_file_name = model_name + '.' + self.mesh_file_type
+                model_path = pathlib.Path(self.directory) / 'models' / 'entities' / model_name
+                if model_file_name in model_names_exported:
+                    print('Entity object model for', obj.name, 'is shared')
+                elif self.manifest.is_cached('entity_model:' + model_file_name, {'model': model_hash},
+                        [model_path.with_suffix('.' + self.mesh_file_type)]):
+                    print('Entity object model for', obj.name, 'is cached')
                 else:
-                    # No children — simple single-mesh entity (pedestrian, etc.)
-                    copies = []
-                    obj_export = obj.copy()
-                    if obj_export.data is not None:
-                        obj_export.data = obj_export.data.copy()
-                    helpers.link_object_openscenario(context, obj_export, subcategory=None)
-                    copies.append(obj_export)
-                    bpy.ops.object.select_all(action='DESELECT')
-                    obj_export.select_set(True)
-                    bpy.context.view_layer.objects.active = obj_export
-                    bpy.ops.object.location_clear()
-                    bpy.ops.object.rotation_clear()
-                # Export then delete copies
-                self.export_mesh(model_path)
-                bpy.ops.object.select_all(action='DESELECT')
-                for c in copies:
-                    c.select_set(True)
-                bpy.ops.object.delete()
+                    self.export_entity_model(context, obj, model_path)
+                model_names_exported.add(model_file_name)
                 if obj['entity_type'] == 'vehicle':
                     # Add vehicle to vehicle catalog
                     # TODO store in and read vehicle parameters from object
@@ -223,7 +309,7 @@ class DSC_OT_export(bpy.types.Operator):
                     axle_rear = xosc.Axle(0,0.8,1.525,0,0.4)
                     vehicle = xosc.Vehicle(obj.name,mapping_vehicle_type[obj['entity_subtype']],
                         bounding_box,axle_front,axle_rear,69,10,10)
-                    vehicle.add_property_file('../models/entities/' + obj.name + '.' + self.mesh_file_type)
+                    vehicle.add_property_file('../models/entities/' + model_file_name)
                     vehicle.add_property('control','internal')
                     vehicle.add_property('model_id','0')
                     if not vehicle_catalog_file_created:
@@ -239,7 +325,7 @@ class DSC_OT_export(bpy.types.Operator):
                     bounding_box = xosc.BoundingBox(0.4,0.6,1.8,0,0,0.6)
                     pedestrian = xosc.Pedestrian(obj.name,80,mapping_pedestrian_type[obj['entity_subtype']],
                         bounding_box)
-                    pedestrian.add_property_file('../models/entities/' + obj.name + '.' + self.mesh_file_type)
+                    pedestrian.add_property_file('../models/entities/' + model_file_name)
                     pedestrian.add_property('model_id','0')
                     if not pedestrian_catalog_file_created:
                         # Create new catalog with first pedestrian
@@ -252,6 +338,67 @@ class DSC_OT_export(bpy.types.Operator):
                     print('Unknown entity type:', obj['entity_type'])
                     self.report({'ERROR'}, 'Unknown entity type: {}'.format(obj['entity_type']))
 
+    def export_entity_model(self, context, obj, model_path):
+        '''
+            Export the model of an entity with its children at the origin.
+        '''
+        print('Export entity object model for', obj.name)
+        has_wheel_children = any(
+            c.name.startswith('wheel_') for c in obj.children)
+        if has_wheel_children:
+            # Build esmini-compatible hierarchy:
+            #   empty (root) -> body (mesh) + wheel children
+            # Create parent empty copy at origin
+            root_export = bpy.data.objects.new(obj.name, None)
+            helpers.link_object_openscenario(context, root_export, subcategory=None)
+            # Copy body mesh, rename to "body"
+            body_export = obj.copy()
+            body_export.data = obj.data.copy()
+            body_export.name = 'body'
+            body_export.data.name = 'body'
+            helpers.link_object_openscenario(context, body_export, subcategory=None)
+            body_export.parent = root_export
+            body_export.matrix_parent_inverse.identity()
+            body_export.location = (0, 0, 0)
+            body_export.rotation_euler = (0, 0, 0)
+            copies = [root_export, body_export]
+            # Copy wheel children
+            for child in obj.children:
+                child_export = child.copy()
+                if child_export.data is not None:
+                    child_export.data = child_export.data.copy()
+                helpers.link_object_openscenario(context, child_export, subcategory=None)
+                child_export.parent = root_export
+                child_export.matrix_parent_inverse.identity()
+                # Keep the wheel's local offset
+                child_export.location = child.location.copy()
+                child_export.rotation_euler = child.rotation_euler.copy()
+                copies.append(child_export)
+            # Select all copies for export
+            bpy.ops.object.select_all(action='DESELECT')
+            for c in copies:
+                c.select_set(True)
+            bpy.context.view_layer.objects.active = root_export
+        else:
+            # No children — simple single-mesh entity (pedestrian, etc.)
+            copies = []
+            obj_export = obj.copy()
+            if obj_export.data is not None:
+                obj_export.data = obj_export.data.copy()
+            helpers.link_object_openscenario(context, obj_export, subcategory=None)
+            copies.append(obj_export)
+            bpy.ops.object.select_all(action='DESELECT')
+            obj_export.select_set(True)
+            bpy.context.view_layer.objects.active = obj_export
+            bpy.ops.object.location_clear()
+            bpy.ops.object.rotation_clear()
+        # Export then delete copies
+        self.export_mesh(model_path)
+        bpy.ops.object.select_all(action='DESELECT')
+        for c in copies:
+            c.select_set(True)
+        bpy.ops.object.delete()
+
     def export_mesh(self, file_path):
         '''
             Export a mesh to file
@@ -291,12 +438,9 @@ class DSC_OT_export(bpy.types.Operator):
                                   export_curves_as_nurbs=False, export_object_groups=False,
                                   export_material_groups=False, export_vertex_groups=False,
                                   export_smooth_groups=False, smooth_group_bitflags=False)
-            self.convert_to_osgb(file_path_obj)
-            # Remove mtl, obj and texture files
-            file_path_obj.unlink()
-            file_path_mtl.unlink()
-            for file_path_texture in file_paths_textures:
-                file_path_texture.unlink()
+            # Convert later together with the other models, then remove mtl,
+            # obj and texture files
+            self.osgb_conversions.add(file_path_obj, [file_path_obj, file_path_mtl] + list(file_paths_textures))
         elif self.mesh_file_type == 'fbx':
             file_path = file_path.with_suffix('.fbx')
             file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -354,22 +498,47 @@ class DSC_OT_export(bpy.types.Operator):
                                       export_morph_tangent=False, export_lights=False,
                                       will_save_settings=False, filter_glob='*.glb;*.gltf')
 
-    def convert_to_osgb(self, input_file_path):
-        try:
-            subprocess.run(['osgconv', str(input_file_path), str(input_file_path.with_suffix('.osgb'))])
-        except FileNotFoundError:
-            self.report({'ERROR'}, 'Executable \"osgconv\" required to produce .osgb scenegraph file. '
-                'Try installing openscenegraph.')
-
     def export_openscenario(self):
+        '''
+            Export the OpenDRIVE and the OpenSCENARIO file
+        '''
         # OpenDRIVE (referenced by OpenSCENARIO)
         xodr_path = pathlib.Path(self.directory) / 'xodr' / (self.dsc_export_filename + '.xodr')
         xodr_path.parent.mkdir(parents=True, exist_ok=True)
+        # The road network is completely described by the custom properties
+        inputs_xodr = {}
+        if helpers.collection_exists(['OpenDRIVE']):
+            for obj in bpy.data.collections['OpenDRIVE'].objects:
+                inputs_xodr['object:' + obj.name] = export_manifest.get_custom_properties_hash(obj)
+        if self.manifest.is_up_to_date('xodr', inputs_xodr, [xodr_path]):
+            print('OpenDRIVE file is up to date')
+        else:
+            self.write_opendrive(xodr_path)
+
+        # OpenSCENARIO
+        xosc_path = pathlib.Path(self.directory) / 'xosc' / (self.dsc_export_filename + '.xosc')
+        xosc_path.parent.mkdir(parents=True, exist_ok=True)
+        inputs_xosc = {'settings': export_manifest.get_hash(self.mesh_file_type,
+            helpers.collection_exists(['OpenDRIVE']))}
+        if helpers.collection_exists(['OpenSCENARIO']):
+            for obj in bpy.data.collections['OpenSCENARIO'].all_objects:
+                inputs_xosc['object:' + obj.name] = export_manifest.get_object_hash(obj)
+        if self.manifest.is_up_to_date('xosc', inputs_xosc, [xosc_path]):
+            print('OpenSCENARIO file is up to date')
+        else:
+            self.write_openscenario(xosc_path, xodr_path)
+
+    def write_opendrive(self, xodr_path):
+        '''
+            Create the OpenDRIVE road network and write it to file
+        '''
         odr = xodr.OpenDrive('blender_dsc')
-        roads = []
+        # Roads by ID in order of creation
+        roads = {}
         guard_rail_object_id = 10000
         # Create OpenDRIVE roads from object collection
         if helpers.collection_exists(['OpenDRIVE']):
+            element_types = self.get_element_types_by_id()
             for obj in bpy.data.collections['OpenDRIVE'].objects:
                 if obj.name.startswith('road'):
                     self.clean_up_broken_road_links(obj)
@@ -423,7 +592,7 @@ class DSC_OT_export(bpy.types.Operator):
                     self.add_elevation_profiles(obj, road)
                     # Add road level linking
                     if 'link_predecessor_id_l' in obj:
-                        element_type = self.get_element_type_by_id(obj['link_predecessor_id_l'])
+                        element_type = element_types.get(obj['link_predecessor_id_l'])
                         if obj['link_predecessor_cp_l'] == 'cp_start_l' or \
                             obj['link_predecessor_cp_l'] == 'cp_start_r':
                             cp_type = xodr.ContactPoint.start
@@ -435,7 +604,7 @@ class DSC_OT_export(bpy.types.Operator):
                         if not 'id_direct_junction_start' in obj:
                             road.add_predecessor(element_type, obj['link_predecessor_id_l'], cp_type)
                     if 'link_predecessor_id_r' in obj:
-                        element_type = self.get_element_type_by_id(obj['link_predecessor_id_r'])
+                        element_type = element_types.get(obj['link_predecessor_id_r'])
                         if obj['link_predecessor_cp_r'] == 'cp_start_l' or \
                             obj['link_predecessor_cp_r'] == 'cp_start_r':
                             cp_type = xodr.ContactPoint.start
@@ -447,7 +616,7 @@ class DSC_OT_export(bpy.types.Operator):
                         if not 'id_direct_junction_start' in obj:
                             road.add_predecessor(element_type, obj['link_predecessor_id_r'], cp_type)
                     if 'link_successor_id_l' in obj:
-                        element_type = self.get_element_type_by_id(obj['link_successor_id_l'])
+                        element_type = element_types.get(obj['link_successor_id_l'])
                         if obj['link_successor_cp_l'] == 'cp_start_l' or \
                             obj['link_successor_cp_l'] == 'cp_start_r':
                             cp_type = xodr.ContactPoint.start
@@ -459,7 +628,7 @@ class DSC_OT_export(bpy.types.Operator):
                         if not 'id_direct_junction_end' in obj:
                             road.add_successor(element_type, obj['link_successor_id_l'], cp_type)
                     if 'link_successor_id_r' in obj:
-                        element_type = self.get_element_type_by_id(obj['link_successor_id_r'])
+                        element_type = element_types.get(obj['link_successor_id_r'])
                         if obj['link_successor_cp_r'] == 'cp_start_l' or \
                             obj['link_successor_cp_r'] == 'cp_start_r':
                             cp_type = xodr.ContactPoint.start
@@ -540,7 +709,7 @@ class DSC_OT_export(bpy.types.Operator):
                             guard_rail_object_id += 1
                     print('Add road with ID', obj['id_odr'])
                     odr.add_road(road)
-                    roads.append(road)
+                    roads[road.id] = road
                 if obj.name.startswith('sign') or obj.name.startswith('stop_line') or obj.name.startswith('stencil'):
                     road_to_attach = self.get_road_by_id(roads, obj['id_road'])
                     print("Add signal with ID", obj['id_odr'])
@@ -634,7 +803,7 @@ class DSC_OT_export(bpy.types.Operator):
                     junction = xodr.Junction('junction_' + str(junction_id), junction_id)
                     # Second get all incoming roads
                     for joint in obj['joints']:
-                        inc_road = xodr.get_road_by_id(roads, joint['id_incoming'])
+                        inc_road = roads.get(joint['id_incoming'])
                         if(inc_road != None):
                             incoming_roads.append(inc_road)
                         else:
@@ -717,9 +886,10 @@ class DSC_OT_export(bpy.types.Operator):
         odr.adjust_startpoints()
         odr.write_xml(str(xodr_path))
 
-        # OpenSCENARIO
-        xosc_path = pathlib.Path(self.directory) / 'xosc' / (self.dsc_export_filename + '.xosc')
-        xosc_path.parent.mkdir(parents=True, exist_ok=True)
+    def write_openscenario(self, xosc_path, xodr_path):
+        '''
+            Create the OpenSCENARIO scenario and write it to file
+        '''
         init = xosc.Init()
         entities = xosc.Entities()
         if helpers.collection_exists(['OpenSCENARIO','entities']):
@@ -824,28 +994,32 @@ class DSC_OT_export(bpy.types.Operator):
             entities,storyboard,road_network,catalogs)
         scenario.write_xml(str(xosc_path))
 
-    def get_element_type_by_id(self, id):
+    def get_element_types_by_id(self):
         '''
-            Return element type of an OpenDRIVE element with given ID
+            Return a dictionary with the element types of all OpenDRIVE
+            elements by ID
         '''
+        element_types = {}
         for obj in bpy.data.collections['OpenDRIVE'].objects:
+            if not 'id_odr' in obj:
+                continue
             if obj.name.startswith('road'):
-                if obj['id_odr'] == id:
-                    return xodr.ElementType.road
-            elif obj.name.startswith('junction'):
-                if obj['id_odr'] == id:
-                    return xodr.ElementType.junction
-            elif obj.name.startswith('direct_junction'):
-                if obj['id_odr'] == id:
-                    return xodr.ElementType.junction
+                element_type = xodr.ElementType.road
+            elif obj.name.startswith('junction') or obj.name.startswith('direct_junction'):
+                element_type = xodr.ElementType.junction
+            else:
+                continue
+            # Keep the first element with an ID
+            element_types.setdefault(obj['id_odr'], element_type)
+        return element_types
 
     def get_road_by_id(self, roads, id):
         '''
-            Return road with given ID
+            Return road with given ID from the dictionary of roads
         '''
-        for road in roads:
-            if road.id == id:
-                return road
+        road = roads.get(id)
+        if road is not None:
+            return road
         print('WARNING: No road with ID {} found. Maybe a junction?'.format(id))
         return None
 
@@ -942,7 +1116,7 @@ class DSC_OT_export(bpy.types.Operator):
             Create lane links for all roads.
         '''
         # TODO: Improve performance by exploiting symmetry, e.g., check for existing links
-        for road in roads:
+        for road in roads.values():
             road_obj = helpers.get_object_xodr_by_id(road.id)
             if road.predecessor:
                 road_pre = self.get_road_by_id(roads, road.predecessor.element_id)
@@ -0,0 +1,207 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+import bpy
+import numpy as np
+
+import hashlib
+import json
+import pathlib
+import re
+
+
+def get_json_value(value):
+    '''
+        Return a JSON serializable version of an ID property or mathutils
+        value.
+    '''
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if hasattr(value, 'to_list'):
+        return value.to_list()
+    if hasattr(value, '__len__'):
+        return list(value)
+    return str(value)
+
+def get_hash(*values):
+    '''
+        Return the content hash of JSON serializable values.
+    '''
+    content = json.dumps(values, sort_keys=True, default=get_json_value)
+    return hashlib.sha1(content.encode()).hexdigest()
+
+def get_custom_properties_hash(obj):
+    '''
+        Return the content hash of the custom properties of an object.
+    '''
+    return get_hash({key: value for key, value in obj.items()})
+
+def get_material_hash(material):
+    '''
+        Return the content hash of the colors and shader node inputs of a
+        material, None for empty material slots.
+    '''
+    if material is None:
+        return None
+    nodes = []
+    if material.node_tree is not None:
+        for node in material.node_tree.nodes:
+            inputs = [[socket.identifier, getattr(socket, 'default_value', None)]
+                for socket in node.inputs]
+            nodes.append([node.name, node.bl_idname, inputs])
+        nodes.sort(key=lambda node: node[0])
+    return get_hash(material.name, material.diffuse_color[:], material.metallic,
+        material.roughness, nodes)
+
+def get_materials_hash(materials):
+    '''
+        Return the content hash of a list of materials.
+    '''
+    return get_hash([get_material_hash(material) for material in materials])
+
+def get_mesh_hash(mesh):
+    '''
+        Return the content hash of the geometry, UV maps and materials of a
+        mesh.
+    '''
+    content = hashlib.sha1()
+    for collection, attribute, num_values, dtype in [
+            (mesh.vertices, 'co', 3, np.float32),
+            (mesh.edges, 'vertices', 2, np.int32),
+            (mesh.loops, 'vertex_index', 1, np.int32),
+            (mesh.polygons, 'loop_total', 1, np.int32),
+            (mesh.polygons, 'material_index', 1, np.int32)]:
+        values = np.empty(len(collection) * num_values, dtype=dtype)
+        collection.foreach_get(attribute, values)
+        content.update(values.tobytes())
+    for uv_layer in mesh.uv_layers:
+        uvs = np.empty(len(uv_layer.uv) * 2, dtype=np.float32)
+        uv_layer.uv.foreach_get('vector', uvs)
+        content.update(uvs.tobytes())
+    content.update(get_materials_hash(mesh.materials).encode())
+    return content.hexdigest()
+
+def get_curve_hash(curve):
+    '''
+        Return the content hash of the splines of a curve.
+    '''
+    splines = []
+    for spline in curve.splines:
+        points = [point.co[:] for point in spline.points]
+        points_bezier = [point.co[:] for point in spline.bezier_points]
+        splines.append([spline.type, spline.order_u, points, points_bezier])
+    return get_hash(splines)
+
+def get_object_data_hash(obj):
+    '''
+        Return the content hash of the data of an object, None for empties
+        and unsupported data types.
+    '''
+    if obj.type == 'MESH':
+        return get_mesh_hash(obj.data)
+    elif obj.type == 'CURVE':
+        return get_curve_hash(obj.data)
+    return None
+
+def get_object_hash(obj):
+    '''
+        Return the content hash of an object including transformation,
+        custom properties, materials, modifiers and data.
+    '''
+    materials = get_materials_hash([slot.material for slot in obj.material_slots])
+    modifiers = [(modifier.name, modifier.type, modifier.show_viewport) for modifier in obj.modifiers]
+    return get_hash(obj.name, obj.type, [row[:] for row in obj.matrix_world],
+        get_custom_properties_hash(obj), materials, modifiers, get_object_data_hash(obj))
+
+def get_entity_model_hash(obj):
+    '''
+        Return the content hash of the model of an entity. Location, rotation
+        and custom properties of the entity itself are not part of the model.
+    '''
+    children = []
+    for child in obj.children:
+        # Children of identical entities only differ in the numeric suffix
+        name = re.sub(r'\.\d{3,}$', '', child.name)
+        children.append([name, child.location[:], child.rotation_euler[:], child.scale[:],
+            get_object_data_hash(child), get_materials_hash([slot.material for slot in child.material_slots])])
+    children.sort(key=lambda child: child[0])
+    materials = get_materials_hash([slot.material for slot in obj.material_slots])
+    return get_hash(obj.type, obj.scale[:], materials, get_object_data_hash(obj), children)
+
+
+class export_manifest():
+    '''
+        Content hashes of the inputs of each exported artifact stored in the
+        export directory. In incremental mode artifacts with unchanged inputs
+        and existing files are not exported again. Content addressed
+        artifacts like entity models are cached across all exports.
+    '''
+
+    file_name = 'bdsc_export_manifest.json'
+    version = 1
+
+    def __init__(self, directory, incremental):
+        self.file_path = pathlib.Path(directory) / self.file_name
+        self.incremental = incremental
+        self.artifacts = {}
+        self.artifacts_previous = {}
+        self.cache = {}
+        self.load()
+
+    def load(self):
+        '''
+            Load the manifest of the previous export, ignore missing, outdated
+            or broken manifests.
+        '''
+        try:
+            with open(self.file_path, 'r') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return
+        if isinstance(manifest, dict) and manifest.get('version') == self.version:
+            self.artifacts_previous = manifest.get('artifacts', {})
+            self.cache = manifest.get('cache', {})
+
+    def save(self):
+        '''
+            Write the manifest with the inputs of all artifacts of this
+            export.
+        '''
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.file_path, 'w') as file:
+            json.dump({'version': self.version, 'artifacts': self.artifacts, 'cache': self.cache}, file,
+                indent=1, sort_keys=True)
+
+    def is_up_to_date(self, artifact, inputs, file_paths):
+        '''
+            Record the input hashes of an artifact and return True if it can
+            be skipped because the inputs did not change since the previous
+            export and all its files still exist.
+        '''
+        self.artifacts[artifact] = inputs
+        if not self.incremental or self.artifacts_previous.get(artifact) != inputs:
+            return False
+        return all(pathlib.Path(file_path).exists() for file_path in file_paths)
+
+    def is_cached(self, artifact, inputs, file_paths):
+        '''
+            Return True if a content addressed artifact has been exported to this
+            directory before and all its files still exist, otherwise record
+            it as exported.
+        '''
+        if self.cache.get(artifact) == inputs \
+                and all(pathlib.Path(file_path).exists() for file_path in file_paths):
+            return True
+        self.cache[artifact] = inputs
+        return False
@@ -12,8 +12,10 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from mathutils import Vector, Matrix
-from math import pi, copysign
-from numpy import linspace
+from math import pi, copysign, sin, cos
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+import numpy as np
 
 from . import helpers
 
@@ -25,14 +27,31 @@ class DSC_geometry():
         self.section_curves = []
         self.total_length = 0.0
         self.lane_offset_coefficients = {'a': 0, 'b': 0, 'c': 0, 'd': 0}
+        # Coarse polyline cache for projecting points onto the reference line
+        self.projection_polyline = None
+        self.projection_polyline_step = 1.0
+        self.projection_max_iterations = 20
+        # Cumulative s index for section and elevation lookups
+        self.sections_s_start = []
+        self.sections_s_end = []
+        self.sections_elevation_s_start = []
 
     def update_total_length(self):
         '''
-            Update the total length of the geometry.
+            Update the total length of the geometry and the cumulative s
+            index of the sections and their elevation segments.
         '''
         self.total_length = 0.0
+        self.sections_s_start = []
+        self.sections_s_end = []
+        self.sections_elevation_s_start = []
+        self.projection_polyline = None
         for section in self.sections:
+            self.sections_s_start.append(self.total_length)
             self.total_length += section['length']
+            self.sections_s_end.append(self.total_length)
+            self.sections_elevation_s_start.append(
+                [elevation['s_section'] for elevation in section['elevation'][1:]])
 
     def sample_cross_section(self, s, t):
         '''
@@ -47,7 +66,22 @@ class DSC_geometry():
         '''
         self.sections = []
         self.section_curves = []
-        self.total_length = 0.0
+        self.update_total_length()
+
+    def copy(self):
+        '''
+            Return a copy of the geometry which can be updated independently
+            of this one, e.g. in a background thread. Section curves are shared
+            since updates replace them instead of changing them.
+        '''
+        geometry = self.__class__()
+        geometry.sections = deepcopy(self.sections)
+        geometry.section_curves = list(self.section_curves)
+        geometry.lane_offset_coefficients = dict(self.lane_offset_coefficients)
+        matrix_world = getattr(self, 'matrix_world', None)
+        geometry.matrix_world = None if matrix_world is None else matrix_world.copy()
+        geometry.update_total_length()
+        return geometry
 
     def add_section(self):
         '''
@@ -73,6 +107,7 @@ class DSC_geometry():
         }
         self.sections.append(section)
         self.section_curves.append(None)
+        self.update_total_length()
 
     def deserialize_matrix(self, data):
         '''
@@ -96,6 +131,7 @@ class DSC_geometry():
         '''
         for section in section_data:
             self.add_section_from_params(section)
+        self.update_total_length()
 
     def add_section_from_params(self, section_new):
         '''
@@ -366,101 +402,170 @@ class DSC_geometry():
         '''
         return NotImplementedError()
 
-    def get_closest_ref_line_x_y_heading_s_t(self, point):
+    def sample_plan_view_batch(self, s_array):
+        '''
+            Return arrays x(s), y(s), hdg(s), curvature(s) for an array of s
+            values in local coordinates.
+        '''
+        s_array = np.asarray(s_array, dtype=float)
+        x = np.zeros(s_array.shape)
+        y = np.zeros(s_array.shape)
+        hdg = np.zeros(s_array.shape)
+        curvature = np.zeros(s_array.shape)
+        idx_sections, s_sections = self.get_section_idx_and_s_batch(s_array)
+        for idx_section in np.unique(idx_sections):
+            mask = idx_sections == idx_section
+            x[mask], y[mask], hdg[mask], curvature[mask] = \
+                self.sample_plan_view_section_batch(idx_section, s_sections[mask])
+        return x, y, hdg, curvature
+
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        '''
+            Return arrays x(s), y(s), hdg(s), curvature(s) in local coordinates
+            for an array of s values relative to the start of the geometry
+            section with the given index.
+        '''
+        raise NotImplementedError()
+
+    def transform_section_to_local_batch(self, idx_section, x_s, y_s):
+        '''
+            Apply the section to local transform of the geometry section with
+            the given index to arrays of x and y values.
+        '''
+        matrix_local = np.array(self.sections[idx_section]['matrix_local'])
+        x = matrix_local[0, 0] * x_s + matrix_local[0, 1] * y_s + matrix_local[0, 3]
+        y = matrix_local[1, 0] * x_s + matrix_local[1, 1] * y_s + matrix_local[1, 3]
+        return x, y
+
+    def get_projection_polyline(self):
+        '''
+            Return the cached coarse polyline of the reference line used as
+            starting point for projections, sample it if necessary.
+        '''
+        if self.projection_polyline is None:
+            num_samples = max(2, int(np.ceil(self.total_length / self.projection_polyline_step)) + 1)
+            s_values = np.linspace(0.0, self.total_length, num_samples)
+            x, y, hdg, curvature = self.sample_plan_view_batch(s_values)
+            self.projection_polyline = (s_values, np.column_stack((x, y)))
+        return self.projection_polyline
+
+    def get_closest_ref_line_x_y_heading_s_t(self, point, tolerance=1e-4):
         '''
             Return the x, y and heading of the closest point on the reference
             line to the given point and the s, and t coordinate values of the
-            point.
-        '''
-        point_local = self.matrix_world.inverted() @ point
-        sample_points = []
-        sample_headings = []
-        # Step 1: search on the complete geometry
-        step_size = 1.0
-        num_steps = int((self.total_length // step_size) + 1)
-        s_values = linspace(0.0, self.total_length, num_steps).tolist()
-        for s in s_values:
-            x, y, h, c = self.sample_plan_view(s)
-            sample_points.append(Vector((x, y)))
-            sample_headings.append(h)
-        distance = []
-        for sample_point in sample_points:
-            distance.append((point_local.to_2d() - sample_point).length)
-        idx_min = distance.index(min(distance))
-        closest_point = sample_points[idx_min]
-        closest_point_heading = sample_headings[idx_min]
-        closest_point_s = s_values[idx_min]
-        # Step 2: refine the result
-        sample_points = []
-        sample_headings = []
-        step_size = 0.01
-        s_min = closest_point_s - 1.0
-        if s_min < 0.0:
-            s_min = 0.0
-        s_max = closest_point_s + 1.0
-        if s_max > self.total_length:
-            s_max = self.total_length
-        num_steps = int(((s_max - s_min) // step_size) + 1)
-        s_values = linspace(s_min, s_max, num_steps).tolist()
-        for s in s_values:
-            x, y, h, c = self.sample_plan_view(s)
-            sample_points.append(Vector((x, y)))
-            sample_headings.append(h)
-        distance = []
-        for sample_point in sample_points:
-            distance.append((point_local.to_2d() - sample_point).length)
-        idx_min = distance.index(min(distance))
-        closest_point = sample_points[idx_min]
-        closest_point_heading = sample_headings[idx_min]
+            point. The s value is found by projecting the point onto a coarse
+            polyline and then refined with Newton iterations until it changes
+            less than the given tolerance.
+        '''
+        point_local = (self.matrix_world.inverted() @ point).to_2d()
+        q = np.array(point_local)
+        # Step 1: project onto the closest segment of the coarse polyline
+        s_values, points = self.get_projection_polyline()
+        segments = points[1:] - points[:-1]
+        segments_length_squared = np.einsum('ij,ij->i', segments, segments)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = np.einsum('ij,ij->i', q - points[:-1], segments) / segments_length_squared
+        u = np.clip(np.nan_to_num(u), 0.0, 1.0)
+        distances_squared = np.sum((points[:-1] + u[:, np.newaxis] * segments - q)**2, axis=1)
+        idx_min = int(np.argmin(distances_squared))
+        s = float(s_values[idx_min] + u[idx_min] * (s_values[idx_min + 1] - s_values[idx_min]))
+        # Step 2: refine on the exact curve, find the root of the tangential
+        # distance d(s) = (q - p(s)) . T(s) with d'(s) = -1 + curvature * t(s)
+        x, y, hdg, curvature = self.sample_plan_view(s)
+        for _ in range(self.projection_max_iterations):
+            dx = point_local.x - x
+            dy = point_local.y - y
+            distance_tangential = dx * cos(hdg) + dy * sin(hdg)
+            distance_normal = -dx * sin(hdg) + dy * cos(hdg)
+            derivative = 1.0 - curvature * distance_normal
+            if derivative < 0.1:
+                # Too close to or behind the center of curvature
+                derivative = 0.1
+            s_new = min(max(s + distance_tangential / derivative, 0.0), self.total_length)
+            if abs(s_new - s) < tolerance:
+                if s_new != s:
+                    s = s_new
+                    x, y, hdg, curvature = self.sample_plan_view(s)
+                break
+            s = s_new
+            x, y, hdg, curvature = self.sample_plan_view(s)
+        closest_point = Vector((x, y))
         # Calculate Frenet t coordinate value
-        vec_t = Vector((1.0, 0.0))
-        vec_t.rotate(Matrix.Rotation(closest_point_heading + pi/2, 2))
-        t = copysign(distance[idx_min], vec_t.dot(point_local.to_2d() - closest_point))
-        return closest_point, closest_point_heading, s_values[idx_min], t
+        vec_t = Vector((-sin(hdg), cos(hdg)))
+        t = copysign((point_local - closest_point).length, vec_t.dot(point_local - closest_point))
+        return closest_point, hdg, s, t
 
     def get_section_idx_and_s(self, s):
         '''
             Return the index of the geometry section with the given s and the s
             value realtive to the start of the section.
         '''
-        idx_section = 0
-        s_acc = 0
-        s_section = 0
-        for idx in range(len(self.sections)):
-            s_section = s - s_acc
-            s_acc += self.sections[idx]['length']
-            if s <= s_acc:
-                idx_section = idx
-                break
+        idx_section = min(bisect_left(self.sections_s_end, s), len(self.sections) - 1)
+        s_section = s - self.sections_s_start[idx_section]
         return idx_section, s_section
 
+    def get_section_idx_and_s_batch(self, s_array):
+        '''
+            Return arrays of geometry section indices and s values relative
+            to the start of the sections for an array of s values.
+        '''
+        idx_sections = np.searchsorted(self.sections_s_end, s_array, side='left')
+        idx_sections = np.minimum(idx_sections, len(self.sections) - 1)
+        s_starts = np.asarray(self.sections_s_start)
+        return idx_sections, s_array - s_starts[idx_sections]
+
     def calculate_elevation(self, s):
         '''
             Return the elevation level for the given value of s in the
             geometry section with the given index and its curvature.
         '''
         idx_section, s_section = self.get_section_idx_and_s(s)
-        idx_elevation = 0
-        while idx_elevation < len(self.sections[idx_section]['elevation'])-1:
-            if s_section >= self.sections[idx_section]['elevation'][idx_elevation+1]['s_section']:
-                idx_elevation += 1
-            else:
-                break
+        idx_elevation = bisect_right(self.sections_elevation_s_start[idx_section], s_section)
         elevation = self.sections[idx_section]['elevation'][idx_elevation]
         # Calculate curvature of the elevation function
         # TODO convert curvature for t unequal 0
-        d2e_d2s = 2 * elevation['c'] + 3 * elevation['d'] * s_section
-        if d2e_d2s != 0:
-            de_ds = elevation['b']+ 2 * elevation['c'] * s_section + 3 * elevation['d'] * s_section
-            curvature_elevation = (1 + de_ds**2)**(3/2) / d2e_d2s
-        else:
-            curvature_elevation = 0.0
+        de_ds = elevation['b'] + 2 * elevation['c'] * s_section + 3 * elevation['d'] * s_section**2
+        d2e_d2s = 2 * elevation['c'] + 6 * elevation['d'] * s_section
+        curvature_elevation = d2e_d2s / (1 + de_ds**2)**(3/2)
         z = elevation['a'] + \
             elevation['b'] * s_section + \
             elevation['c'] * s_section**2 + \
             elevation['d'] * s_section**3
         return z, curvature_elevation
 
+    def calculate_elevation_batch(self, s_array):
+        '''
+            Return arrays of elevation levels and their curvature for an array
+            of s values.
+        '''
+        s_array = np.asarray(s_array, dtype=float)
+        z = np.zeros(s_array.shape)
+        curvature_elevation = np.zeros(s_array.shape)
+        idx_sections, s_sections = self.get_section_idx_and_s_batch(s_array)
+        for idx_section in np.unique(idx_sections):
+            mask_section = idx_sections == idx_section
+            s_section = s_sections[mask_section]
+            elevations = self.sections[idx_section]['elevation']
+            idx_elevations = np.searchsorted(self.sections_elevation_s_start[idx_section],
+                s_section, side='right')
+            z_section = np.zeros(s_section.shape)
+            curvature_section = np.zeros(s_section.shape)
+            for idx_elevation in np.unique(idx_elevations):
+                mask = idx_elevations == idx_elevation
+                elevation = elevations[idx_elevation]
+                s_e = s_section[mask]
+                # TODO convert curvature for t unequal 0
+                de_ds = elevation['b'] + 2 * elevation['c'] * s_e + 3 * elevation['d'] * s_e**2
+                d2e_d2s = 2 * elevation['c'] + 6 * elevation['d'] * s_e
+                curvature_section[mask] = d2e_d2s / (1 + de_ds**2)**(3/2)
+                z_section[mask] = elevation['a'] + \
+                    elevation['b'] * s_e + \
+                    elevation['c'] * s_e**2 + \
+                    elevation['d'] * s_e**3
+            z[mask_section] = z_section
+            curvature_elevation[mask_section] = curvature_section
+        return z, curvature_elevation
+
     def sample_cross_section(self, s, t_vec, with_lane_offset):
         '''
             Sample a cross section (multiple t values) in the local coordinate
@@ -470,15 +575,39 @@ class DSC_geometry():
         x_s, y_s, hdg, curvature_plan_view = self.sample_plan_view(s)
         z, curvature_elevation = self.calculate_elevation(s)
         curvature_abs = max(abs(curvature_plan_view), abs(curvature_elevation))
-        vector_hdg_t = Vector((1.0, 0.0))
-        vector_hdg_t.rotate(Matrix.Rotation(hdg + pi/2, 2))
-        xyz = []
-        for t in t_vec:
-            if with_lane_offset:
-                lane_offset = helpers.calculate_lane_offset(s, self.lane_offset_coefficients, self.total_length)
-            else:
-                lane_offset = 0.0
-            xy_vec = Vector((x_s, y_s)) + t * vector_hdg_t + lane_offset * vector_hdg_t
-            xyz += [(xy_vec.x, xy_vec.y, z)]
+        # Lane offset only depends on s so add it to all t values
+        if with_lane_offset:
+            lane_offset = helpers.calculate_lane_offset(s, self.lane_offset_coefficients, self.total_length)
+        else:
+            lane_offset = 0.0
+        normal_x = -sin(hdg)
+        normal_y = cos(hdg)
+        xyz = [(x_s + (t + lane_offset) * normal_x, y_s + (t + lane_offset) * normal_y, z)
+               for t in t_vec]
         return xyz, hdg, curvature_abs
 
+    def sample_cross_section_grid(self, s_array, t_matrix, with_lane_offset=True):
+        '''
+            Sample cross sections for an array of s values with one row of t
+            values per s value in the local coordinate system. Return an
+            (n_s, n_t, 3) array of points and arrays of the corresponding
+            heading and curvature of the reference line.
+        '''
+        s_array = np.asarray(s_array, dtype=float)
+        t_matrix = np.asarray(t_matrix, dtype=float)
+        if t_matrix.ndim == 1:
+            t_matrix = np.broadcast_to(t_matrix, (len(s_array), len(t_matrix)))
+        x_s, y_s, hdg, curvature_plan_view = self.sample_plan_view_batch(s_array)
+        z, curvature_elevation = self.calculate_elevation_batch(s_array)
+        curvature_abs = np.maximum(np.abs(curvature_plan_view), np.abs(curvature_elevation))
+        # Lane offset only depends on s so evaluate it once per s value
+        if with_lane_offset:
+            lane_offset = helpers.calculate_lane_offset(s_array, self.lane_offset_coefficients, self.total_length)
+        else:
+            lane_offset = np.zeros(s_array.shape)
+        t_offset = t_matrix + lane_offset[:, np.newaxis]
+        xyz = np.empty(t_matrix.shape + (3,))
+        xyz[:, :, 0] = x_s[:, np.newaxis] - t_offset * np.sin(hdg)[:, np.newaxis]
+        xyz[:, :, 1] = y_s[:, np.newaxis] + t_offset * np.cos(hdg)[:, np.newaxis]
+        xyz[:, :, 2] = z[:, np.newaxis]
+        return xyz, hdg, curvature_abs
@@ -15,6 +15,7 @@ from . geometry import DSC_geometry
 
 from mathutils import Vector, Matrix
 from math import cos, inf, sin, pi, degrees
+import numpy as np
 
 
 class Arc():
@@ -148,4 +149,26 @@ class DSC_geometry_arc(DSC_geometry):
                 hdg = hdg_local - angle_s
         xyz_s_local = self.sections[idx_section]['matrix_local'] @ Vector((x_s, y_s, 0.0))
         curvature = self.section_curves[idx_section].curvature
-        return xyz_s_local[0], xyz_s_local[1], hdg, curvature
\ No newline at end of file
+        return xyz_s_local[0], xyz_s_local[1], hdg, curvature
+
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        arc = self.section_curves[idx_section]
+        hdg_local = self.sections[idx_section]['heading_start'] \
+                    - self.sections[0]['heading_start']
+        if arc.radius == inf:
+            # Circle degenerates into a straight line
+            x_s = s_section
+            y_s = np.zeros(s_section.shape)
+            hdg = np.full(s_section.shape, hdg_local)
+        else:
+            # We have a circle, the determinant tells us the direction
+            if arc.determinant > 0:
+                angle_s = s_section / arc.radius
+            else:
+                angle_s = -s_section / arc.radius
+            x_s = np.cos(angle_s + arc.offset_angle - pi/2) * arc.radius
+            y_s = np.sin(angle_s + arc.offset_angle - pi/2) * arc.radius + arc.offset_y
+            hdg = hdg_local + angle_s
+        x_s, y_s = self.transform_section_to_local_batch(idx_section, x_s, y_s)
+        curvature = np.full(s_section.shape, arc.curvature)
+        return x_s, y_s, hdg, curvature
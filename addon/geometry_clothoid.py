@@ -16,6 +16,102 @@ from . geometry import DSC_geometry
 from mathutils import Vector
 from pyclothoids import Clothoid
 from math import pi
+import numpy as np
+from scipy.special import fresnel
+
+
+def evaluate_clothoid(x_start, y_start, heading_start, curvature_start, dk, s):
+    '''
+        Return arrays x(s), y(s), heading(s) and curvature(s) of a clothoid
+        segment with the given start parameters for an array of s values.
+    '''
+    heading = heading_start + curvature_start * s + 0.5 * dk * s**2
+    curvature = curvature_start + dk * s
+    if dk == 0.0:
+        # Arc or line, use the chord formulation which is stable for small
+        # curvatures
+        heading_chord = heading_start + 0.5 * curvature_start * s
+        chord = s * np.sinc(0.5 * curvature_start * s / pi)
+        x = x_start + chord * np.cos(heading_chord)
+        y = y_start + chord * np.sin(heading_chord)
+    elif clothoid_fresnel_error(curvature_start, dk, s) < 1e-8:
+        x, y = evaluate_clothoid_fresnel(x_start, y_start, heading_start, curvature_start, dk, s)
+    else:
+        x, y = evaluate_clothoid_quadrature(x_start, y_start, heading_start, curvature_start, dk, s)
+    return x, y, heading, curvature
+
+def clothoid_fresnel_error(curvature_start, dk, s):
+    '''
+        Return an estimate of the absolute rounding error of the Fresnel
+        integral solution. The error grows with the distance of the samples
+        from the inflection point of the clothoid where the Fresnel integrals
+        of the start and end point nearly cancel out.
+    '''
+    s_max = np.max(s) if np.size(s) else 0.0
+    curvature_max = max(abs(curvature_start), abs(curvature_start + dk * s_max))
+    return np.sqrt(pi / abs(dk)) * (1.0 + curvature_max**2 / (2.0 * abs(dk))) * 4e-16
+
+def evaluate_clothoid_fresnel(x_start, y_start, heading_start, curvature_start, dk, s):
+    '''
+        Evaluate clothoid positions with Fresnel integrals by completing the
+        square of the heading polynomial around the inflection point.
+    '''
+    scale = np.sqrt(abs(dk) / pi)
+    phase = heading_start - curvature_start**2 / (2.0 * dk)
+    S_start, C_start = fresnel(curvature_start / dk * scale)
+    S_s, C_s = fresnel((s + curvature_start / dk) * scale)
+    delta_C = C_s - C_start
+    delta_S = S_s - S_start
+    if dk < 0.0:
+        delta_S = -delta_S
+    x = x_start + (np.cos(phase) * delta_C - np.sin(phase) * delta_S) / scale
+    y = y_start + (np.sin(phase) * delta_C + np.cos(phase) * delta_S) / scale
+    return x, y
+
+def evaluate_clothoid_quadrature(x_start, y_start, heading_start, curvature_start, dk, s,
+                                 max_angle_panel=1.0, order=8):
+    '''
+        Evaluate clothoid positions with a composite Gauss-Legendre quadrature
+        of the heading. Used where the Fresnel integral solution is badly
+        conditioned.
+    '''
+    nodes, weights = np.polynomial.legendre.leggauss(order)
+    def integrate(s_a, s_b):
+        s_half = 0.5 * (s_b - s_a)
+        s_nodes = (s_a + s_half)[..., np.newaxis] + s_half[..., np.newaxis] * nodes
+        heading = heading_start + curvature_start * s_nodes + 0.5 * dk * s_nodes**2
+        return s_half * np.sum(np.cos(heading) * weights, axis=-1), \
+            s_half * np.sum(np.sin(heading) * weights, axis=-1)
+    # Panels with limited heading change each
+    s_max = np.max(s) if np.size(s) else 0.0
+    angle_max = abs(curvature_start) * s_max + 0.5 * abs(dk) * s_max**2
+    num_panels = max(1, int(np.ceil(angle_max / max_angle_panel)))
+    s_panels = np.linspace(0.0, s_max, num_panels + 1)
+    dx_panels, dy_panels = integrate(s_panels[:-1], s_panels[1:])
+    x_panels = np.concatenate(([0.0], np.cumsum(dx_panels)))
+    y_panels = np.concatenate(([0.0], np.cumsum(dy_panels)))
+    # Integrate from the start of the panel of each sample
+    idx_panels = np.clip(np.searchsorted(s_panels, s, side='right') - 1, 0, num_panels - 1)
+    dx, dy = integrate(s_panels[idx_panels], s)
+    return x_start + x_panels[idx_panels] + dx, y_start + y_panels[idx_panels] + dy
+
+
+class Clothoid_parameters():
+    '''
+        Start parameters and length of a solved clothoid segment.
+    '''
+
+    def __init__(self, clothoid):
+        self.x_start = clothoid.XStart
+        self.y_start = clothoid.YStart
+        self.heading_start = clothoid.ThetaStart
+        self.curvature_start = clothoid.KappaStart
+        self.dk = clothoid.dk
+        self.length = clothoid.length
+
+    def evaluate(self, s):
+        return evaluate_clothoid(self.x_start, self.y_start, self.heading_start,
+            self.curvature_start, self.dk, s)
 
 
 class DSC_geometry_clothoid(DSC_geometry):
@@ -28,26 +124,27 @@ class DSC_geometry_clothoid(DSC_geometry):
         point_start_local = self.matrix_world.inverted() @ Vector(section['point_start'])
         point_end_local = self.matrix_world.inverted() @ Vector(section['point_end'])
         if section['geometry_solver'] == 'hermite' or section['geometry_solver'] == 'default':
-            section_curve = Clothoid.G1Hermite(
+            clothoid = Clothoid.G1Hermite(
                 point_start_local.x, point_start_local.y, section['heading_start'] - heading_local,
                 point_end_local.x, point_end_local.y, section['heading_end'] - heading_local)
         elif section['geometry_solver'] == 'forward':
-            section_curve = Clothoid.Forward(
+            clothoid = Clothoid.Forward(
                 point_start_local.x, point_start_local.y, section['heading_start'] - heading_local,
                 section['curvature_start'], point_end_local.x, point_end_local.y)
-        self.section_curves.append(section_curve)
+        self.section_curves.append(Clothoid_parameters(clothoid))
 
     def update_plan_view(self, params, geometry_solver='default'):
         # Calculate geometry
         if geometry_solver == 'hermite' or geometry_solver == 'default':
-            self.section_curves[-1] = Clothoid.G1Hermite(
+            clothoid = Clothoid.G1Hermite(
                 self.point_start_local.x, self.point_start_local.y, self.heading_start_local,
                 self.point_end_local.x, self.point_end_local.y, self.heading_end_local)
+            self.section_curves[-1] = Clothoid_parameters(clothoid)
 
             # When the heading of start and end point is colinear the curvature
             # can become very small and the length becomes huge (solution is a gigantic
             # circle). Therefore as a workaround we limit the length to 10 km.
-            if self.section_curves[-1].length < 10000.0:
+            if clothoid.length < 10000.0:
                 self.sections[-1]['valid'] = True
             else:
                 self.sections[-1]['valid'] = False
@@ -56,14 +153,15 @@ class DSC_geometry_clothoid(DSC_geometry):
                 # Handle edge case where points are identical
                 self.sections[-1]['valid'] = False
             else:
-                self.section_curves[-1] = Clothoid.Forward(
+                clothoid = Clothoid.Forward(
                     self.point_start_local.x, self.point_start_local.y, self.heading_start_local,
                     self.curvature_start_local, self.point_end_local.x, self.point_end_local.y)
+                self.section_curves[-1] = Clothoid_parameters(clothoid)
 
                 # When the heading of start and end point is colinear the curvature
                 # can become very small and the length becomes huge (solution is a gigantic
                 # circle). Therefore as a workaround we limit the length to 10 km.
-                if self.section_curves[-1].length < 10000.0:
+                if clothoid.length < 10000.0:
                     self.sections[-1]['valid'] = True
                 else:
                     self.sections[-1]['valid'] = False
@@ -75,16 +173,15 @@ class DSC_geometry_clothoid(DSC_geometry):
             self.sections[-1]['point_start'] = params['points'][-2]
             self.sections[-1]['heading_start'] = params['heading_start'] + self.heading_start_local
             self.sections[-1]['point_end'] = params['points'][-1]
-            self.sections[-1]['heading_end'] = params['heading_start'] + self.section_curves[-1].ThetaEnd
-            self.sections[-1]['length'] = self.section_curves[-1].length
-            self.sections[-1]['curvature_start'] = self.section_curves[-1].KappaStart
-            self.sections[-1]['curvature_end'] = self.section_curves[-1].KappaEnd
-            self.sections[-1]['angle_end'] = self.section_curves[-1].ThetaEnd
+            self.sections[-1]['heading_end'] = params['heading_start'] + clothoid.ThetaEnd
+            self.sections[-1]['length'] = clothoid.length
+            self.sections[-1]['curvature_start'] = clothoid.KappaStart
+            self.sections[-1]['curvature_end'] = clothoid.KappaEnd
+            self.sections[-1]['angle_end'] = clothoid.ThetaEnd
 
     def sample_plan_view(self, s):
         idx_section, s_section = self.get_section_idx_and_s(s)
-        x_s = self.section_curves[idx_section].X(s_section)
-        y_s = self.section_curves[idx_section].Y(s_section)
-        curvature = self.section_curves[idx_section].KappaStart + self.section_curves[idx_section].dk * s_section
-        hdg = self.section_curves[idx_section].Theta(s_section)
-        return x_s, y_s, hdg, curvature
+        return tuple(float(value) for value in self.section_curves[idx_section].evaluate(s_section))
+
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        return self.section_curves[idx_section].evaluate(s_section)
@@ -12,9 +12,11 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from . geometry import DSC_geometry
+from . geometry_clothoid import Clothoid_parameters
 
 from mathutils import Vector
 from math import pi
+import numpy as np
 from pyclothoids import SolveG2
 
 
@@ -26,6 +28,7 @@ class Clothoid_triple():
         self.segments = SolveG2(
             point_start.x, point_start.y, heading_start, curvature_start,
             point_end.x, point_end.y, heading_end, curvature_end)
+        self.segments_parameters = [Clothoid_parameters(segment) for segment in self.segments]
 
     def length(self):
         return sum((self.segments[0].length, self.segments[1].length, self.segments[2].length))
@@ -80,20 +83,29 @@ class DSC_geometry_clothoid_triple(DSC_geometry):
 
     def sample_plan_view(self, s):
         idx_section, s_section = self.get_section_idx_and_s(s)
-
+        segments = self.section_curves[idx_section].segments_parameters
         # Find the s value in the right segment of the triple clothoid
         s_segment = s_section
         idx_segment = 0
         for idx in range(2):
-            length_segment = self.section_curves[idx_section].segments[idx].length
-            if s_segment <= length_segment and idx_segment <= 2:
+            if s_segment <= segments[idx].length:
                 break
             idx_segment += 1
-            s_segment -= length_segment
+            s_segment -= segments[idx].length
+        return tuple(float(value) for value in segments[idx_segment].evaluate(s_segment))
 
-        x_s = self.section_curves[idx_section].segments[idx_segment].X(s_segment)
-        y_s = self.section_curves[idx_section].segments[idx_segment].Y(s_segment)
-        curvature = self.section_curves[idx_section].segments[idx_segment].KappaStart \
-                  + self.section_curves[idx_section].segments[idx_segment].dk * s_segment
-        hdg = self.section_curves[idx_section].segments[idx_segment].Theta(s_segment)
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        segments = self.section_curves[idx_section].segments_parameters
+        x_s = np.zeros(s_section.shape)
+        y_s = np.zeros(s_section.shape)
+        hdg = np.zeros(s_section.shape)
+        curvature = np.zeros(s_section.shape)
+        # Find the s value in the right segment of the triple clothoid
+        s_segment_ends = np.cumsum([segments[0].length, segments[1].length])
+        idx_segments = np.searchsorted(s_segment_ends, s_section, side='left')
+        s_segment_starts = np.array([0.0, s_segment_ends[0], s_segment_ends[1]])
+        for idx_segment in np.unique(idx_segments):
+            mask = idx_segments == idx_segment
+            x_s[mask], y_s[mask], hdg[mask], curvature[mask] = segments[idx_segment].evaluate(
+                s_section[mask] - s_segment_starts[idx_segment])
         return x_s, y_s, hdg, curvature
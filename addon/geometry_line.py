@@ -16,6 +16,7 @@ from . import helpers
 
 from mathutils import Vector, Matrix
 from math import pi
+import numpy as np
 
 
 class DSC_geometry_line(DSC_geometry):
@@ -51,4 +52,11 @@ class DSC_geometry_line(DSC_geometry):
         curvature = 0
         hdg = 0
         xyz_s_local = self.sections[idx_section]['matrix_local'] @ Vector((x_s, y_s, 0.0))
-        return xyz_s_local[0], xyz_s_local[1], hdg, curvature
\ No newline at end of file
+        return xyz_s_local[0], xyz_s_local[1], hdg, curvature
+
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        x_s, y_s = self.transform_section_to_local_batch(
+            idx_section, s_section, np.zeros(s_section.shape))
+        hdg = np.zeros(s_section.shape)
+        curvature = np.zeros(s_section.shape)
+        return x_s, y_s, hdg, curvature
@@ -16,7 +16,56 @@ from . geometry import DSC_geometry
 from mathutils import Vector, Matrix
 from math import sqrt, pi
 import numpy as np
-from scipy.integrate import quad
+
+
+class Arc_length_table():
+
+    def __init__(self, coefficients_u, coefficients_v, num_intervals=64, order=5):
+        self.coefficients_du = (coefficients_u['b'], 2 * coefficients_u['c'], 3 * coefficients_u['d'])
+        self.coefficients_dv = (coefficients_v['b'], 2 * coefficients_v['c'], 3 * coefficients_v['d'])
+        # Integrate the speed |dxy/dp| with a fixed order Gauss-Legendre
+        # quadrature on each interval of p
+        nodes, weights = np.polynomial.legendre.leggauss(order)
+        self.p_values = np.linspace(0.0, 1.0, num_intervals + 1)
+        half_width = 0.5 / num_intervals
+        p_nodes = (self.p_values[:-1, np.newaxis] + half_width) + half_width * nodes
+        s_intervals = half_width * np.sum(self.speed(p_nodes) * weights, axis=1)
+        self.s_values = np.concatenate(([0.0], np.cumsum(s_intervals)))
+        self.length = float(self.s_values[-1])
+        # Slope dp/ds for Hermite interpolation of p(s), fall back to the
+        # secant slope where the curve has a cusp
+        speed_values = self.speed(self.p_values)
+        slopes_secant = np.diff(self.p_values) / np.maximum(s_intervals, 1e-12)
+        slopes_secant = np.concatenate((slopes_secant[:1], slopes_secant))
+        with np.errstate(divide='ignore'):
+            self.dp_ds_values = np.where(speed_values > 1e-9, 1.0 / speed_values, slopes_secant)
+
+    def speed(self, p):
+        '''
+            Return the speed |dxy/dp| of the curve for the given p values.
+        '''
+        du_dp = self.coefficients_du[0] + self.coefficients_du[1] * p + self.coefficients_du[2] * p**2
+        dv_dp = self.coefficients_dv[0] + self.coefficients_dv[1] * p + self.coefficients_dv[2] * p**2
+        return np.hypot(du_dp, dv_dp)
+
+    def get_p(self, s):
+        '''
+            Return the curve parameter p for the given arc length values s.
+        '''
+        if self.length == 0.0:
+            return np.zeros(np.shape(s))
+        s = np.clip(s, 0.0, self.length)
+        idx = np.clip(np.searchsorted(self.s_values, s, side='right') - 1, 0, len(self.s_values) - 2)
+        h = self.s_values[idx + 1] - self.s_values[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.where(h > 0.0, (s - self.s_values[idx]) / h, 0.0)
+        # Cubic Hermite basis functions
+        h00 = 2 * x**3 - 3 * x**2 + 1
+        h10 = x**3 - 2 * x**2 + x
+        h01 = -2 * x**3 + 3 * x**2
+        h11 = x**3 - x**2
+        return h00 * self.p_values[idx] + h10 * h * self.dp_ds_values[idx] \
+            + h01 * self.p_values[idx + 1] + h11 * h * self.dp_ds_values[idx + 1]
 
 
 class DSC_geometry_parampoly3(DSC_geometry):
@@ -25,7 +74,8 @@ class DSC_geometry_parampoly3(DSC_geometry):
         super().__init__()
 
     def load_section_curve(self, section):
-        pass
+        self.section_curves.append(
+            Arc_length_table(section['coefficients_u'], section['coefficients_v']))
 
     def evaluate_cubic_polynomial_derivative(self, control_points_1d, p):
         """
@@ -58,24 +108,6 @@ class DSC_geometry_parampoly3(DSC_geometry):
 
         return curvature
 
-    def arc_length_integrand(self, control_points, p):
-        """
-            Integrand function for calculating arc length
-        """
-        control_points_x = [c.x for c in control_points]
-        control_points_y = [c.y for c in control_points]
-        derivative_x = self.evaluate_cubic_polynomial_derivative(control_points_x, p)
-        derivative_y = self.evaluate_cubic_polynomial_derivative(control_points_y, p)
-        return np.sqrt(derivative_x**2 + derivative_y**2)
-
-    def calculate_arc_length(self, control_points, num_points=100):
-        """
-            Calculate the arc length of the cubic curve
-        """
-        p_values = np.linspace(0, 1, num_points)
-        arc_lengths_np = np.array([quad(lambda p: self.arc_length_integrand(control_points, p), 0, p)[0] for p in p_values])
-        return float(arc_lengths_np[-1])
-
     def calculate_control_points(self):
         '''
             Calculate 4 control points for the cubic Bezier curve
@@ -103,15 +135,14 @@ class DSC_geometry_parampoly3(DSC_geometry):
         return coefficients_x.tolist(), coefficients_y.tolist()
 
     def update_plan_view(self, params, geometry_solver='default'):
-        # Calculate curve length for arc length parameterization
-        # TODO: make sure 100 points are sufficient and not too much
-        num_points_arc_length = 100
         control_points = self.calculate_control_points()
-        length = self.calculate_arc_length(control_points, num_points_arc_length)
-
-        # Calculate coefficients using the length
         coefficients_u, coefficients_v = self.calculate_cubic_polynomial_coefficients(control_points)
 
+        # Calculate curve length and lookup table for arc length parameterization
+        self.section_curves[-1] = Arc_length_table(
+            dict(zip('abcd', coefficients_u)), dict(zip('abcd', coefficients_v)))
+        length = self.section_curves[-1].length
+
         # Calculate the end heading using the first derivative
         control_points_x = [control_points[0][0], control_points[1][0],
                             control_points[2][0], control_points[3][0]]
@@ -152,8 +183,7 @@ class DSC_geometry_parampoly3(DSC_geometry):
         idx_section, s_section = self.get_section_idx_and_s(s)
         coeffs_u = self.sections[idx_section]['coefficients_u']
         coeffs_v = self.sections[idx_section]['coefficients_v']
-        length_section = self.sections[idx_section]['length']
-        p = s_section / length_section
+        p = float(self.section_curves[idx_section].get_p(s_section))
         x_s = coeffs_u['a'] + coeffs_u['b'] * p \
             + coeffs_u['c'] * p**2 + coeffs_u['d'] * p**3
         y_s = coeffs_v['a'] + coeffs_v['b'] * p \
@@ -173,3 +203,22 @@ class DSC_geometry_parampoly3(DSC_geometry):
         curvature = (dx_dp * d2y_dp2 - dy_dp * d2x_dp2) / (dx_dp**2 + dy_dp**2)**(3/2)
 
         return x_s, y_s, hdg, curvature
+
+    def sample_plan_view_section_batch(self, idx_section, s_section):
+        coeffs_u = self.sections[idx_section]['coefficients_u']
+        coeffs_v = self.sections[idx_section]['coefficients_v']
+        p = self.section_curves[idx_section].get_p(s_section)
+        x_s = coeffs_u['a'] + coeffs_u['b'] * p \
+            + coeffs_u['c'] * p**2 + coeffs_u['d'] * p**3
+        y_s = coeffs_v['a'] + coeffs_v['b'] * p \
+            + coeffs_v['c'] * p**2 + coeffs_v['d'] * p**3
+        # Heading calculation
+        dx_dp = coeffs_u['b'] + 2 * coeffs_u['c'] * p + 3 * coeffs_u['d'] * p**2
+        dy_dp = coeffs_v['b'] + 2 * coeffs_v['c'] * p + 3 * coeffs_v['d'] * p**2
+        hdg = np.arctan2(dy_dp, dx_dp)
+        # Curvature calculation
+        d2x_dp2 = 2 * coeffs_u['c'] + 6 * coeffs_u['d'] * p
+        d2y_dp2 = 2 * coeffs_v['c'] + 6 * coeffs_v['d'] * p
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curvature = (dx_dp * d2y_dp2 - dy_dp * d2x_dp2) / (dx_dp**2 + dy_dp**2)**(3/2)
+        return x_s, y_s, hdg, curvature
@@ -15,10 +15,13 @@ import bpy
 import bmesh
 import addon_utils
 import os
+import numpy as np
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
 from mathutils.geometry import intersect_line_plane
 from mathutils import Vector, Matrix
 
+from . road_mark_dash_pattern import get_dash_phase_end, get_dash_phase_reversed
+
 def call_operator_deferred(op_func):
     '''Call an operator function deferred with a proper VIEW_3D context override.
        This is needed when calling operators from timer callbacks where context.area is None.
@@ -62,6 +65,11 @@ def get_new_id_opendrive(context):
         link_object_opendrive(context, dummy_obj)
     id_next = dummy_obj['id_odr_next']
     dummy_obj['id_odr_next'] += 1
+    # The ID will be assigned to an object, it may have been used by an
+    # object which is gone after undo
+    invalidate_object_xodr_index()
+    from .modal_road_object_base import invalidate_geometry_cache
+    invalidate_geometry_cache(id_next)
     return id_next
 
 def get_new_id_openscenario(context):
@@ -164,15 +172,135 @@ def link_object_openscenario(context, obj, subcategory=None):
         collection = ensure_subcollection_openscenario(context, subcategory)
         collection.objects.link(obj)
 
+# Index of the OpenDRIVE objects by their ID, rebuilt lazily when it is
+# invalidated or found to be outdated
+object_xodr_index = {}
+object_xodr_index_valid = False
+object_xodr_index_num_objects = 0
+
+def invalidate_object_xodr_index():
+    '''
+        Mark the index of OpenDRIVE objects by ID as outdated.
+    '''
+    global object_xodr_index_valid
+    object_xodr_index_valid = False
+
+def update_object_xodr_index(collection):
+    '''
+        Rebuild the index of OpenDRIVE objects by ID.
+    '''
+    global object_xodr_index_valid, object_xodr_index_num_objects
+    object_xodr_index.clear()
+    for obj in collection.objects:
+        id_odr = obj.get('id_odr')
+        # Keep the first object like a linear search would
+        if id_odr is not None and id_odr not in object_xodr_index:
+            object_xodr_index[id_odr] = obj
+    object_xodr_index_num_objects = len(collection.objects)
+    object_xodr_index_valid = True
+
+def is_object_xodr_index_entry_valid(collection, obj, id_odr):
+    '''
+        Return True if the object still exists, is part of the collection and
+        has the given ID.
+    '''
+    try:
+        return obj.get('id_odr') == id_odr and collection.objects.get(obj.name) == obj
+    except ReferenceError:
+        # The object has been removed
+        return False
+
 def get_object_xodr_by_id(id_odr):
     '''
         Get reference to OpenDRIVE object by ID, return None if not found.
     '''
     collection = bpy.data.collections.get('OpenDRIVE')
+    if collection is None:
+        return None
+    if not object_xodr_index_valid or object_xodr_index_num_objects != len(collection.objects):
+        update_object_xodr_index(collection)
+        return object_xodr_index.get(id_odr)
+    obj = object_xodr_index.get(id_odr)
+    if obj is not None and is_object_xodr_index_entry_valid(collection, obj, id_odr):
+        return obj
+    # Object removed, renamed or got another ID or an object has been added
+    # while another one has been removed leaving the number of objects as is
+    update_object_xodr_index(collection)
+    return object_xodr_index.get(id_odr)
+
+def invalidate_object_xodr_index_on_depsgraph_update(depsgraph):
+    '''
+        Invalidate the index of OpenDRIVE objects if an updated object got an
+        ID which is not indexed for it.
+    '''
+    if not object_xodr_index_valid or not depsgraph.id_type_updated('OBJECT'):
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            obj = update.id.original
+            id_odr = obj.get('id_odr')
+            if id_odr is not None and object_xodr_index.get(id_odr) != obj:
+                invalidate_object_xodr_index()
+                return
+
+# Custom properties with the OpenDRIVE ID of the road object on objects which
+# are part of the road and need to be removed together with it
+road_part_id_properties = ['guard_rail_poles_road_id', 'road_chunk_id_odr']
+opendrive_num_objects = 0
+
+def remove_orphaned_road_parts(collection):
+    '''
+        Remove all objects of a collection which are part of a road object
+        that does not exist anymore. Return the number of removed objects.
+    '''
+    objs_orphaned = []
     for obj in collection.objects:
-        if 'id_odr' in obj:
-            if obj['id_odr'] == id_odr:
-                return obj
+        for key in road_part_id_properties:
+            if key in obj and get_object_xodr_by_id(obj[key]) is None:
+                objs_orphaned.append(obj)
+                break
+    for obj in objs_orphaned:
+        mesh = obj.data
+        bpy.data.objects.remove(obj, do_unlink=True)
+        if mesh is not None and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    return len(objs_orphaned)
+
+def remove_orphaned_road_parts_on_depsgraph_update(depsgraph):
+    '''
+        Remove the parts of deleted road objects after objects have been
+        removed from the OpenDRIVE collection.
+    '''
+    global opendrive_num_objects
+    if not depsgraph.id_type_updated('COLLECTION'):
+        return
+    collection = bpy.data.collections.get('OpenDRIVE')
+    if collection is None:
+        return
+    num_objects = len(collection.objects)
+    if num_objects < opendrive_num_objects:
+        num_objects -= remove_orphaned_road_parts(collection)
+    opendrive_num_objects = num_objects
+
+def get_road_mark_dash_phase_at_contact_point(obj, cp_type):
+    '''
+        Return the phase of the broken road mark dash pattern of a road object
+        continued beyond the contact point together with the line length and
+        space of the pattern. Return None if there is nothing to continue.
+    '''
+    if obj is None or 'road_mark_line_length' not in obj:
+        return None
+    line_length = obj['road_mark_line_length']
+    line_space = obj['road_mark_line_space']
+    phase_start = obj.get('road_mark_dash_phase_start', 0.0)
+    if cp_type in ['cp_end_l', 'cp_end_r']:
+        phase = get_dash_phase_end(obj['geometry_total_length'], line_length, line_space, phase_start)
+    elif cp_type in ['cp_start_l', 'cp_start_r']:
+        # Continue the pattern against the direction of the other road
+        phase = get_dash_phase_reversed(line_length, line_space, phase_start)
+    else:
+        return None
+    return phase, line_length, line_space
 
 def create_object_xodr_links(obj, link_type, cp_type_other, id_other, id_extra, id_lane):
     '''
@@ -488,6 +616,9 @@ def raycast_mouse_to_dsc_object(context, event):
         direction=view_vector_mouse)
     # Filter object type
     if hit:
+        # Mesh chunks of long roads stand for their road object
+        if 'road_chunk_id_odr' in obj and obj.parent is not None:
+            obj = obj.parent
         # Return hit only if not filtered out
         if 'dsc_category' in obj:
             return True, point, normal, obj
@@ -540,9 +671,9 @@ def get_lane_center_from_road_surface_hit(obj, point):
         return None, None
 
     if obj['dsc_type'].startswith('road_') and obj['dsc_type'] != 'road_object':
-        from .modal_road_object_base import load_geometry
+        from .modal_road_object_base import load_geometry_cached
 
-        geometry = load_geometry(obj['dsc_type'], obj['geometry'], obj['lane_offset_coefficients'])
+        geometry = load_geometry_cached(obj)
         if geometry is None:
             return None, None
 
@@ -1007,22 +1138,24 @@ def mouse_to_road_surface_params(context, event):
             'slope': slope,
             }
 
+# Materials and their colors in the slot order used by assign_materials
+default_materials = {
+    'road_asphalt': [.3, .3, .3, 1.0],
+    'road_mark_white': [.9, .9, .9, 1.0],
+    'road_mark_yellow': [.85, .63, .0, 1.0],
+    'grass': [.05, .6, .01, 1.0],
+    'road_signal_pole': [.4, .4, .4, 1.0],
+    'traffic_light_housing': [.1, .1, .1, 1.0],
+    'traffic_light_red': [1.0, .0, .0, 1.0],
+    'traffic_light_yellow': [1.0, 1.0, .0, 1.0],
+    'traffic_light_green': [.0, 1.0, .0, 1.0],
+    'guard_rail_metal': [.7, .7, .7, 1.0],
+}
+
 def assign_materials(obj):
     '''
         Assign materials for asphalt and markings to object.
     '''
-    default_materials = {
-        'road_asphalt': [.3, .3, .3, 1.0],
-        'road_mark_white': [.9, .9, .9, 1.0],
-        'road_mark_yellow': [.85, .63, .0, 1.0],
-        'grass': [.05, .6, .01, 1.0],
-        'road_signal_pole': [.4, .4, .4, 1.0],
-        'traffic_light_housing': [.1, .1, .1, 1.0],
-        'traffic_light_red': [1.0, .0, .0, 1.0],
-        'traffic_light_yellow': [1.0, 1.0, .0, 1.0],
-        'traffic_light_green': [.0, 1.0, .0, 1.0],
-        'guard_rail_metal': [.7, .7, .7, 1.0],
-    }
     for key in default_materials.keys():
         material = bpy.data.materials.get(key)
         if material is None:
@@ -1054,6 +1187,13 @@ def get_paint_material_name(color):
     '''
     return 'paint' + '_{:.2f}_{:.2f}_{:.2f}'.format(*color[0:4])
 
+def get_default_material_index(material_name):
+    '''
+        Return index of material slot after materials have been assigned with
+        assign_materials.
+    '''
+    return list(default_materials).index(material_name)
+
 def get_material_index(obj, material_name):
     '''
         Return index of material slot based on material name.
@@ -1063,19 +1203,103 @@ def get_material_index(obj, material_name):
             return idx
     return None
 
-def replace_mesh(obj, mesh):
+def get_mesh_buffers(mesh):
     '''
-        Replace existing mesh
+        Return the geometry of a mesh as flat NumPy buffers in the layout of
+        create_mesh_from_buffers.
     '''
-    # Delete old mesh data
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    verts = [v for v in bm.verts]
-    bmesh.ops.delete(bm, geom=verts, context='VERTS')
-    bm.to_mesh(obj.data)
-    bm.free()
-    # Set new mesh data
-    obj.data = mesh
+    vertices = np.empty(3 * len(mesh.vertices), dtype=np.float32)
+    mesh.vertices.foreach_get('co', vertices)
+    edges = np.empty(2 * len(mesh.edges), dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+    polygon_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', polygon_totals)
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_indices)
+    return vertices.reshape(-1, 3), edges.reshape(-1, 2), loops, polygon_totals, material_indices
+
+def replace_mesh(obj, mesh):
+    '''
+        Replace the geometry of the mesh of an object in place with the
+        geometry of the given mesh. The given mesh is removed afterwards if no
+        other object uses it.
+    '''
+    if obj.data is mesh:
+        return
+    if list(obj.data.materials) != list(mesh.materials):
+        obj.data.materials.clear()
+        for material in mesh.materials:
+            obj.data.materials.append(material)
+    update_mesh_from_buffers(obj.data, *get_mesh_buffers(mesh))
+    if mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
+def purge_orphan_temp_meshes():
+    '''
+        Remove temporary stencil and preview meshes which are not used by any
+        object anymore. Return the number of removed meshes.
+    '''
+    meshes_orphan = [mesh for mesh in bpy.data.meshes if mesh.name.startswith(('temp', 'dsc_stencil'))
+                     and mesh.users == int(mesh.use_fake_user)]
+    for mesh in meshes_orphan:
+        bpy.data.meshes.remove(mesh)
+    return len(meshes_orphan)
+
+def get_road_mesh_tolerances(context, lod):
+    '''
+        Return the maximum chordal and elevation deviation of road meshes for
+        the level of detail 'preview', 'viewport' or 'export'.
+    '''
+    dsc_properties = context.scene.dsc_properties
+    if lod == 'preview':
+        factor = dsc_properties.road_mesh_lod_preview_factor
+    elif lod == 'export':
+        factor = dsc_properties.road_mesh_lod_export_factor
+    else:
+        factor = 1.0
+    return dsc_properties.road_mesh_max_chordal_deviation * factor, \
+        dsc_properties.road_mesh_max_elevation_deviation * factor
+
+def create_mesh_from_buffers(name, vertices, edges, loops=None, polygon_totals=None,
+                             material_indices=None):
+    '''
+        Create a mesh from flat NumPy buffers. Vertices are a (n, 3) array,
+        edges a (n, 2) array, loops contain the vertex indices of all polygons
+        concatenated and polygon_totals the number of loops of each polygon.
+    '''
+    mesh = bpy.data.meshes.new(name)
+    update_mesh_from_buffers(mesh, vertices, edges, loops, polygon_totals, material_indices)
+    return mesh
+
+def update_mesh_from_buffers(mesh, vertices, edges, loops=None, polygon_totals=None,
+                             material_indices=None):
+    '''
+        Replace the geometry of an existing mesh in place with the geometry
+        from flat NumPy buffers, see create_mesh_from_buffers.
+    '''
+    mesh.clear_geometry()
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set('co', np.ascontiguousarray(vertices, dtype=np.float32).ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set('vertices', np.ascontiguousarray(edges, dtype=np.int32).ravel())
+    num_polygons = 0 if polygon_totals is None else len(polygon_totals)
+    if num_polygons > 0:
+        polygon_totals = np.asarray(polygon_totals, dtype=np.int32)
+        polygon_starts = np.cumsum(polygon_totals, dtype=np.int32) - polygon_totals
+        mesh.loops.add(len(loops))
+        mesh.loops.foreach_set('vertex_index', np.asarray(loops, dtype=np.int32))
+        mesh.polygons.add(num_polygons)
+        mesh.polygons.foreach_set('loop_start', polygon_starts)
+        if bpy.app.version < (4, 0, 0):
+            mesh.polygons.foreach_set('loop_total', polygon_totals)
+        if material_indices is not None:
+            mesh.polygons.foreach_set('material_index', np.asarray(material_indices, dtype=np.int32))
+        if hasattr(mesh, 'shade_flat'):
+            mesh.shade_flat()
+    if len(edges) > 0 or num_polygons > 0:
+        mesh.update(calc_edges=num_polygons > 0, calc_edges_loose=len(edges) > 0)
 
 def triangulate_quad_mesh(obj):
     '''
@@ -199,6 +199,8 @@ class junction:
         if stencil is not None:
             bpy.data.objects.remove(stencil, do_unlink=True)
             self.stencil = None
+        # The stencil mesh has a fake user and would be left behind
+        helpers.purge_orphan_temp_meshes()
 
     def update_stencil(self):
         '''
@@ -0,0 +1,96 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+class lane_snapshot:
+    '''
+        Immutable copy of the lane properties needed for meshing. Taken once
+        per rebuild so that meshing does not depend on Blender data.
+    '''
+
+    __slots__ = ('side', 'type', 'width_start', 'width_end', 'road_mark_type',
+                 'road_mark_weight', 'road_mark_width', 'road_mark_color',
+                 'guard_rail', 'guard_rail_lateral_offset')
+
+    def __init__(self, side, type, width_start, width_end, road_mark_type, road_mark_weight,
+                 road_mark_width, road_mark_color, guard_rail, guard_rail_lateral_offset):
+        values = (str(side), str(type), float(width_start), float(width_end), str(road_mark_type),
+                  str(road_mark_weight), float(road_mark_width), str(road_mark_color),
+                  bool(guard_rail), float(guard_rail_lateral_offset))
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('lane snapshot is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('lane snapshot is immutable')
+
+    def astuple(self):
+        '''
+            Return all values of the lane as tuple.
+        '''
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, lane_snapshot):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        return 'lane_snapshot({})'.format(', '.join(
+            '{}={!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+
+def get_lanes_snapshot(lanes):
+    '''
+        Return a tuple of lane snapshots for the lanes of the road properties
+        ordered from the outermost left lane to the outermost right lane.
+    '''
+    return tuple(lane_snapshot(lane.side, lane.type, lane.width_start, lane.width_end,
+                               lane.road_mark_type, lane.road_mark_weight, lane.road_mark_width,
+                               lane.road_mark_color, lane.guard_rail, lane.guard_rail_lateral_offset)
+                 for lane in lanes)
+
+
+def get_lanes_snapshot_from_road_object(obj):
+    '''
+        Return a tuple of lane snapshots from the custom properties of a road
+        object, ordered like the lanes of the road properties.
+    '''
+    lanes = []
+    for side in ['left', 'right']:
+        lanes_side = []
+        num_lanes = obj['lanes_{}_num'.format(side)]
+        for idx in range(num_lanes):
+            def get(key, default):
+                values = obj.get('lanes_{}_{}'.format(side, key), [])
+                return values[idx] if idx < len(values) else default
+            lanes_side.append(lane_snapshot(side, get('types', 'driving'),
+                get('widths_start', 0.0), get('widths_end', 0.0),
+                get('road_mark_types', 'none'), get('road_mark_weights', 'none'),
+                get('road_mark_widths', 0.0), get('road_mark_colors', 'none'),
+                get('guard_rails', False), get('guard_rail_lateral_offsets', 0.0)))
+        if side == 'left':
+            # Stored from the center outwards
+            lanes += lanes_side[::-1]
+            lanes.append(lane_snapshot('center', 'center', 0.0, 0.0,
+                obj['lane_center_road_mark_type'], obj['lane_center_road_mark_weight'],
+                obj['lane_center_road_mark_width'], obj['lane_center_road_mark_color'],
+                False, 0.0))
+        else:
+            lanes += lanes_side
+    return tuple(lanes)
@@ -19,6 +19,8 @@ from math import pi
 
 from . import helpers
 from . import view_memory_helper
+from . mouse_move_throttle import mouse_move_throttle
+from . preview_worker import preview_worker
 
 
 class DSC_OT_modal_road_base(bpy.types.Operator):
@@ -62,14 +64,36 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
         '''
             Add a piece of geometry to the road.
         '''
+        self.preview_worker.discard()
         self.geometry.add_section()
 
     def remove_last_geometry_section(self):
         '''
             Remove last piece of geometry from the road.
         '''
+        self.preview_worker.discard()
         self.geometry.remove_last_section()
 
+    def update_geometry(self, context):
+        '''
+            Solve the geometry for the current input on the main thread, the
+            preview might have been solved on a copy in the background.
+        '''
+        raise NotImplementedError()
+
+    def get_preview_model(self):
+        '''
+            Return the model which computes previews from snapshots in a
+            background thread with get_preview_buffers.
+        '''
+        raise NotImplementedError()
+
+    def get_preview_snapshot(self, context):
+        '''
+            Return a pure data snapshot of the input for a background preview.
+        '''
+        raise NotImplementedError()
+
     def create_object_3d(self, context):
         '''
             Create a 3d object from the model
@@ -111,10 +135,13 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
         '''
             Unlink stencil, needs to be in OBJECT mode.
         '''
+        self.preview_worker.discard()
         stencil = bpy.data.objects.get('dsc_stencil')
         if stencil is not None:
             bpy.data.objects.remove(stencil, do_unlink=True)
             self.stencil = None
+        # The stencil mesh has a fake user and would be left behind
+        helpers.purge_orphan_temp_meshes()
 
     def update_stencil(self, context, update_start):
         '''
@@ -127,6 +154,10 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
             if self.params_input['points'][-1] == self.params_input['points'][-2]:
                 # This can happen due to start point snapping -> ignore
                 return
+            if context.scene.dsc_properties.road_preview_in_background:
+                # The stencil is updated with the result in apply_preview
+                self.preview_worker.submit(self.get_preview_snapshot(context))
+                return
             # Try getting data for a new mesh
             valid, mesh, matrix_world, materials = self.update_params_get_mesh(context, wireframe=True)
             # If we get a valid solution we can update the mesh, otherwise just return
@@ -135,6 +166,16 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
                 # Set stencil global transform
                 self.stencil.matrix_world = matrix_world
 
+    def apply_preview(self, result):
+        '''
+            Update the stencil with a preview computed in the background.
+        '''
+        valid, vertices, edges, matrix_world = result
+        if valid and self.stencil is not None:
+            helpers.update_mesh_from_buffers(self.stencil.data, vertices, edges)
+            # Set stencil global transform
+            self.stencil.matrix_world = matrix_world
+
     def get_initial_vertices_edges_faces(self, context):
         '''
             Calculate and return the vertices, edges and faces to create the initial stencil mesh.
@@ -225,6 +266,7 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
             'connected_end': False,
             'normal_start': Vector((0.0,0.0,1.0)),
             'design_speed': 130.0,
+            'road_mark_dash_phase_predecessor': None,
         }
 
     def reset_params_snap(self):
@@ -318,10 +360,13 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
                 self.params_input['design_speed'] = context.scene.dsc_properties.road_properties.design_speed
             # Create helper stencil mesh
             self.create_stencil(context)
-        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'}:
+        # Mouse moves are coalesced and rate limited, timer events catch up on them
+        mouse_moved = self.mouse_move_throttle.is_update_due(event)
+        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'} \
+            and not mouse_moved:
             return {'PASS_THROUGH'}
         # Update on move
-        if event.type == 'MOUSEMOVE':
+        if mouse_moved:
             if self.adjust_elevation != 'DISABLED':
                 # Get the selected point
                 self.selected_elevation = helpers.mouse_to_elevation(context, event,
@@ -439,6 +484,13 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
                     self.id_extra_start = self.params_snap['id_extra']
                     self.id_lane_start = self.params_snap['id_lane']
                     self.cp_type_start = self.params_snap['point_type']
+                    # Continue the road mark dashes of the road we start from
+                    if self.id_odr_start != None:
+                        self.params_input['road_mark_dash_phase_predecessor'] = \
+                            helpers.get_road_mark_dash_phase_at_contact_point(
+                                helpers.get_object_xodr_by_id(self.id_odr_start), self.cp_type_start)
+                    else:
+                        self.params_input['road_mark_dash_phase_predecessor'] = None
                     # Set elevation so that end point selection starts on the same level
                     self.selected_elevation = self.params_input['points'][-1].z
                     self.state = 'SELECT_POINT'
@@ -449,7 +501,9 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
                         if event.shift and self.params_input['connected_end'] == False:
                             # Make sure not to work with identical points
                             if self.params_input['points'][-1] != self.params_input['points'][-2]:
-                                # Add another section based on the last selected point
+                                # Finish the current section then add another one
+                                # based on the last selected point
+                                self.update_geometry(context)
                                 self.add_geometry_section()
                                 # Add new point for potential next selection
                                 self.params_input['points'].append(self.selected_point)
@@ -552,13 +606,19 @@ class DSC_OT_modal_road_base(bpy.types.Operator):
         # possible states: {'INIT','SELECT_START', 'SELECT_POINT'}
         self.state = 'INIT'
         self.create_object_model(context)
+        self.preview_worker = preview_worker(self.get_preview_model().get_preview_buffers, self.apply_preview)
         bpy.ops.object.select_all(action='DESELECT')
+        self.mouse_move_throttle = mouse_move_throttle()
+        self.mouse_move_throttle.start(context)
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
 
     def clean_up(self, context):
-        # Make sure stencil is removed
+        # Make sure stencil is removed and no preview is computed anymore
         self.remove_stencil()
+        self.preview_worker.cancel()
+        # Stop the timer of the mouse move updates
+        self.mouse_move_throttle.stop(context)
         # Remove header text with 'None'
         context.workspace.status_text_set(None)
         # Set custom cursor
@@ -16,9 +16,11 @@ from mathutils import Vector, Matrix, Euler
 from mathutils.geometry import distance_point_to_plane
 
 from math import pi
+from collections import OrderedDict
 
 from . import helpers
 from . import view_memory_helper
+from . mouse_move_throttle import mouse_move_throttle
 from . geometry_line import DSC_geometry_line
 from . geometry_arc import DSC_geometry_arc
 from . geometry_clothoid import DSC_geometry_clothoid
@@ -48,6 +50,61 @@ def load_geometry(road_type, section_data, lane_offset_coefficients):
 
     return geometry
 
+# Least recently used cache of loaded road geometries, maps the OpenDRIVE ID
+# of a road to the fingerprint of its geometry data and the geometry
+geometry_cache = OrderedDict()
+geometry_cache_size = 32
+
+def get_geometry_fingerprint(obj):
+    '''
+        Return a cheap fingerprint of the stored geometry data of a road.
+        Roads are never edited in place, the fingerprint only guards against
+        IDs which are reused after undo.
+    '''
+    sections = obj['geometry']
+    return (obj['dsc_type'], len(sections), tuple(sections[0]['point_start']),
+            tuple(sections[-1]['point_end']), sections[-1]['heading_end'],
+            tuple(obj['lane_offset_coefficients'].values()))
+
+def load_geometry_cached(obj):
+    '''
+        Load geometry of a road object, reuse the already loaded geometry if
+        the stored geometry data of the road has not changed.
+    '''
+    id_odr = obj['id_odr']
+    fingerprint = get_geometry_fingerprint(obj)
+    if id_odr in geometry_cache:
+        fingerprint_cached, geometry = geometry_cache[id_odr]
+        if fingerprint_cached == fingerprint:
+            geometry_cache.move_to_end(id_odr)
+            return geometry
+    geometry = load_geometry(obj['dsc_type'], obj['geometry'], obj['lane_offset_coefficients'])
+    geometry_cache[id_odr] = (fingerprint, geometry)
+    geometry_cache.move_to_end(id_odr)
+    if len(geometry_cache) > geometry_cache_size:
+        geometry_cache.popitem(last=False)
+    return geometry
+
+def invalidate_geometry_cache(id_odr=None):
+    '''
+        Remove the geometry of the road with the given OpenDRIVE ID from the
+        cache, remove all geometries if no ID is given.
+    '''
+    if id_odr is None:
+        geometry_cache.clear()
+    else:
+        geometry_cache.pop(id_odr, None)
+
+def prune_geometry_cache_on_depsgraph_update(depsgraph):
+    '''
+        Remove the geometries of deleted roads from the cache.
+    '''
+    if len(geometry_cache) == 0 or not depsgraph.id_type_updated('COLLECTION'):
+        return
+    for id_odr in list(geometry_cache):
+        if helpers.get_object_xodr_by_id(id_odr) is None:
+            invalidate_geometry_cache(id_odr)
+
 class DSC_OT_modal_road_object_base(bpy.types.Operator):
     bl_idname = 'dsc.modal_road_object_base'
     bl_label = 'DSC snap draw road object modal operator'
@@ -135,6 +192,8 @@ class DSC_OT_modal_road_object_base(bpy.types.Operator):
         if stencil is not None:
             bpy.data.objects.remove(stencil, do_unlink=True)
             self.stencil = None
+        # The stencil mesh has a fake user and would be left behind
+        helpers.purge_orphan_temp_meshes()
 
     def update_stencil(self, context, update_start):
         '''
@@ -272,10 +331,13 @@ class DSC_OT_modal_road_object_base(bpy.types.Operator):
                 self.state = 'SELECT_ROAD'
             # Create helper stencil mesh
             self.create_stencil(context)
-        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'}:
+        # Mouse moves are coalesced and rate limited, timer events catch up on them
+        mouse_moved = self.mouse_move_throttle.is_update_due(event)
+        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'} \
+            and not mouse_moved:
             return {'PASS_THROUGH'}
         # Update on move
-        if event.type == 'MOUSEMOVE':
+        if mouse_moved:
             self.reset_params_snap()
             if self.state == 'SELECT_REFERENCE_OBJECT':
                 # Snap to existing objects if any, otherwise xy plane
@@ -365,7 +427,7 @@ class DSC_OT_modal_road_object_base(bpy.types.Operator):
                     return {'RUNNING_MODAL'}
                 if self.state == 'SELECT_ROAD':
                     if self.params_snap['id_obj'] != None:
-                        self.selected_geometry = load_geometry(self.selected_road['dsc_type'], self.selected_road['geometry'], self.selected_road['lane_offset_coefficients'])
+                        self.selected_geometry = load_geometry_cached(self.selected_road)
                         self.id_road = self.params_snap['id_obj']
                         self.id_lane = self.params_snap['id_lane']
                         # Set elevation so that end point selection starts on the same level
@@ -440,6 +502,8 @@ class DSC_OT_modal_road_object_base(bpy.types.Operator):
         self.state = 'INIT'
         self.create_object_model(context)
         bpy.ops.object.select_all(action='DESELECT')
+        self.mouse_move_throttle = mouse_move_throttle()
+        self.mouse_move_throttle.start(context)
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
 
@@ -448,6 +512,8 @@ class DSC_OT_modal_road_object_base(bpy.types.Operator):
         del self.selected_geometry
         # Make sure stencil is removed
         self.remove_stencil()
+        # Stop the timer of the mouse move updates
+        self.mouse_move_throttle.stop(context)
         # Remove header text with 'None'
         context.workspace.status_text_set(None)
         # Set custom cursor
@@ -18,6 +18,7 @@ from math import pi
 
 from . import helpers
 from . import view_memory_helper
+from . mouse_move_throttle import mouse_move_throttle
 
 
 class DSC_OT_modal_two_point_base(bpy.types.Operator):
@@ -90,6 +91,8 @@ class DSC_OT_modal_two_point_base(bpy.types.Operator):
         if stencil is not None:
             bpy.data.objects.remove(stencil, do_unlink=True)
             self.stencil = None
+        # The stencil mesh has a fake user and would be left behind
+        helpers.purge_orphan_temp_meshes()
 
     def update_stencil(self, context, update_start):
         '''
@@ -208,10 +211,13 @@ class DSC_OT_modal_two_point_base(bpy.types.Operator):
             self.params_input['point_end'] = self.selected_point
             # Create helper stencil mesh
             self.create_stencil(context)
-        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'}:
+        # Mouse moves are coalesced and rate limited, timer events catch up on them
+        mouse_moved = self.mouse_move_throttle.is_update_due(event)
+        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'} \
+            and not mouse_moved:
             return {'PASS_THROUGH'}
         # Update on move
-        if event.type == 'MOUSEMOVE':
+        if mouse_moved:
             lane_heading_snap = None
             if self.adjust_elevation != 'DISABLED':
                 # Get the selected point
@@ -425,12 +431,16 @@ class DSC_OT_modal_two_point_base(bpy.types.Operator):
         self.state = 'INIT'
         self.create_object_model(context)
         bpy.ops.object.select_all(action='DESELECT')
+        self.mouse_move_throttle = mouse_move_throttle()
+        self.mouse_move_throttle.start(context)
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
 
     def clean_up(self, context):
         # Make sure stencil is removed
         self.remove_stencil()
+        # Stop the timer of the mouse move updates
+        self.mouse_move_throttle.stop(context)
         # Remove header text with 'None'
         context.workspace.status_text_set(None)
         # Set custom cursor
@@ -0,0 +1,79 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from time import perf_counter
+
+
+class mouse_move_throttle():
+    '''
+        Shared update scheduler for the mouse moves of modal operators. Mouse
+        moves below a pixel threshold are dropped and updates are capped to a
+        maximum rate. A mouse move arriving too early is postponed and the
+        last postponed one is processed with the next timer event, so the
+        operator never works through stale mouse positions. Clicks act on the
+        state of the last processed update which is what the user sees.
+    '''
+
+    def __init__(self, pixel_threshold=2, rate_max=60.0):
+        self.pixel_threshold = pixel_threshold
+        self.interval = 1.0 / rate_max
+        self.timer = None
+        self.reset()
+
+    def reset(self):
+        '''
+            Forget the last processed and the postponed mouse move.
+        '''
+        self.mouse_last = None
+        self.time_last = None
+        self.pending = False
+
+    def start(self, context):
+        '''
+            Start the timer which triggers postponed updates.
+        '''
+        self.reset()
+        if self.timer is None:
+            self.timer = context.window_manager.event_timer_add(self.interval, window=context.window)
+
+    def stop(self, context):
+        '''
+            Remove the timer, needs to be called when the operator exits.
+        '''
+        if self.timer is not None:
+            context.window_manager.event_timer_remove(self.timer)
+            self.timer = None
+        self.reset()
+
+    def is_update_due(self, event):
+        '''
+            Return True if the operator should update for the mouse position
+            of the event now, this is the case for mouse moves and timer
+            events with a postponed mouse move if the last update is long
+            enough ago.
+        '''
+        if event.type == 'MOUSEMOVE':
+            if self.mouse_last is not None \
+                and abs(event.mouse_x - self.mouse_last[0]) < self.pixel_threshold \
+                and abs(event.mouse_y - self.mouse_last[1]) < self.pixel_threshold:
+                return False
+            self.pending = True
+        elif event.type != 'TIMER' or not self.pending:
+            return False
+        time_now = perf_counter()
+        if self.time_last is not None and time_now - self.time_last < self.interval:
+            return False
+        self.mouse_last = (event.mouse_x, event.mouse_y)
+        self.time_last = time_now
+        self.pending = False
+        return True
@@ -0,0 +1,100 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import pathlib
+import subprocess
+import threading
+
+
+class osgb_conversion_pool():
+    '''
+        Convert intermediate .obj files to .osgb files with a bounded number
+        of concurrent osgconv processes. Intermediate files are removed after
+        each conversion, files shared by several conversions (e.g. textures)
+        are removed after the last one.
+    '''
+
+    executable = 'osgconv'
+
+    def __init__(self, max_workers=None, timeout=600.0):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.jobs = []
+        self.file_users = {}
+        self.lock = threading.Lock()
+
+    def add(self, file_path_obj, file_paths_cleanup):
+        '''
+            Queue the conversion of an .obj file, the given intermediate files
+            are removed when the conversion is done.
+        '''
+        file_path_obj = pathlib.Path(file_path_obj)
+        file_paths_cleanup = [pathlib.Path(file_path) for file_path in file_paths_cleanup]
+        # A stale result of a previous export must not survive a failed conversion
+        file_path_obj.with_suffix('.osgb').unlink(missing_ok=True)
+        for file_path in file_paths_cleanup:
+            self.file_users[file_path] = self.file_users.get(file_path, 0) + 1
+        self.jobs.append((file_path_obj, file_paths_cleanup))
+
+    def run(self):
+        '''
+            Run all queued conversions and return a list of error messages.
+        '''
+        jobs = self.jobs
+        self.jobs = []
+        if len(jobs) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)),
+                                thread_name_prefix='dsc_osgconv') as executor:
+            errors = list(executor.map(self.run_job, jobs))
+        return [error for error in errors if error is not None]
+
+    def run_job(self, job):
+        '''
+            Convert one .obj file and clean up its intermediate files. Return
+            an error message or None on success.
+        '''
+        file_path_obj, file_paths_cleanup = job
+        file_path_osgb = file_path_obj.with_suffix('.osgb')
+        try:
+            result = subprocess.run([self.executable, str(file_path_obj), str(file_path_osgb)],
+                                    capture_output=True, text=True, timeout=self.timeout)
+        except FileNotFoundError:
+            return 'Executable \"osgconv\" required to produce .osgb scenegraph file. ' \
+                'Try installing openscenegraph.'
+        except subprocess.TimeoutExpired:
+            return 'Conversion of {} to .osgb timed out after {} s.'.format(file_path_obj.name, self.timeout)
+        finally:
+            self.clean_up(file_paths_cleanup)
+        if result.returncode != 0:
+            message = result.stderr.strip().splitlines()
+            return 'Conversion of {} to .osgb failed with exit code {}{}'.format(file_path_obj.name,
+                result.returncode, ': ' + message[-1] if message else '.')
+        return None
+
+    def clean_up(self, file_paths):
+        '''
+            Remove intermediate files which are not needed by any other
+            conversion.
+        '''
+        with self.lock:
+            for file_path in file_paths:
+                self.file_users[file_path] -= 1
+                if self.file_users[file_path] == 0:
+                    del self.file_users[file_path]
+                    file_path.unlink(missing_ok=True)
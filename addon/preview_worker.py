@@ -0,0 +1,107 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+from concurrent.futures import ThreadPoolExecutor
+import traceback
+
+
+class preview_worker():
+    '''
+        Compute the previews of modal operators in a background thread. The
+        compute function gets a pure data snapshot and must not use bpy, the
+        apply function gets the result on the main thread from a timer. Only
+        the latest submitted snapshot waits for computation, results which
+        are older than an already applied or discarded one are dropped.
+    '''
+
+    poll_interval = 0.01
+
+    def __init__(self, compute, apply):
+        self.compute = compute
+        self.apply = apply
+        self.executor = None
+        self.future = None
+        self.generation_future = 0
+        self.snapshot_pending = None
+        self.generation = 0
+        self.generation_min = 0
+        # Timers are identified by the function object, keep one bound method
+        self.callback_poll = self.poll
+
+    def submit(self, snapshot):
+        '''
+            Queue a snapshot for computation, replaces a snapshot which is
+            still waiting.
+        '''
+        self.generation += 1
+        self.snapshot_pending = (self.generation, snapshot)
+        if self.future is None:
+            self.start_pending()
+        if not bpy.app.timers.is_registered(self.callback_poll):
+            bpy.app.timers.register(self.callback_poll, first_interval=self.poll_interval)
+
+    def start_pending(self):
+        '''
+            Start computing the waiting snapshot.
+        '''
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dsc_preview')
+        self.generation_future, snapshot = self.snapshot_pending
+        self.snapshot_pending = None
+        self.future = self.executor.submit(self.compute, snapshot)
+
+    def poll(self):
+        '''
+            Timer callback applying finished results and starting the
+            computation of the waiting snapshot. Return None to unregister the
+            timer when there is nothing left to do.
+        '''
+        if self.future is not None and self.future.done():
+            future = self.future
+            self.future = None
+            if self.generation_future > self.generation_min:
+                try:
+                    result = future.result()
+                except Exception:
+                    traceback.print_exc()
+                else:
+                    self.generation_min = self.generation_future
+                    self.apply(result)
+            if self.snapshot_pending is not None:
+                self.start_pending()
+        if self.future is None and self.snapshot_pending is None:
+            return None
+        return self.poll_interval
+
+    def discard(self):
+        '''
+            Drop all submitted snapshots and results, e.g. when the previewed
+            object changed.
+        '''
+        self.generation_min = self.generation
+        self.snapshot_pending = None
+
+    def cancel(self):
+        '''
+            Drop all work and wait for a running computation to finish, needs
+            to be called when the operator exits.
+        '''
+        self.discard()
+        if bpy.app.timers.is_registered(self.callback_poll):
+            bpy.app.timers.unregister(self.callback_poll)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.future = None
@@ -13,8 +13,14 @@
 
 import bpy
 from mathutils import Vector
+import numpy as np
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
 
 from . import helpers
+from . road_mark_dash_pattern import get_dash_pattern
+from . lane_snapshot import get_lanes_snapshot, get_lanes_snapshot_from_road_object
+from . road_strip_layout import road_strip_layout
 
 
 class road:
@@ -25,6 +31,8 @@ class road:
         self.geometry = geometry
         self.geometry_solver = geometry_solver
         self.params = {}
+        self.guard_rail_poles = None
+        self.stencil_buffers_committed = None
 
     def create_object_3d(self, context, params_input):
         '''
@@ -34,38 +42,36 @@ class road:
             wireframe = True
         else:
             wireframe = False
-        valid, mesh_road, matrix_world, materials = self.update_params_get_mesh(context,
-            params_input, wireframe=wireframe)
+        valid, lanes = self.update_params(context, params_input)
         if not valid:
             return None
         else:
+            # Long roads can be split into meshes of fixed length chunks
+            s_ranges_chunks = self.get_mesh_chunks_s_ranges(
+                context.scene.dsc_properties.road_mesh_chunk_length)
+            if wireframe or len(s_ranges_chunks) < 2:
+                s_ranges_chunks = []
+                mesh_road, materials = self.get_mesh(context, lanes, self.params['road_mark_line_length'],
+                    self.params['road_mark_line_space'], self.params['road_mark_dash_phase_start'],
+                    wireframe, 'viewport')
+            else:
+                meshes_chunks = self.get_mesh_chunks(context, lanes, s_ranges_chunks, 'viewport')
+                mesh_road = meshes_chunks[0]
             # Create road object
             id_obj = helpers.get_new_id_opendrive(context)
             mesh_road.name = self.road_type + '_' + str(id_obj)
             obj = bpy.data.objects.new(mesh_road.name, mesh_road)
-            obj.matrix_world = matrix_world
+            obj.matrix_world = self.geometry.matrix_world
             helpers.link_object_opendrive(context, obj)
 
-            # Assign materials
+            # Assign materials, the material indices are already part of the mesh
             helpers.assign_materials(obj)
-            for idx in range(len(obj.data.polygons)):
-                if idx in materials['road_mark_white']:
-                    obj.data.polygons[idx].material_index = \
-                        helpers.get_material_index(obj, 'road_mark_white')
-                elif idx in materials['grass']:
-                    obj.data.polygons[idx].material_index = \
-                        helpers.get_material_index(obj, 'grass')
-                elif idx in materials['road_mark_yellow']:
-                    obj.data.polygons[idx].material_index = \
-                        helpers.get_material_index(obj, 'road_mark_yellow')
-                elif idx in materials['guard_rail_metal']:
-                    obj.data.polygons[idx].material_index = \
-                        helpers.get_material_index(obj, 'guard_rail_metal')
-                else:
-                    obj.data.polygons[idx].material_index = \
-                        helpers.get_material_index(obj, 'road_asphalt')
             # Remove double vertices from road lanes and lane lines to simplify mesh
             helpers.remove_duplicate_vertices(context, obj)
+            # The road object holds the first chunk, the others are its children
+            for idx_chunk in range(1, len(s_ranges_chunks)):
+                self.create_mesh_chunk_object(context, obj, id_obj, meshes_chunks[idx_chunk],
+                    idx_chunk, s_ranges_chunks[idx_chunk])
             # Make it active for the user to see what he created last
             helpers.select_activate_object(context, obj)
 
@@ -157,65 +163,294 @@ class road:
             obj['lanes_right_guard_rail_lateral_offsets'] = self.params['lanes_right_guard_rail_lateral_offsets']
             obj['road_mark_line_length'] = self.params['road_mark_line_length']
             obj['road_mark_line_space'] = self.params['road_mark_line_space']
+            obj['road_mark_dash_phase_start'] = self.params['road_mark_dash_phase_start']
+            obj['road_mesh_chunks_s_ranges'] = [list(s_range) for s_range in s_ranges_chunks]
+
+            if self.guard_rail_poles is not None:
+                self.create_guard_rail_pole_instances(context, obj)
 
             return obj
 
-    def update_params_get_mesh(self, context, params_input, wireframe):
+    def update_params_get_mesh(self, context, params_input, wireframe, lod='viewport', mesh=None):
+        '''
+            Calculate and return the vertices, edges, faces and parameters to
+            create a road mesh with the given level of detail ('preview',
+            'viewport' or 'export'). A given mesh is updated in place.
+        '''
+        valid, lanes = self.update_params(context, params_input)
+        if not valid:
+            return valid, None, None, []
+        mesh, materials = self.get_mesh(context, lanes, self.params['road_mark_line_length'],
+            self.params['road_mark_line_space'], self.params['road_mark_dash_phase_start'],
+            wireframe, lod, mesh=mesh)
+        return valid, mesh, self.geometry.matrix_world, materials
+
+    def update_params(self, context, params_input):
+        '''
+            Update the lane parameters and the geometry from the road
+            properties and the input points. Return if the geometry is valid
+            and the lane snapshot for meshing.
+        '''
+        lanes = self.update_lane_params(context, params_input)
+        valid = self.update_geometry(params_input)
+        return valid, lanes
+
+    def update_lane_params(self, context, params_input):
         '''
-            Calculate and return the vertices, edges, faces and parameters to create a road mesh.
+            Update the lane parameters from the road properties and return the
+            lane snapshot for meshing.
         '''
         if self.road_type == 'junction_connecting_road':
             road_props = context.scene.dsc_properties.connecting_road_properties
-            self.set_lane_params(road_props)
-            lanes = road_props.lanes
         else:
             road_props = context.scene.dsc_properties.road_properties
-            self.set_lane_params(road_props)
-            lanes = road_props.lanes
-        road_mark_line_length = road_props.road_mark_line_length
-        road_mark_line_space = road_props.road_mark_line_space
-        # Update parameters based on selected points
+        # Read the lanes only once, meshing works on the snapshot
+        lanes = get_lanes_snapshot(road_props.lanes)
+        self.set_lane_params(road_props, lanes)
+        self.params['road_mark_dash_phase_start'] = self.get_road_mark_dash_phase_start(
+            params_input, road_props.road_mark_line_length, road_props.road_mark_line_space)
+        return lanes
+
+    def update_geometry(self, params_input):
+        '''
+            Update the geometry based on the selected points and return if a
+            valid solution has been found.
+        '''
         self.geometry.update(params_input, self.params['lane_offset_start'], self.params['lane_offset_end'],self.geometry_solver)
-        if self.geometry.sections[-1]['valid'] == False:
-            valid = False
-            return valid, None, None, []
+        return self.geometry.sections[-1]['valid'] != False
+
+    def get_preview_snapshot(self, context, params_input):
+        '''
+            Return a pure data snapshot with everything needed to solve the
+            geometry and mesh a wireframe preview without access to bpy, see
+            get_preview_buffers.
+        '''
+        lanes = self.update_lane_params(context, params_input)
+        return {
+            'geometry': self.geometry.copy(),
+            'params': deepcopy(self.params),
+            'params_input': deepcopy(params_input),
+            'lanes': lanes,
+            'mesh_settings': self.get_mesh_settings(context, 'preview'),
+        }
+
+    def get_preview_buffers(self, snapshot):
+        '''
+            Solve the geometry of a preview snapshot and return if it is valid,
+            the wireframe vertices and edges and the local to global matrix.
+            Does not use bpy and may therefore run in a background thread, the
+            geometry of the snapshot becomes the geometry of this road model.
+        '''
+        self.geometry = snapshot['geometry']
+        self.params = snapshot['params']
+        valid = self.update_geometry(snapshot['params_input'])
+        if not valid:
+            return valid, None, None, None
+        vertices, edges = self.get_stencil_buffers(snapshot['lanes'], self.params['road_mark_line_length'],
+            self.params['road_mark_line_space'], self.params['road_mark_dash_phase_start'],
+            snapshot['mesh_settings'])
+        vertices, edges = self.add_wireframe_elevation_edges(vertices, edges)
+        return valid, vertices, edges, self.geometry.matrix_world.copy()
+
+    def get_mesh_from_object(self, context, obj, lod, s_range=None):
+        '''
+            Rebuild the mesh of an existing road object from its custom
+            properties with the given level of detail, optionally only the
+            chunk of the road within the given s range.
+        '''
+        lanes = get_lanes_snapshot_from_road_object(obj)
+        mesh, materials = self.get_mesh(context, lanes, obj.get('road_mark_line_length', 3.0),
+            obj.get('road_mark_line_space', 6.0), obj.get('road_mark_dash_phase_start', 0.0), False, lod,
+            s_range)
+        return mesh
+
+    def get_mesh_chunks_s_ranges(self, chunk_length):
+        '''
+            Return the s ranges of the mesh chunks of the road, a single range
+            if the road is not split into chunks.
+        '''
+        length = self.geometry.total_length
+        if chunk_length <= 0.0 or length <= chunk_length:
+            return [(0.0, length)]
+        # Avoid a sliver chunk at the end due to rounding
+        num_chunks = int(np.ceil(length / chunk_length - 1e-9))
+        s_starts = chunk_length * np.arange(num_chunks)
+        return [(float(s_start), float(min(s_start + chunk_length, length))) for s_start in s_starts]
+
+    def get_mesh_chunks(self, context, lanes, s_ranges, lod):
+        '''
+            Return a list with one mesh for each s range of the road.
+        '''
+        meshes = []
+        poles = []
+        for s_range in s_ranges:
+            mesh, materials = self.get_mesh(context, lanes, self.params['road_mark_line_length'],
+                self.params['road_mark_line_space'], self.params['road_mark_dash_phase_start'],
+                False, lod, s_range)
+            meshes.append(mesh)
+            if self.guard_rail_poles is not None:
+                poles.append(self.guard_rail_poles)
+        if poles:
+            self.guard_rail_poles = (np.concatenate([positions for positions, headings in poles]),
+                                     np.concatenate([headings for positions, headings in poles]))
+        return meshes
+
+    def create_mesh_chunk_object(self, context, obj, id_obj, mesh, idx_chunk, s_range):
+        '''
+            Create an object for a mesh chunk of a road, parented to the road
+            object.
+        '''
+        mesh.name = 'mesh_chunk_{}_{}'.format(idx_chunk, obj.name)
+        obj_chunk = bpy.data.objects.new(mesh.name, mesh)
+        obj_chunk.parent = obj
+        obj_chunk['road_chunk_id_odr'] = id_obj
+        obj_chunk['road_chunk_s_range'] = list(s_range)
+        helpers.link_object_opendrive(context, obj_chunk)
+        helpers.assign_materials(obj_chunk)
+        helpers.remove_duplicate_vertices(context, obj_chunk)
+        helpers.triangulate_quad_mesh(obj_chunk)
+        return obj_chunk
+
+    def get_road_mark_dash_phase_start(self, params_input, road_mark_line_length, road_mark_line_space):
+        '''
+            Return the phase of the broken road mark dashes at the road start
+            which continues the dashes of the predecessor road.
+        '''
+        dash_phase_predecessor = params_input.get('road_mark_dash_phase_predecessor')
+        if dash_phase_predecessor is None:
+            return 0.0
+        phase, line_length, line_space = dash_phase_predecessor
+        # Dashes of a different pattern can not be continued
+        if line_length != road_mark_line_length or line_space != road_mark_line_space:
+            return 0.0
+        return phase
+
+    def get_mesh(self, context, lanes, road_mark_line_length, road_mark_line_space,
+                 road_mark_dash_phase_start, wireframe, lod, s_range=None, mesh=None):
+        '''
+            Calculate the road mesh and the material index of each face from
+            the current geometry, optionally only for the given s range. If a
+            mesh is given it is filled in place instead of creating a new one.
+        '''
+        mesh_settings = self.get_mesh_settings(context, lod)
+        if wireframe and s_range is None:
+            vertices, edges = self.get_stencil_buffers(lanes, road_mark_line_length,
+                road_mark_line_space, road_mark_dash_phase_start, mesh_settings)
+            materials = []
+        else:
+            vertices, edges, loops, polygon_totals, materials = self.get_mesh_buffers(lanes,
+                road_mark_line_length, road_mark_line_space, road_mark_dash_phase_start,
+                mesh_settings, s_range)
+
+        # Create blender mesh or refill the given one
+        if wireframe:
+            vertices, edges = self.add_wireframe_elevation_edges(vertices, edges)
+            loops, polygon_totals = None, None
+        if mesh is None:
+            mesh = helpers.create_mesh_from_buffers('temp_road', vertices, edges,
+                loops, polygon_totals, materials)
+        else:
+            helpers.update_mesh_from_buffers(mesh, vertices, edges, loops, polygon_totals, materials)
+        return mesh, materials
+
+    def get_mesh_settings(self, context, lod):
+        '''
+            Return the maximum chordal and elevation deviation and if guard
+            rail poles are instanced for meshing with the given level of
+            detail, exported meshes always contain the poles.
+        '''
+        max_chordal_deviation, max_elevation_deviation = helpers.get_road_mesh_tolerances(context, lod)
+        poles_as_instances = lod != 'export' and \
+            context.scene.dsc_properties.guard_rail_poles_as_instances
+        return max_chordal_deviation, max_elevation_deviation, poles_as_instances
+
+    def add_wireframe_elevation_edges(self, vertices, edges):
+        '''
+            Transform start and end point to local coordinate system then add
+            a vertical edge down to the xy-plane to make elevation profile
+            more easily visible.
+        '''
+        point_start = (self.geometry.sections[0]['point_start'])
+        point_start_local = (0.0, 0.0, 0.0)
+        point_start_bottom = (0.0, 0.0, -point_start.z)
+        point_end = self.geometry.sections[-1]['point_end']
+        point_end_local = self.geometry.matrix_world.inverted() @ point_end
+        point_end_local.z = point_end.z - point_start.z
+        point_end_bottom = (point_end_local.x, point_end_local.y, -point_start.z)
+        vertices = np.concatenate((vertices,
+            [point_start_local[:], point_start_bottom, point_end_local[:], point_end_bottom]))
+        edges = np.concatenate((edges,
+            [[len(vertices)-1, len(vertices)-2], [len(vertices)-3, len(vertices)-4]]))
+        return vertices, edges
+
+    def get_mesh_buffers(self, lanes, road_mark_line_length, road_mark_line_space,
+                         road_mark_dash_phase_start, mesh_settings, s_range=None):
+        '''
+            Return vertices, edges, loops, polygon totals and face material
+            indices of the road including guard rails, optionally only for the
+            given s range. The mesh settings are returned by get_mesh_settings.
+        '''
+        max_chordal_deviation, max_elevation_deviation, poles_as_instances = mesh_settings
         # Get values in t and s direction where the faces of the road start and end
-        strips_s_boundaries = self.get_strips_s_boundaries(lanes, road_mark_line_length, road_mark_line_space)
+        strips_s_boundaries = self.get_strips_s_boundaries(lanes, road_mark_line_length,
+            road_mark_line_space, road_mark_dash_phase_start)
+        if s_range is not None:
+            strips_s_boundaries = self.clip_strips_s_boundaries(strips_s_boundaries, *s_range)
         # Calculate meshes for Blender
-        road_sample_points = self.get_road_sample_points(lanes, strips_s_boundaries)
-        vertices, edges, faces = self.get_road_vertices_edges_faces(road_sample_points)
+        points, road_sample_points = self.get_road_sample_points(lanes, strips_s_boundaries,
+            max_chordal_deviation, max_elevation_deviation, s_range)
+        vertices, edges, loops, polygon_totals = \
+            self.get_road_vertices_edges_faces(points, road_sample_points)
         materials = self.get_face_materials(lanes, strips_s_boundaries)
         # Add guard rail geometry
-        road_face_count = len(faces)
-        gr_verts, gr_edges, gr_faces, gr_num_faces = \
-            self.get_guard_rail_geometry(len(vertices))
-        vertices += gr_verts
-        edges += gr_edges
-        faces += gr_faces
-        materials['guard_rail_metal'] = list(range(road_face_count, road_face_count + gr_num_faces))
+        gr_vertices, gr_faces, self.guard_rail_poles = \
+            self.get_guard_rail_geometry(lanes, len(vertices), poles_as_instances, s_range)
+        if len(gr_faces) > 0:
+            vertices = np.concatenate((vertices, gr_vertices))
+            loops = np.concatenate((loops, gr_faces.ravel()))
+            polygon_totals = np.concatenate((polygon_totals, np.full(len(gr_faces), 4)))
+            materials = np.concatenate((materials,
+                np.full(len(gr_faces), helpers.get_default_material_index('guard_rail_metal'))))
+        return vertices, edges, loops, polygon_totals, materials
 
-        if wireframe:
-            # Transform start and end point to local coordinate system then add
-            # a vertical edge down to the xy-plane to make elevation profile
-            # more easily visible
-            point_start = (self.geometry.sections[0]['point_start'])
-            point_start_local = (0.0, 0.0, 0.0)
-            point_start_bottom = (0.0, 0.0, -point_start.z)
-            point_end = self.geometry.sections[-1]['point_end']
-            point_end_local = self.geometry.matrix_world.inverted() @ point_end
-            point_end_local.z = point_end.z - point_start.z
-            point_end_bottom = (point_end_local.x, point_end_local.y, -point_start.z)
-            vertices += [point_start_local[:], point_start_bottom, point_end_local[:], point_end_bottom]
-            edges += [[len(vertices)-1, len(vertices)-2], [len(vertices)-3, len(vertices)-4]]
-
-        # Create blender mesh
-        mesh = bpy.data.meshes.new('temp_road')
-        if not wireframe:
-            mesh.from_pydata(vertices, edges, faces)
-        else:
-            mesh.from_pydata(vertices, edges, [])
-        valid = True
-        return valid, mesh, self.geometry.matrix_world, materials
+    def get_stencil_buffers(self, lanes, road_mark_line_length, road_mark_line_space,
+                            road_mark_dash_phase_start, mesh_settings):
+        '''
+            Return the wireframe vertices and edges of the road stencil. While
+            drawing a road with multiple sections only the last section
+            changes, the buffers of all sections before it are cached as long
+            as the cross section does not depend on the total road length.
+        '''
+        s_committed = self.geometry.sections_s_start[-1]
+        if s_committed == 0.0 or not self.cross_section_is_length_independent(lanes):
+            self.stencil_buffers_committed = None
+            vertices, edges, _, _, _ = self.get_mesh_buffers(lanes, road_mark_line_length,
+                road_mark_line_space, road_mark_dash_phase_start, mesh_settings)
+            return vertices, edges
+        sections_committed = tuple((section['length'], section['point_end'].to_tuple(),
+            section['heading_end'], section['curvature_end']) for section in self.geometry.sections[:-1])
+        key = (sections_committed, lanes, road_mark_line_length,
+               road_mark_line_space, road_mark_dash_phase_start, mesh_settings)
+        if self.stencil_buffers_committed is None or self.stencil_buffers_committed[0] != key:
+            vertices, edges, _, _, _ = self.get_mesh_buffers(lanes, road_mark_line_length,
+                road_mark_line_space, road_mark_dash_phase_start, mesh_settings, (0.0, s_committed))
+            self.stencil_buffers_committed = (key, vertices, edges)
+        _, vertices_committed, edges_committed = self.stencil_buffers_committed
+        vertices, edges, _, _, _ = self.get_mesh_buffers(lanes, road_mark_line_length,
+            road_mark_line_space, road_mark_dash_phase_start, mesh_settings,
+            (s_committed, self.geometry.total_length))
+        return np.concatenate((vertices_committed, vertices)), \
+            np.concatenate((edges_committed, edges + len(vertices_committed)))
+
+    def cross_section_is_length_independent(self, lanes):
+        '''
+            Return True if lane widths and lane offset are constant along the
+            road, then the mesh of a part of the road does not change when the
+            road gets longer.
+        '''
+        if self.params['lane_offset_start'] != self.params['lane_offset_end']:
+            return False
+        return all(lane.width_start == lane.width_end for lane in lanes)
 
     def calculate_lane_offset_start_end_in_m(self, lane_offset, lanes_left_width, lanes_right_width):
         '''
@@ -234,7 +469,7 @@ class road:
                     lane_offset_m += lanes_right_width[i]
         return lane_offset_m
 
-    def set_lane_params(self, road_properties):
+    def set_lane_params(self, road_properties, lanes):
         '''
             Set the lane parameters dictionary for later export.
         '''
@@ -268,7 +503,7 @@ class road:
                        'road_split_lane_idx': road_properties.road_split_lane_idx,
                        'road_mark_line_length': road_properties.road_mark_line_length,
                        'road_mark_line_space': road_properties.road_mark_line_space}
-        for idx, lane in enumerate(road_properties.lanes):
+        for idx, lane in enumerate(lanes):
             if lane.side == 'left':
                 self.params['lanes_left_widths_start'].insert(0, lane.width_start)
                 self.params['lanes_left_widths_end'].insert(0, lane.width_end)
@@ -355,127 +590,20 @@ class road:
                         t_cp_split -= self.params['lanes_right_widths_end'][idx]
         return t_cp_split
 
-    def get_strips_t_values(self, lanes, s):
-        '''
-            Return list of t values of strip borders.
-        '''
-        t = 0
-        t_left_width_total = 0
-        t_values = []
-        # Make sure the road has a non-zero length
-        if self.geometry.total_length == 0:
-            return t_values
-        # Build up t values lane by lane
-        for idx_lane, lane in enumerate(lanes):
-            s_norm = s / self.geometry.total_length
-            if lane.width_start == lane.width_end:
-                lane_width_s = lane.width_start
-            else:
-                lane_width_s = lane.width_start + (3.0 * s_norm**2 - 2.0 * s_norm**3) * (lane.width_end - lane.width_start)
-            # Add lane width for right side of road BEFORE (in t-direction) road mark lines
-            if lane.side == 'right':
-                width_left_lines_on_lane = 0.0
-                if lanes[idx_lane - 1].road_mark_type != 'none':
-                    width_line = lanes[idx_lane - 1].road_mark_width
-                    if lanes[idx_lane - 1].road_mark_type == 'solid_solid' or \
-                            lanes[idx_lane - 1].road_mark_type == 'solid_broken' or \
-                            lanes[idx_lane - 1].road_mark_type == 'broken_solid':
-                        width_left_lines_on_lane = width_line * 3.0 / 2.0
-                    else:
-                        width_left_lines_on_lane = width_line / 2.0
-                width_right_lines_on_lane = 0.0
-                if lane.road_mark_type != 'none':
-                    width_line = lane.road_mark_width
-                    if lane.road_mark_type == 'solid_solid' or \
-                            lane.road_mark_type == 'solid_broken' or \
-                            lane.road_mark_type == 'broken_solid':
-                        width_right_lines_on_lane = width_line * 3.0 / 2.0
-                    else:
-                        width_right_lines_on_lane = width_line / 2.0
-                t -= lane_width_s - width_left_lines_on_lane - width_right_lines_on_lane
-            # Add road mark lines
-            if lane.road_mark_type != 'none':
-                width_line = lane.road_mark_width
-                if lane.road_mark_type == 'solid_solid' or \
-                        lane.road_mark_type == 'solid_broken' or \
-                        lane.road_mark_type == 'broken_solid':
-                    t_values.append(t)
-                    t_values.append(t -       width_line)
-                    t_values.append(t - 2.0 * width_line)
-                    t_values.append(t - 3.0 * width_line)
-                    width_double_line = 3.0 * width_line
-                    t -= width_double_line
-                    if lane.side == 'left':
-                        t_left_width_total += width_double_line
-                    if lane.side == 'center':
-                        t_left_width_total += width_double_line/2
-                else:
-                    t_values.append(t)
-                    t_values.append(t - width_line)
-                    t -= width_line
-                    if lane.side == 'left':
-                        t_left_width_total += width_line
-                    if lane.side == 'center':
-                        t_left_width_total += width_line/2
-            else:
-                t_values.append(t)
-            # Add lane width for left side of road AFTER (in t-direction) road mark lines
-            if lane.side == 'left':
-                width_left_lines_on_lane = 0
-                if lane.road_mark_type != 'none':
-                    width_line = lane.road_mark_width
-                    if lane.road_mark_type == 'solid_solid' or \
-                            lane.road_mark_type == 'solid_broken' or \
-                            lane.road_mark_type == 'broken_solid':
-                        width_left_lines_on_lane = width_line * 3.0 / 2.0
-                    else:
-                        width_left_lines_on_lane = width_line / 2.0
-                width_right_lines_on_lane = 0
-                if lanes[idx_lane + 1].road_mark_type != 'none':
-                    width_line = lanes[idx_lane + 1].road_mark_width
-                    if lanes[idx_lane + 1].road_mark_type == 'solid_solid' or \
-                            lanes[idx_lane + 1].road_mark_type == 'solid_broken' or \
-                            lanes[idx_lane + 1].road_mark_type == 'broken_solid':
-                        width_right_lines_on_lane = width_line * 3.0 / 2.0
-                    else:
-                        width_right_lines_on_lane = width_line / 2.0
-                t_lane = lane_width_s - width_left_lines_on_lane - width_right_lines_on_lane
-                t -= t_lane
-                t_left_width_total += t_lane
-        for idx in range(len(t_values)):
-            t_values[idx] += t_left_width_total
-        return t_values
-
-    def get_strips_s_boundaries(self, lanes, road_mark_line_length, road_mark_line_space):
+    def get_strips_s_boundaries(self, lanes, road_mark_line_length, road_mark_line_space,
+                                road_mark_dash_phase_start=0.0):
         '''
             Return list of tuples with a line marking toggle flag and a list
             with the start and stop values of the faces in each strip.
         '''
-        # Calculate line parameters
-        # TODO offset must be provided by predecessor road for each marking
         length = self.geometry.total_length
-        offset = 0.5
         line_toggle_start = True
         s_values = []
+        # All broken lines of a road share the same dash pattern, continued
+        # from the predecessor road
+        line_toggle_broken, s_values_strip_broken = get_dash_pattern(length,
+            road_mark_line_length, road_mark_line_space, road_mark_dash_phase_start)
         for lane in lanes:
-            # Calculate broken line parameters with separate dash/gap lengths
-            if lane.road_mark_type == 'broken':
-                period = road_mark_line_length + road_mark_line_space
-                s_values_strip = [0]
-                s = 0.0
-                is_dash = True  # Start with a dash
-                while s < length:
-                    if is_dash:
-                        s_next = s + road_mark_line_length
-                    else:
-                        s_next = s + road_mark_line_space
-                    s_next = min(s_next, length)
-                    s_values_strip.append(s_next)
-                    s = s_next
-                    is_dash = not is_dash
-            else:
-                s_values_strip = None
-
             # Go in s direction along lane and calculate the start and stop values
             # ASPHALT
             if lane.side == 'right':
@@ -483,10 +611,7 @@ class road:
             # ROAD MARK
             if lane.road_mark_type != 'none':
                 if lane.road_mark_type == 'broken':
-                    if lane.road_mark_type == 'solid_solid':
-                        s_values.append((line_toggle_start, s_values_strip))
-                        s_values.append((line_toggle_start, s_values_strip))
-                    s_values.append((line_toggle_start, s_values_strip))
+                    s_values.append((line_toggle_broken, s_values_strip_broken))
                 else:
                     s_values_strip_solid = [0, length]
                     if lane.road_mark_type == 'solid_solid':
@@ -498,128 +623,175 @@ class road:
                 s_values.append((line_toggle_start, [0, length]))
         return s_values
 
-    def get_road_sample_points(self, lanes, strips_s_boundaries):
+    def clip_strips_s_boundaries(self, strips_s_boundaries, s_start, s_end):
+        '''
+            Return the strip boundaries limited to the range from s_start to
+            s_end, the line marking toggle flags are adjusted accordingly.
+        '''
+        strips_s_boundaries_clipped = []
+        for line_toggle, s_boundaries in strips_s_boundaries:
+            # Each face which starts before the range toggles a broken line
+            num_faces_before = np.searchsorted(s_boundaries, s_start, side='right') - 1
+            if num_faces_before % 2 == 1:
+                line_toggle = not line_toggle
+            strips_s_boundaries_clipped.append(
+                (line_toggle, self.clip_s_values(s_boundaries, s_start, s_end).tolist()))
+        return strips_s_boundaries_clipped
+
+    def clip_s_values(self, s_values, s_start, s_end):
+        '''
+            Return array of the s values inside the range from s_start to
+            s_end including the range start and end.
+        '''
+        s_values = np.asarray(s_values, dtype=float)
+        return np.concatenate(([s_start], s_values[(s_values > s_start) & (s_values < s_end)], [s_end]))
+
+    def get_road_s_samples(self, lanes, max_chordal_deviation, max_elevation_deviation, s_range=None):
+        '''
+            Adaptively choose s values along the road such that the deviation of
+            the mesh from the exact road stays below the given chordal (plan
+            view and lane width) and elevation tolerances. With an s range only
+            the sections overlapping it are sampled.
+        '''
+        step_min = 0.1
+        step_max = 50.0
+        step_grid = 0.5
+        length = self.geometry.total_length
+        if length == 0:
+            return [0.0]
+        # Evaluate curvatures on a dense grid which contains all section
+        # boundaries since curvature and heading may jump there
+        s_sections = [0.0] + self.geometry.sections_s_end
+        if s_range is not None:
+            # The samples of a section do not depend on the other sections
+            idx_first = min(len(s_sections) - 2, bisect_right(s_sections, s_range[0]) - 1)
+            idx_last = min(len(s_sections) - 1, bisect_left(s_sections, s_range[1]))
+            s_sections = s_sections[idx_first:idx_last + 1]
+        s_grid = np.unique(np.concatenate([
+            np.linspace(s_start, s_end, int(np.ceil((s_end - s_start) / step_grid)) + 1)
+            for s_start, s_end in zip(s_sections[:-1], s_sections[1:])]))
+        _, _, _, curvature_plan_view = self.geometry.sample_plan_view_batch(s_grid)
+        _, curvature_elevation = self.geometry.calculate_elevation_batch(s_grid)
+        # The outer road edge has the largest chordal deviation, the lane
+        # widths and the lane offset follow cubic polynomials in s
+        lane_offset_coefficients = self.geometry.lane_offset_coefficients
+        lane_offset = helpers.calculate_lane_offset(s_grid, lane_offset_coefficients, length)
+        width_max = 0.0
+        width_change_max = 0.0
+        for side in ['left', 'right']:
+            lanes_side = [lane for lane in lanes if lane.side == side]
+            width_max = max(width_max,
+                sum(lane.width_start for lane in lanes_side), sum(lane.width_end for lane in lanes_side))
+            width_change_max = max(width_change_max,
+                sum(abs(lane.width_end - lane.width_start) for lane in lanes_side))
+        t_max = width_max + np.abs(lane_offset)
+        s_norm = s_grid / length
+        curvature_lateral = (np.abs(2.0 * lane_offset_coefficients['c']
+                                    + 6.0 * lane_offset_coefficients['d'] * s_norm)
+                             + np.abs(6.0 - 12.0 * s_norm) * width_change_max) / length**2
+        curvature_edge = np.abs(curvature_plan_view) * (1.0 + np.abs(curvature_plan_view) * t_max) \
+            + curvature_lateral
+        # A chord of length h deviates h^2 * curvature / 8 from the curve
+        density = np.maximum(np.sqrt(curvature_edge / (8.0 * max_chordal_deviation)),
+                             np.sqrt(np.abs(curvature_elevation) / (8.0 * max_elevation_deviation)))
+        density = np.clip(density, 1.0 / step_max, 1.0 / step_min)
+        # Distribute the samples of each section evenly over the integrated
+        # sample density, use the larger density of each grid interval to stay
+        # on the safe side where the curvature jumps
+        num_samples = np.concatenate(([0.0],
+            np.cumsum(np.maximum(density[1:], density[:-1]) * np.diff(s_grid))))
+        num_samples_sections = np.interp(s_sections, s_grid, num_samples)
+        s_samples = [s_sections[0]]
+        for idx_section in range(len(s_sections) - 1):
+            num_start = num_samples_sections[idx_section]
+            num_end = num_samples_sections[idx_section + 1]
+            num_steps = max(1, int(np.ceil(num_end - num_start)))
+            s_samples_section = np.interp(np.linspace(num_start, num_end, num_steps + 1)[1:],
+                num_samples, s_grid)
+            s_samples_section[-1] = s_sections[idx_section + 1]
+            s_samples.extend(s_samples_section.tolist())
+        return s_samples
+
+    def get_road_s_events(self, s_samples, strips_s_boundaries):
+        '''
+            Merge the adaptive samples and the inner face boundaries of all
+            strips into one sorted array of unique s events. Return the events
+            and the inner face boundaries of each strip.
+        '''
+        strips_s_cuts = [np.asarray(s_boundaries[1:-1], dtype=float)
+                         for line_toggle, s_boundaries in strips_s_boundaries]
+        s_events = np.unique(np.concatenate([np.asarray(s_samples, dtype=float)] + strips_s_cuts))
+        return s_events, strips_s_cuts
+
+    def get_road_sample_points(self, lanes, strips_s_boundaries,
+                               max_chordal_deviation, max_elevation_deviation, s_range=None):
         '''
             Adaptively sample road in s direction based on local curvature.
+            Return an array of all sample points and per strip side lists of
+            point indices for each face.
         '''
         length = self.geometry.total_length
-        s = 0.0
-        strips_t_values = self.get_strips_t_values(lanes, s)
-        # Obtain first curvature value
-        xyz_samples, hdg, curvature_abs = self.geometry.sample_cross_section(0.0, strips_t_values, True)
+        s_samples = np.array(self.get_road_s_samples(lanes, max_chordal_deviation,
+            max_elevation_deviation, s_range))
+        if s_range is not None:
+            s_samples = self.clip_s_values(s_samples, *s_range)
+        s_events, strips_s_cuts = self.get_road_s_events(s_samples, strips_s_boundaries)
+        strip_layout = road_strip_layout(lanes, length)
+        xyz_events, hdg, curvature_abs = self.geometry.sample_cross_section_grid(
+            s_events, strip_layout.get_t_values(s_events), True)
+        num_t = xyz_events.shape[1]
+        # A strip border is shared by the strips on both sides, it gets points
+        # at all samples and at the face boundaries of both strips
+        is_sample = np.isin(s_events, s_samples)
+        is_cut_strips = [np.isin(s_events, s_cuts) for s_cuts in strips_s_cuts]
+        events_borders = []
+        for idx_border in range(num_t):
+            is_event_border = is_sample.copy()
+            if idx_border > 0:
+                is_event_border |= is_cut_strips[idx_border - 1]
+            if idx_border < len(strips_s_cuts):
+                is_event_border |= is_cut_strips[idx_border]
+            events_borders.append(np.flatnonzero(is_event_border))
         # We need 2 vectors for each strip to later construct the faces with one
-        # list per face on each side of each strip
-        sample_points = [[[]] for _ in range(2 * (len(strips_t_values) - 1))]
-        for idx_t in range(len(strips_t_values) - 1):
-            sample_points[2 * idx_t][0].append(xyz_samples[idx_t])
-            sample_points[2 * idx_t + 1][0].append(xyz_samples[idx_t + 1])
-        # Concatenate vertices until end of road
-        idx_boundaries_strips = [0] * len(strips_s_boundaries)
-        while s < length:
-            # TODO: Make hardcoded sampling parameters configurable
-            if curvature_abs == 0.0:
-                # TODO: Make it work with mixed curve types
-                if self.geometry.sections[0] == 'line':
-                    step = 5.0
-                else:
-                    step = 1.0
-            else:
-                step = max(1, min(5, 0.1 / abs(curvature_abs)))
-            s += step
-            if s >= length:
-                s = length
-
-            # Sample next points along road geometry (all t values for current s value)
-            strips_t_values = self.get_strips_t_values(lanes, s)
-            xyz_samples, hdg, curvature_abs = self.geometry.sample_cross_section(s, strips_t_values, True)
-            point_index = -2
-            while point_index < len(sample_points) - 2:
-                point_index = point_index + 2
-                idx_strip = point_index//2
-                # Get the boundaries of road marking faces for current strip plus left and right
-                idx_boundaries = [0, 0, 0]
-                s_boundaries_next = [length, length, length]
-                # Check if there is a strip left and/or right to take into account
-                if idx_strip > 0:
-                    idx_boundaries[0] = idx_boundaries_strips[idx_strip - 1]
-                    s_boundaries_next[0] = strips_s_boundaries[idx_strip - 1][1][idx_boundaries[0] + 1]
-                idx_boundaries[1] = idx_boundaries_strips[idx_strip]
-                s_boundaries_next[1] = strips_s_boundaries[idx_strip][1][idx_boundaries[1] + 1]
-                if idx_strip < len(strips_s_boundaries) - 1:
-                    idx_boundaries[2] = idx_boundaries_strips[idx_strip + 1]
-                    s_boundaries_next[2] = strips_s_boundaries[idx_strip + 1][1][idx_boundaries[2] + 1]
-
-                # Check if any face boundary is smaller than sample point
-                smaller, idx_smaller = self.compare_boundaries_with_s(s, s_boundaries_next)
-                if smaller:
-                    # Find all boundaries in between
-                    while smaller:
-                        # Sample the geometry
-                        t_values = [strips_t_values[idx_strip], strips_t_values[idx_strip + 1]]
-                        xyz_boundary, hdg, curvature_abs = self.geometry.sample_cross_section(
-                            s_boundaries_next[idx_smaller], t_values, True)
-                        if idx_smaller == 0:
-                            # Append left extra point
-                            sample_points[2 * idx_strip][idx_boundaries[1]].append(xyz_boundary[0])
-                        if idx_smaller == 1:
-                            # Append left and right points
-                            sample_points[2 * idx_strip][idx_boundaries[1]].append(xyz_boundary[0])
-                            sample_points[2 * idx_strip + 1][idx_boundaries[1]].append(xyz_boundary[1])
-                            # Start a new list for next face
-                            sample_points[2 * idx_strip].append([xyz_boundary[0]])
-                            sample_points[2 * idx_strip + 1].append([xyz_boundary[1]])
-                        if idx_smaller == 2:
-                            # Append right extra point
-                            sample_points[2 * idx_strip + 1][idx_boundaries[1]].append(xyz_boundary[1])
-                        # Get the next boundary (relative to this strip)
-                        idx_boundaries[idx_smaller] += 1
-                        idx_strip_relative = idx_strip + idx_smaller - 1
-                        s_boundaries_next[idx_smaller] = \
-                            strips_s_boundaries[idx_strip_relative][1][idx_boundaries[idx_smaller] + 1]
-                        # Check again
-                        smaller, idx_smaller = self.compare_boundaries_with_s(s, s_boundaries_next)
-                    # Write back indices to global array (only left strip to avoid cross interference!)
-                    if idx_strip > 0:
-                        idx_boundaries_strips[idx_strip - 1] = idx_boundaries[0]
-
-                # Now there is no boundary in between anymore so append the samples
-                sample_points[2 * idx_strip][idx_boundaries[1]].append(xyz_samples[idx_strip])
-                sample_points[2 * idx_strip + 1][idx_boundaries[1]].append(xyz_samples[idx_strip + 1])
-        return sample_points
-
-    def compare_boundaries_with_s(self, s, s_boundaries_next):
-        '''
-            Return True if any boundary is smaller than s, also return the index
-            to the boundary.
-        '''
-        smaller = False
-        idx_sorted = sorted(range(len(s_boundaries_next)), key=s_boundaries_next.__getitem__)
-        if s_boundaries_next[idx_sorted[0]] < s:
-            smaller = True
-
-        return smaller, idx_sorted[0]
-
-    def get_road_vertices_edges_faces(self, road_sample_points):
-        '''
-           generate mesh from samplepoints
+        # list per face on each side of each strip, the vectors contain indices
+        # of the points, the faces are cut by index ranges of the events
+        sample_points = [[] for _ in range(2 * (num_t - 1))]
+        for idx_strip in range(num_t - 1):
+            idx_events_cut = np.searchsorted(s_events, strips_s_boundaries[idx_strip][1])
+            for idx_side, idx_border in [(0, idx_strip), (1, idx_strip + 1)]:
+                events_border = events_borders[idx_border]
+                idx_start = np.searchsorted(events_border, idx_events_cut[:-1], side='left')
+                idx_end = np.searchsorted(events_border, idx_events_cut[1:], side='right')
+                point_indices = events_border * num_t + idx_border
+                sample_points[2 * idx_strip + idx_side] = [
+                    point_indices[start:end].tolist() for start, end in zip(idx_start, idx_end)]
+        return xyz_events.reshape(-1, 3), sample_points
+
+    def get_road_vertices_edges_faces(self, points, road_sample_points):
         '''
-        vertices = []
-        edges = []
-        faces = []
-        idx_vertex = 0
+           Generate mesh buffers from sample points. Return vertices, edges,
+           the loop vertex indices of all faces and the number of loops per face.
+        '''
+        point_indices = []
+        polygon_totals = []
         point_index = 0
         while point_index < len(road_sample_points):
             for idx_face_strip in range(len(road_sample_points[point_index])):
                 samples_right = road_sample_points[point_index + 1][idx_face_strip]
                 samples_left = road_sample_points[point_index][idx_face_strip]
-                num_vertices = len(samples_left) + len(samples_right)
-                vertices += samples_right + samples_left[::-1]
-                edges += [[idx_vertex + n, idx_vertex + n + 1] for n in range(num_vertices - 1)] \
-                         + [[idx_vertex + num_vertices - 1, idx_vertex]]
-                faces += [[idx_vertex + n for n in range(num_vertices)]]
-                idx_vertex += num_vertices
+                point_indices += samples_right + samples_left[::-1]
+                polygon_totals.append(len(samples_left) + len(samples_right))
             point_index = point_index + 2
-        return vertices, edges, faces
+        # Each face gets its own vertices, duplicates are removed later
+        vertices = points[np.array(point_indices, dtype=np.int64)].reshape(-1, 3)
+        loops = np.arange(len(vertices), dtype=np.int32)
+        polygon_totals = np.array(polygon_totals, dtype=np.int32)
+        # Close the edge loop of each face
+        polygon_starts = np.cumsum(polygon_totals, dtype=np.int32) - polygon_totals
+        loops_next = loops + 1
+        loops_next[polygon_starts + polygon_totals - 1] = polygon_starts
+        edges = np.column_stack((loops, loops_next))
+        return vertices, edges, loops, polygon_totals
 
     def get_strip_to_lane_mapping(self, lanes):
         '''
@@ -687,10 +859,12 @@ class road:
         }
         return mapping_color_material[color]
 
-    def get_guard_rail_geometry(self, vertex_offset):
+    def get_guard_rail_geometry(self, lanes, vertex_offset, poles_as_instances=False, s_range=None):
         '''
             Generate guard rail mesh geometry for lanes with guard_rail enabled.
-            Generates a closed box-profile railing and vertical poles every 2m.
+            Generates a closed box-profile railing swept along the road and
+            vertical poles every 2m. Return the vertices, the quad faces and,
+            if the poles are instanced, the pole positions and headings.
         '''
         guard_rail_height_bottom = 0.44
         guard_rail_height_top = 0.75
@@ -699,163 +873,190 @@ class road:
         pole_width = 0.06
         pole_length = 0.06
         vertices = []
-        edges = []
         faces = []
-        num_faces = 0
+        pole_positions = []
+        pole_headings = []
 
         length = self.geometry.total_length
-        if length == 0:
-            return vertices, edges, faces, num_faces
-
+        # Lanes of each side from the center outwards
+        lanes_left = [lane for lane in lanes if lane.side == 'left'][::-1]
+        lanes_right = [lane for lane in lanes if lane.side == 'right']
         # Collect (side, lane_idx) for each guarded lane
         guard_rail_lanes = []
-        for idx in range(len(self.params['lanes_left_guard_rails'])):
-            if self.params['lanes_left_guard_rails'][idx]:
-                guard_rail_lanes.append(('left', idx, self.params['lanes_left_guard_rail_lateral_offsets'][idx]))
-        for idx in range(len(self.params['lanes_right_guard_rails'])):
-            if self.params['lanes_right_guard_rails'][idx]:
-                guard_rail_lanes.append(('right', idx, self.params['lanes_right_guard_rail_lateral_offsets'][idx]))
-
-        if not guard_rail_lanes:
-            return vertices, edges, faces, num_faces
-
-        # Sample s values along road for the railing
-        step = 1.0
-        sample_s_values = []
-        s = 0.0
-        while s < length:
-            sample_s_values.append(s)
-            s += step
-        if sample_s_values[-1] < length:
-            sample_s_values.append(length)
-
-        half_w = guard_rail_width / 2.0
-        half_pw = pole_width / 2.0
-        half_pl = pole_length / 2.0
+        for idx, lane in enumerate(lanes_left):
+            if lane.guard_rail:
+                guard_rail_lanes.append(('left', idx, lane.guard_rail_lateral_offset))
+        for idx, lane in enumerate(lanes_right):
+            if lane.guard_rail:
+                guard_rail_lanes.append(('right', idx, lane.guard_rail_lateral_offset))
+
+        if length == 0 or not guard_rail_lanes:
+            return np.zeros((0, 3)), np.zeros((0, 4), dtype=np.int64), None
+
+        # Sample s values along road for the railing and the poles
+        s_rail = np.append(np.arange(0.0, length, 1.0), length)
+        s_poles = np.arange(int(length // pole_spacing) + 1) * pole_spacing
+        if s_range is not None:
+            s_rail = self.clip_s_values(s_rail, *s_range)
+            # Poles on a chunk border belong to the following chunk
+            s_poles = s_poles[(s_poles >= s_range[0]) & ((s_poles < s_range[1]) | (s_range[1] >= length))]
+        s_poles_back = np.maximum(s_poles - pole_length / 2.0, 0.0)
+        s_poles_front = np.minimum(s_poles + pole_length / 2.0, length)
+        height_bottom = np.array([0.0, 0.0, guard_rail_height_bottom])
+        height_top = np.array([0.0, 0.0, guard_rail_height_top])
+        # Faces of a railing segment and a pole box, indices relative to the
+        # first vertex of the segment or pole
+        faces_rail_template = np.array([[0, 4, 7, 3],   # Inner wall
+                                        [1, 2, 6, 5],   # Outer wall
+                                        [3, 7, 6, 2],   # Top
+                                        [0, 1, 5, 4]])  # Bottom
+        faces_pole_template = np.array([[0, 1, 2, 3],   # Back
+                                        [4, 7, 6, 5],   # Front
+                                        [0, 3, 7, 4],   # Inner
+                                        [1, 5, 6, 2]])  # Outer
+        num_vertices = vertex_offset
 
         for side, lane_idx, lateral_offset in guard_rail_lanes:
-            # Helper to compute t_center for this guard rail at a given s
-            def calc_t_center(s_val):
-                s_norm = s_val / length if length > 0 else 0
-                interp = 3.0 * s_norm**2 - 2.0 * s_norm**3
-                t_c = 0.0
-                if side == 'left':
-                    for i in range(lane_idx):
-                        w_s = self.params['lanes_left_widths_start'][i]
-                        w_e = self.params['lanes_left_widths_end'][i]
-                        t_c += w_s + interp * (w_e - w_s)
-                    t_c += lateral_offset
-                else:
-                    for i in range(lane_idx):
-                        w_s = self.params['lanes_right_widths_start'][i]
-                        w_e = self.params['lanes_right_widths_end'][i]
-                        t_c -= w_s + interp * (w_e - w_s)
-                    t_c -= lateral_offset
-                return t_c
+            lanes_side = lanes_left if side == 'left' else lanes_right
+            # Inner and outer lateral direction of this guard rail
+            sign = 1.0 if side == 'left' else -1.0
+
+            def get_t_center(s):
+                s_norm = s / length
+                blend = 3.0 * s_norm**2 - 2.0 * s_norm**3
+                t_center = np.zeros(s.shape)
+                for lane in lanes_side[:lane_idx]:
+                    t_center += lane.width_start + blend * (lane.width_end - lane.width_start)
+                return sign * (t_center + lateral_offset)
 
             # --- Railing box (closed: inner, outer, top, bottom walls) ---
-            rail_base = vertex_offset + len(vertices)
-            for s_val in sample_s_values:
-                t_center = calc_t_center(s_val)
-                if side == 'left':
-                    t_inner = t_center - half_w
-                    t_outer = t_center + half_w
-                else:
-                    t_inner = t_center + half_w
-                    t_outer = t_center - half_w
-                xyz, _, _ = self.geometry.sample_cross_section(s_val, [t_inner, t_outer], True)
-                pt_in = xyz[0]
-                pt_out = xyz[1]
-                vertices.append((pt_in[0], pt_in[1], pt_in[2] + guard_rail_height_bottom))
-                vertices.append((pt_out[0], pt_out[1], pt_out[2] + guard_rail_height_bottom))
-                vertices.append((pt_out[0], pt_out[1], pt_out[2] + guard_rail_height_top))
-                vertices.append((pt_in[0], pt_in[1], pt_in[2] + guard_rail_height_top))
-
-            num_samples = len(sample_s_values)
-            for i in range(num_samples - 1):
-                a = rail_base + i * 4
-                b = rail_base + (i + 1) * 4
-                faces.append([a+0, b+0, b+3, a+3])  # Inner wall
-                faces.append([a+1, a+2, b+2, b+1])  # Outer wall
-                faces.append([a+3, b+3, b+2, a+2])  # Top
-                faces.append([a+0, a+1, b+1, b+0])  # Bottom
-                num_faces += 4
+            t_center = get_t_center(s_rail)
+            t_rail = np.column_stack((t_center - sign * guard_rail_width / 2.0,
+                                      t_center + sign * guard_rail_width / 2.0))
+            xyz, _, _ = self.geometry.sample_cross_section_grid(s_rail, t_rail, True)
+            # Profile vertices: inner bottom, outer bottom, outer top, inner top
+            vertices.append(np.stack((xyz[:, 0] + height_bottom, xyz[:, 1] + height_bottom,
+                                      xyz[:, 1] + height_top, xyz[:, 0] + height_top), axis=1).reshape(-1, 3))
+            idx_segments = num_vertices + 4 * np.arange(len(s_rail) - 1)
+            faces.append((idx_segments[:, np.newaxis, np.newaxis] + faces_rail_template).reshape(-1, 4))
+            num_vertices += 4 * len(s_rail)
 
             # --- Poles every couple of meters (from ground to top of railing) ---
-            pole_s = 0.0
-            while pole_s <= length:
-                t_center = calc_t_center(pole_s)
-                if side == 'left':
-                    t_p_in = t_center - half_pw
-                    t_p_out = t_center + half_pw
-                else:
-                    t_p_in = t_center + half_pw
-                    t_p_out = t_center - half_pw
-                s_back = max(pole_s - half_pl, 0.0)
-                s_front = min(pole_s + half_pl, length)
-                xyz_b, _, _ = self.geometry.sample_cross_section(s_back, [t_p_in, t_p_out], True)
-                xyz_f, _, _ = self.geometry.sample_cross_section(s_front, [t_p_in, t_p_out], True)
-                pb_in, pb_out = xyz_b[0], xyz_b[1]
-                pf_in, pf_out = xyz_f[0], xyz_f[1]
-                # 8 vertices: back(0-3), front(4-7)
-                pole_base = vertex_offset + len(vertices)
-                vertices += [
-                    pb_in,                                                       # 0 back-bot-in
-                    pb_out,                                                      # 1 back-bot-out
-                    (pb_out[0], pb_out[1], pb_out[2] + guard_rail_height_top),   # 2 back-top-out
-                    (pb_in[0], pb_in[1], pb_in[2] + guard_rail_height_top),      # 3 back-top-in
-                    pf_in,                                                       # 4 front-bot-in
-                    pf_out,                                                      # 5 front-bot-out
-                    (pf_out[0], pf_out[1], pf_out[2] + guard_rail_height_top),   # 6 front-top-out
-                    (pf_in[0], pf_in[1], pf_in[2] + guard_rail_height_top),      # 7 front-top-in
-                ]
-                p = pole_base
-                faces.append([p+0, p+1, p+2, p+3])  # Back
-                faces.append([p+4, p+7, p+6, p+5])  # Front
-                faces.append([p+0, p+3, p+7, p+4])  # Inner
-                faces.append([p+1, p+5, p+6, p+2])  # Outer
-                num_faces += 4
-                pole_s += pole_spacing
-
-        return vertices, edges, faces, num_faces
+            t_center = get_t_center(s_poles)
+            if poles_as_instances:
+                xyz, hdg, _ = self.geometry.sample_cross_section_grid(s_poles, t_center[:, np.newaxis], True)
+                pole_positions.append(xyz[:, 0])
+                pole_headings.append(hdg)
+                continue
+            t_poles = np.column_stack((t_center - sign * pole_width / 2.0,
+                                       t_center + sign * pole_width / 2.0))
+            xyz, _, _ = self.geometry.sample_cross_section_grid(
+                np.concatenate((s_poles_back, s_poles_front)), np.concatenate((t_poles, t_poles)), True)
+            xyz_back, xyz_front = xyz[:len(s_poles)], xyz[len(s_poles):]
+            # Box vertices: back(0-3), front(4-7) each bottom-in, bottom-out, top-out, top-in
+            vertices.append(np.stack((xyz_back[:, 0], xyz_back[:, 1],
+                                      xyz_back[:, 1] + height_top, xyz_back[:, 0] + height_top,
+                                      xyz_front[:, 0], xyz_front[:, 1],
+                                      xyz_front[:, 1] + height_top, xyz_front[:, 0] + height_top),
+                                     axis=1).reshape(-1, 3))
+            idx_poles = num_vertices + 8 * np.arange(len(s_poles))
+            faces.append((idx_poles[:, np.newaxis, np.newaxis] + faces_pole_template).reshape(-1, 4))
+            num_vertices += 8 * len(s_poles)
+
+        if poles_as_instances:
+            poles = (np.concatenate(pole_positions), np.concatenate(pole_headings))
+        else:
+            poles = None
+        return np.concatenate(vertices), np.concatenate(faces), poles
+
+    def create_guard_rail_pole_instances(self, context, obj):
+        '''
+            Create an object with one small quad per guard rail pole which
+            instances a single pole on each of its faces. The object is
+            parented to the road object.
+        '''
+        pole_positions, pole_headings = self.guard_rail_poles
+        num_poles = len(pole_positions)
+        # Quads are aligned with the road, the first edge gives the direction
+        direction = np.column_stack((np.cos(pole_headings), np.sin(pole_headings), np.zeros(num_poles)))
+        normal = np.column_stack((-np.sin(pole_headings), np.cos(pole_headings), np.zeros(num_poles)))
+        corners = 0.01 * np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0]])
+        vertices = pole_positions[:, np.newaxis] \
+            + corners[np.newaxis, :, 0, np.newaxis] * direction[:, np.newaxis] \
+            + corners[np.newaxis, :, 1, np.newaxis] * normal[:, np.newaxis]
+        mesh = helpers.create_mesh_from_buffers('guard_rail_poles_' + str(obj['id_odr']),
+            vertices.reshape(-1, 3), np.zeros((0, 2)), np.arange(4 * num_poles), np.full(num_poles, 4))
+        obj_poles = bpy.data.objects.new(mesh.name, mesh)
+        obj_poles.instance_type = 'FACES'
+        obj_poles.parent = obj
+        obj_poles['guard_rail_poles_road_id'] = obj['id_odr']
+        helpers.link_object_opendrive(context, obj_poles)
+        # The pole which is instanced, the mesh is shared by all roads
+        mesh_pole = bpy.data.meshes.get('guard_rail_pole')
+        if mesh_pole is None:
+            mesh_pole = self.get_guard_rail_pole_mesh()
+        obj_pole = bpy.data.objects.new('guard_rail_pole_' + str(obj['id_odr']), mesh_pole)
+        obj_pole.parent = obj_poles
+        obj_pole['guard_rail_poles_road_id'] = obj['id_odr']
+        helpers.link_object_opendrive(context, obj_pole)
+        return obj_poles
+
+    def get_guard_rail_pole_mesh(self):
+        '''
+            Return a box mesh of one guard rail pole standing on the origin.
+        '''
+        pole_width = 0.06
+        pole_length = 0.06
+        guard_rail_height_top = 0.75
+        x = pole_length / 2.0
+        y = pole_width / 2.0
+        vertices = np.array([[-x, y, 0.0], [-x, -y, 0.0], [-x, -y, guard_rail_height_top], [-x, y, guard_rail_height_top],
+                             [x, y, 0.0], [x, -y, 0.0], [x, -y, guard_rail_height_top], [x, y, guard_rail_height_top]])
+        faces = np.array([[0, 1, 2, 3], [4, 7, 6, 5], [0, 3, 7, 4], [1, 5, 6, 2]])
+        mesh = helpers.create_mesh_from_buffers('guard_rail_pole', vertices, np.zeros((0, 2)),
+            faces.ravel(), np.full(len(faces), 4),
+            np.full(len(faces), helpers.get_default_material_index('guard_rail_metal')))
+        for key in helpers.default_materials.keys():
+            material = bpy.data.materials.get(key)
+            if material is not None:
+                mesh.materials.append(material)
+        return mesh
 
     def get_face_materials(self, lanes, strips_s_boundaries):
         '''
-            Return dictionary with index of faces for each material.
+            Return array with the material slot index of each face.
         '''
-        materials = {'asphalt': [], 'road_mark_white': [], 'road_mark_yellow': [], 'grass': []}
-        idx_face = 0
+        idx_asphalt = helpers.get_default_material_index('road_asphalt')
+        idx_grass = helpers.get_default_material_index('grass')
+        materials = []
         strip_to_lane, strip_is_road_mark = self.get_strip_to_lane_mapping(lanes)
         for idx_strip in range(len(strips_s_boundaries)):
             idx_lane = strip_to_lane[idx_strip]
             if strip_is_road_mark[idx_strip]:
                 line_toggle = strips_s_boundaries[idx_strip][0]
                 num_faces = int(len(strips_s_boundaries[idx_strip][1]) - 1)
-                material = self.get_road_mark_material(lanes[idx_lane].road_mark_color)
+                idx_material = helpers.get_default_material_index(
+                    self.get_road_mark_material(lanes[idx_lane].road_mark_color))
                 # Step through faces of a road mark strip
                 for idx in range(num_faces):
                     # Determine material
                     if lanes[idx_lane].road_mark_type == 'solid':
-                        materials[material].append(idx_face)
-                        idx_face += 1
+                        materials.append(idx_material)
                     elif lanes[idx_lane].road_mark_type == 'broken':
                         if line_toggle:
-                            materials[material].append(idx_face)
+                            materials.append(idx_material)
                             line_toggle = False
                         else:
-                            materials['asphalt'].append(idx_face)
+                            materials.append(idx_asphalt)
                             line_toggle = True
-                        idx_face += 1
                     elif lanes[idx_lane].road_mark_type == 'solid_solid':
-                        materials[material].append(idx_face)
-                        idx_face += 1
+                        materials.append(idx_material)
             else:
                 if lanes[idx_lane].type == 'median':
-                    materials['grass'].append(idx_face)
+                    materials.append(idx_grass)
                 elif lanes[idx_lane].type == 'shoulder':
-                    materials['grass'].append(idx_face)
+                    materials.append(idx_grass)
                 else:
-                    materials['asphalt'].append(idx_face)
-                idx_face += 1
+                    materials.append(idx_asphalt)
 
-        return materials
+        return np.array(materials, dtype=np.int32)
@@ -35,6 +35,8 @@ class DSC_OT_road(DSC_OT_modal_road_base):
             Create a model object instance
         '''
         self.road = road(context, self.object_type, self.geometry, self.geometry_solver)
+        # Previews are solved and meshed on a copy of the geometry in the background
+        self.road_preview = road(None, self.object_type, None, self.geometry_solver)
 
     def create_object_3d(self, context):
         '''
@@ -53,9 +55,28 @@ class DSC_OT_road(DSC_OT_modal_road_base):
         '''
             Calculate and return the vertices, edges and faces to create a road mesh.
         '''
-        valid, mesh, self.geometry.matrix_world, materials = \
-            self.road.update_params_get_mesh(context, self.params_input, wireframe)
+        # The stencil mesh is updated in place
+        mesh_stencil = self.stencil.data if wireframe and self.stencil is not None else None
+        valid, mesh, self.geometry.matrix_world, materials = self.road.update_params_get_mesh(
+            context, self.params_input, wireframe, lod='preview', mesh=mesh_stencil)
         if not valid:
             self.report({'WARNING'}, 'No valid road geometry solution found!')
         return valid, mesh, self.geometry.matrix_world, materials
 
+    def update_geometry(self, context):
+        '''
+            Solve the geometry for the current input on the main thread.
+        '''
+        self.road.update_params(context, self.params_input)
+
+    def get_preview_model(self):
+        '''
+            Return the road model which computes the background previews.
+        '''
+        return self.road_preview
+
+    def get_preview_snapshot(self, context):
+        '''
+            Return a pure data snapshot of the input for a background preview.
+        '''
+        return self.road.get_preview_snapshot(context, self.params_input)
@@ -0,0 +1,59 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from functools import lru_cache
+import numpy as np
+
+
+def normalize_dash_phase(phase, line_length, line_space):
+    '''
+        Return the phase wrapped into the period of the dash pattern.
+    '''
+    period = line_length + line_space
+    if period <= 0:
+        return 0.0
+    return float(phase % period)
+
+
+@lru_cache(maxsize=128)
+def get_dash_pattern(length, line_length, line_space, phase):
+    '''
+        Return a flag if the pattern starts with a dash and a tuple with the
+        s values where dashes and gaps of a broken line alternate, starting
+        with 0 and ending with the length. The phase is the distance into the
+        period (dash followed by gap) at s = 0. Identical patterns are shared.
+    '''
+    period = line_length + line_space
+    if length <= 0 or line_length <= 0 or line_space <= 0:
+        return True, (0.0, float(length))
+    phase = normalize_dash_phase(phase, line_length, line_space)
+    # Start of all periods touching the road, relative to the road start
+    s_period_start = np.arange(-phase, length, period)
+    s_boundaries = np.concatenate((s_period_start, s_period_start + line_length))
+    s_boundaries = np.sort(s_boundaries[(s_boundaries > 0.0) & (s_boundaries < length)])
+    dash_start = phase < line_length
+    return dash_start, tuple([0.0] + s_boundaries.tolist() + [float(length)])
+
+
+def get_dash_phase_end(length, line_length, line_space, phase_start):
+    '''
+        Return the phase of the dash pattern at the end of a road.
+    '''
+    return normalize_dash_phase(phase_start + length, line_length, line_space)
+
+
+def get_dash_phase_reversed(line_length, line_space, phase):
+    '''
+        Return the phase of the same dash pattern walked in opposite direction.
+    '''
+    return normalize_dash_phase(line_length - phase, line_length, line_space)
@@ -0,0 +1,107 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+
+def is_double_line(road_mark_type):
+    '''
+        Return True if the road mark type consists of two lines.
+    '''
+    return road_mark_type in ('solid_solid', 'solid_broken', 'broken_solid')
+
+
+def get_road_mark_half_width(lane):
+    '''
+        Return the width the road mark of a lane takes up on each of its
+        two neighbouring lanes.
+    '''
+    if lane.road_mark_type == 'none':
+        return 0.0
+    if is_double_line(lane.road_mark_type):
+        return lane.road_mark_width * 3.0 / 2.0
+    else:
+        return lane.road_mark_width / 2.0
+
+
+def get_strips_t_values_for_widths(lanes, lane_widths):
+    '''
+        Return list of t values of strip borders for the given lane widths.
+    '''
+    t = 0
+    t_left_width_total = 0
+    t_values = []
+    for idx_lane, lane in enumerate(lanes):
+        lane_width = lane_widths[idx_lane]
+        # Add lane width for right side of road BEFORE (in t-direction) road mark lines
+        if lane.side == 'right':
+            t -= lane_width - get_road_mark_half_width(lanes[idx_lane - 1]) \
+                - get_road_mark_half_width(lane)
+        # Add road mark lines
+        if lane.road_mark_type != 'none':
+            width_line = lane.road_mark_width
+            if is_double_line(lane.road_mark_type):
+                t_values.append(t)
+                t_values.append(t -       width_line)
+                t_values.append(t - 2.0 * width_line)
+                t_values.append(t - 3.0 * width_line)
+                width_lines = 3.0 * width_line
+            else:
+                t_values.append(t)
+                t_values.append(t - width_line)
+                width_lines = width_line
+            t -= width_lines
+            if lane.side == 'left':
+                t_left_width_total += width_lines
+            if lane.side == 'center':
+                t_left_width_total += width_lines/2
+        else:
+            t_values.append(t)
+        # Add lane width for left side of road AFTER (in t-direction) road mark lines
+        if lane.side == 'left':
+            t_lane = lane_width - get_road_mark_half_width(lane) \
+                - get_road_mark_half_width(lanes[idx_lane + 1])
+            t -= t_lane
+            t_left_width_total += t_lane
+    return [t_value + t_left_width_total for t_value in t_values]
+
+
+class road_strip_layout:
+    '''
+        Lateral layout of the strips (lanes and road mark lines) of a road.
+        Compiled once from the lanes, the t values of the strip borders for
+        any number of s values then follow from a single evaluation of the
+        cubic lane width blend.
+    '''
+
+    def __init__(self, lanes, length):
+        self.length = length
+        # All strip borders are linear in the lane widths and all lane widths
+        # share the same cubic blend, hence the borders follow that blend too
+        self.t_values_start = np.array(get_strips_t_values_for_widths(
+            lanes, [lane.width_start for lane in lanes]), dtype=np.float64)
+        self.t_values_end = np.array(get_strips_t_values_for_widths(
+            lanes, [lane.width_end for lane in lanes]), dtype=np.float64)
+        self.t_values_change = self.t_values_end - self.t_values_start
+
+    def get_t_values(self, s):
+        '''
+            Return array with the t values of all strip borders for each s
+            value in s, one row per s value.
+        '''
+        s = np.asarray(s, dtype=np.float64)
+        if self.length == 0:
+            return np.zeros((len(s), 0))
+        s_norm = s / self.length
+        blend = 3.0 * s_norm**2 - 2.0 * s_norm**3
+        return self.t_values_start + blend[:, np.newaxis] * self.t_values_change
@@ -17,6 +17,7 @@ from mathutils import Vector
 from math import atan2
 
 from . import helpers
+from . mouse_move_throttle import mouse_move_throttle
 
 
 class DSC_OT_scenario_object_move(bpy.types.Operator):
@@ -141,10 +142,13 @@ class DSC_OT_scenario_object_move(bpy.types.Operator):
             bpy.context.window.cursor_modal_set('CROSSHAIR')
             self.state = 'SELECT_OBJECT'
 
-        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'}:
+        # Mouse moves are coalesced and rate limited, timer events catch up on them
+        mouse_moved = self.mouse_move_throttle.is_update_due(event)
+        if event.type in {'NONE', 'TIMER', 'TIMER_REPORT', 'EVT_TWEAK_L', 'WINDOW_DEACTIVATE'} \
+            and not mouse_moved:
             return {'PASS_THROUGH'}
 
-        if event.type == 'MOUSEMOVE':
+        if mouse_moved:
             if self.state == 'SELECT_OBJECT':
                 self.hovered_obj = self._raycast_to_movable_object(context, event)
             elif self.state == 'MOVE':
@@ -205,10 +209,13 @@ class DSC_OT_scenario_object_move(bpy.types.Operator):
         self.initial_rotation_euler = None
         self.initial_matrix = None
         bpy.ops.object.select_all(action='DESELECT')
+        self.mouse_move_throttle = mouse_move_throttle()
+        self.mouse_move_throttle.start(context)
         context.window_manager.modal_handler_add(self)
         return {'RUNNING_MODAL'}
 
     def clean_up(self, context):
+        self.mouse_move_throttle.stop(context)
         context.workspace.status_text_set(None)
         bpy.context.window.cursor_modal_restore()
         self.state = 'INIT'
@@ -14,6 +14,9 @@
 import bpy
 from mathutils import Vector
 
+from addon.lane_snapshot import lane_snapshot
+from addon.params_cross_section import params_cross_section
+
 params_input = {
     'points': [],
     'heading_start': 0.0,
@@ -37,4 +40,16 @@ def get_heading_start(point_start, point_end):
     if vector_start_end.length == 0:
         return 0
     else:
-        return vector_start_end.angle_signed(vector_hdg)
\ No newline at end of file
+        return vector_start_end.angle_signed(vector_hdg)
+
+def get_lanes_cross_section(cross_section):
+    '''
+        Return a lane snapshot of a predefined cross section.
+    '''
+    params = params_cross_section[cross_section]
+    return tuple(lane_snapshot(params['sides'][idx], params['types'][idx],
+                               params['widths_start'][idx], params['widths_end'][idx],
+                               params['road_mark_types'][idx], params['road_mark_weights'][idx],
+                               params['road_mark_widths'][idx], params['road_mark_colors'][idx],
+                               params['guard_rails'][idx], params['guard_rail_lateral_offsets'][idx])
+                 for idx in range(len(params['sides'])))
@@ -0,0 +1,136 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from addon import export_manifest
+
+import bpy
+
+
+def test_export_manifest_up_to_date(tmp_path):
+    '''
+        Check that artifacts are only skipped in incremental mode with
+        unchanged inputs and existing files
+    '''
+    file_path = tmp_path / 'bdsc_export.xodr'
+    file_path.write_text('')
+    manifest = export_manifest.export_manifest(tmp_path, True)
+    assert not manifest.is_up_to_date('xodr', {'object:road_1': 'a'}, [file_path])
+    manifest.save()
+    manifest = export_manifest.export_manifest(tmp_path, True)
+    assert manifest.is_up_to_date('xodr', {'object:road_1': 'a'}, [file_path])
+    assert not manifest.is_up_to_date('xodr', {'object:road_1': 'b'}, [file_path])
+    assert not manifest.is_up_to_date('xosc', {}, [file_path])
+    manifest = export_manifest.export_manifest(tmp_path, False)
+    assert not manifest.is_up_to_date('xodr', {'object:road_1': 'a'}, [file_path])
+    file_path.unlink()
+    manifest = export_manifest.export_manifest(tmp_path, True)
+    assert not manifest.is_up_to_date('xodr', {'object:road_1': 'a'}, [file_path])
+
+
+def test_export_manifest_broken_file(tmp_path):
+    '''
+        Check that a broken manifest leads to a full export
+    '''
+    (tmp_path / export_manifest.export_manifest.file_name).write_text('{')
+    manifest = export_manifest.export_manifest(tmp_path, True)
+    assert not manifest.is_up_to_date('xodr', {}, [])
+
+
+def test_export_manifest_hashes():
+    '''
+        Check which changes of an entity modify the content hashes
+    '''
+    mesh = bpy.data.meshes.new('entity_test')
+    mesh.from_pydata([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)], [], [[0, 1, 2]])
+    obj = bpy.data.objects.new('entity_test', mesh)
+    obj['speed_initial'] = 50.0
+    hash_object = export_manifest.get_object_hash(obj)
+    hash_model = export_manifest.get_entity_model_hash(obj)
+    obj['speed_initial'] = 60.0
+    obj.location.x = 10.0
+    obj.matrix_world.translation.x = 10.0
+    assert export_manifest.get_object_hash(obj) != hash_object
+    assert export_manifest.get_entity_model_hash(obj) == hash_model
+    mesh.vertices[0].co.z = 1.0
+    assert export_manifest.get_entity_model_hash(obj) != hash_model
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+def test_export_manifest_cache(tmp_path):
+    '''
+        Check that cached artifacts are reused in every mode as long as their
+        files exist
+    '''
+    file_path = tmp_path / 'entity_model_a.glb'
+    manifest = export_manifest.export_manifest(tmp_path, False)
+    assert not manifest.is_cached('entity_model:entity_model_a.glb', {'model': 'a'}, [file_path])
+    file_path.write_text('')
+    manifest.save()
+    manifest = export_manifest.export_manifest(tmp_path, False)
+    assert manifest.is_cached('entity_model:entity_model_a.glb', {'model': 'a'}, [file_path])
+    manifest.save()
+    manifest = export_manifest.export_manifest(tmp_path, True)
+    assert manifest.is_cached('entity_model:entity_model_a.glb', {'model': 'a'}, [file_path])
+    file_path.unlink()
+    assert not manifest.is_cached('entity_model:entity_model_a.glb', {'model': 'a'}, [file_path])
+
+
+def test_export_manifest_identical_entities():
+    '''
+        Check that identical entities with wheels share the model hash
+    '''
+    objs = []
+    for idx in range(2):
+        body = bpy.data.objects.new('car_test', bpy.data.meshes.new('car_test'))
+        wheel = bpy.data.objects.new('wheel_fl', bpy.data.meshes.new('wheel_fl'))
+        wheel.parent = body
+        wheel.location = (1.5, 0.8, 0.35)
+        body.location = (10.0 * idx, 0.0, 0.0)
+        objs.extend([body, wheel])
+    assert objs[2].name != objs[0].name and objs[3].name != objs[1].name
+    assert export_manifest.get_entity_model_hash(objs[0]) == export_manifest.get_entity_model_hash(objs[2])
+    objs[3].location.x = 1.6
+    assert export_manifest.get_entity_model_hash(objs[0]) != export_manifest.get_entity_model_hash(objs[2])
+    for obj in objs:
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
+
+
+def test_export_manifest_material_hash():
+    '''
+        Check that changing the contents of a material changes the model
+        and object hashes
+    '''
+    material = bpy.data.materials.new('paint_test')
+    material.diffuse_color = (0.8, 0.1, 0.1, 1.0)
+    body = bpy.data.objects.new('car_test_material', bpy.data.meshes.new('car_test_material'))
+    body.data.materials.append(material)
+    hash_model = export_manifest.get_entity_model_hash(body)
+    hash_object = export_manifest.get_object_hash(body)
+    material.diffuse_color = (0.1, 0.1, 0.8, 1.0)
+    assert export_manifest.get_entity_model_hash(body) != hash_model
+    assert export_manifest.get_object_hash(body) != hash_object
+    hash_model = export_manifest.get_entity_model_hash(body)
+    if material.node_tree is None:
+        material.use_nodes = True
+        hash_model = export_manifest.get_entity_model_hash(body)
+    principled = material.node_tree.nodes.get('Principled BSDF')
+    principled.inputs['Base Color'].default_value = (0.1, 0.8, 0.1, 1.0)
+    assert export_manifest.get_entity_model_hash(body) != hash_model
+    mesh = body.data
+    bpy.data.objects.remove(body)
+    bpy.data.meshes.remove(mesh)
+    bpy.data.materials.remove(material)
@@ -0,0 +1,79 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from addon import modal_road_object_base
+from addon.geometry_line import DSC_geometry_line
+from . helpers_test import params_input, get_heading_start
+
+import bpy
+from mathutils import Vector
+
+
+def create_road_object(id_odr, length):
+    '''
+        Return an object storing the geometry of a straight road like road
+        objects do.
+    '''
+    geometry = DSC_geometry_line()
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((length, 0.0, 0.0))]
+    params_input['heading_start'] = get_heading_start(params_input['points'][0], params_input['points'][1])
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    obj = bpy.data.objects.new('road_straight_' + str(id_odr), None)
+    obj['id_odr'] = id_odr
+    obj['dsc_type'] = 'road_straight'
+    obj['geometry'] = geometry.sections
+    obj['lane_offset_coefficients'] = geometry.lane_offset_coefficients
+    return obj
+
+
+def test_geometry_cache_hit_and_miss():
+    '''
+        Check that a cached geometry is reused until the stored geometry of
+        the road changes
+    '''
+    modal_road_object_base.invalidate_geometry_cache()
+    obj = create_road_object(7001, 10.0)
+    geometry = modal_road_object_base.load_geometry_cached(obj)
+    assert modal_road_object_base.load_geometry_cached(obj) is geometry
+    # Same ID reused by another road, e.g. after undo
+    obj_other = create_road_object(7001, 20.0)
+    geometry_other = modal_road_object_base.load_geometry_cached(obj_other)
+    assert geometry_other is not geometry
+    assert geometry_other.total_length == 20.0
+    modal_road_object_base.invalidate_geometry_cache(7001)
+    assert modal_road_object_base.load_geometry_cached(obj_other) is not geometry_other
+    bpy.data.objects.remove(obj)
+    bpy.data.objects.remove(obj_other)
+
+
+def test_geometry_cache_eviction():
+    '''
+        Check that the least recently used geometry is evicted when the cache
+        is full
+    '''
+    modal_road_object_base.invalidate_geometry_cache()
+    size = modal_road_object_base.geometry_cache_size
+    objs = [create_road_object(7100 + idx, 10.0) for idx in range(size + 1)]
+    geometries = [modal_road_object_base.load_geometry_cached(obj) for obj in objs[:size]]
+    # Use the first road again so that the second one is the oldest
+    assert modal_road_object_base.load_geometry_cached(objs[0]) is geometries[0]
+    modal_road_object_base.load_geometry_cached(objs[size])
+    assert len(modal_road_object_base.geometry_cache) == size
+    assert 7100 in modal_road_object_base.geometry_cache
+    assert 7101 not in modal_road_object_base.geometry_cache
+    assert modal_road_object_base.load_geometry_cached(objs[2]) is geometries[2]
+    for obj in objs:
+        bpy.data.objects.remove(obj)
+    modal_road_object_base.invalidate_geometry_cache()
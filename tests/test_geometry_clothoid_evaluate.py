@@ -0,0 +1,38 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.geometry_clothoid import evaluate_clothoid
+
+from pyclothoids import Clothoid
+from pytest import approx, mark
+import numpy as np
+
+
+@mark.parametrize('curvature_start,curvature_end,length', [
+    (0.01, 0.05, 100.0),
+    (0.0, -0.02, 300.0),
+    (0.1, -0.1, 80.0),
+    (0.02, 0.02 + 1e-8, 2000.0),
+    (0.0, 0.0, 50.0),
+    (0.05, 0.05, 120.0),
+])
+def test_geometry_clothoid_evaluate(curvature_start, curvature_end, length):
+    clothoid = Clothoid.StandardParams(3.0, -2.0, 0.7, curvature_start,
+        (curvature_end - curvature_start) / length, length)
+    s = np.linspace(0.0, length, 101)
+    x, y, hdg, curvature = evaluate_clothoid(clothoid.XStart, clothoid.YStart,
+        clothoid.ThetaStart, clothoid.KappaStart, clothoid.dk, s)
+    assert x == approx([clothoid.X(s_i) for s_i in s], abs=1e-9)
+    assert y == approx([clothoid.Y(s_i) for s_i in s], abs=1e-9)
+    assert hdg == approx([clothoid.Theta(s_i) for s_i in s], abs=1e-12)
+    assert curvature[-1] == approx(curvature_end, abs=1e-12)
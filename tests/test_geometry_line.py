@@ -117,4 +117,61 @@ def test_geometry_line_3d():
     length = geometry.total_length
     xyz_local, h, c = geometry.sample_cross_section(s=length, t_vec=[0.0], with_lane_offset=False)
     xyz_global = geometry.matrix_world @ Vector(xyz_local[0])
-    assert [xyz_global.x, xyz_global.y, xyz_global.z] == approx([10.0, 5.0, 4.0], 1e-5)
\ No newline at end of file
+    assert [xyz_global.x, xyz_global.y, xyz_global.z] == approx([10.0, 5.0, 4.0], 1e-5)
+
+
+def test_geometry_line_section_lookup():
+    '''
+        Look up sections of a multi section 'line' geometry by s value
+    '''
+    geometry = DSC_geometry_line()
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((10.0, 0.0, 0.0))]
+    params_input['heading_start'] = get_heading_start(params_input['points'][0], params_input['points'][1])
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((10.0, 0.0, 0.0)), Vector((30.0, 0.0, 0.0))]
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((10.0, 0.0, 0.0)),
+                              Vector((30.0, 0.0, 0.0)), Vector((60.0, 0.0, 0.0))]
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    assert geometry.sections_s_end == approx([10.0, 30.0, 60.0], 1e-5)
+    s_values = [0.0, 5.0, 10.0, 10.5, 30.0, 45.0, 60.0]
+    expected = [(0, 0.0), (0, 5.0), (0, 10.0), (1, 0.5), (1, 20.0), (2, 15.0), (2, 30.0)]
+    idx_sections, s_sections = geometry.get_section_idx_and_s_batch(s_values)
+    for idx, s in enumerate(s_values):
+        idx_section, s_section = geometry.get_section_idx_and_s(s)
+        assert idx_section == expected[idx][0]
+        assert s_section == approx(expected[idx][1], 1e-5)
+        assert idx_sections[idx] == expected[idx][0]
+        assert s_sections[idx] == approx(expected[idx][1], 1e-5)
+
+    geometry.remove_last_section()
+    assert geometry.sections_s_end == approx([10.0, 30.0], 1e-5)
+    assert geometry.get_section_idx_and_s(45.0)[0] == 1
+
+def test_geometry_line_elevation_curvature():
+    '''
+        Compare curvature of the elevation profile with finite differences
+    '''
+    geometry = DSC_geometry_line()
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((100.0, 0.0, 0.0))]
+    params_input['heading_start'] = get_heading_start(params_input['points'][0], params_input['points'][1])
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    # Second section with a cubic elevation profile
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((100.0, 0.0, 0.0)),
+                              Vector((200.0, 0.0, 10.0))]
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    h = 1e-3
+    for s in [110.0, 150.0, 180.0]:
+        z_0, _ = geometry.calculate_elevation(s - h)
+        z_1, curvature = geometry.calculate_elevation(s)
+        z_2, _ = geometry.calculate_elevation(s + h)
+        dz = (z_2 - z_0) / (2 * h)
+        d2z = (z_2 - 2 * z_1 + z_0) / h**2
+        assert curvature == approx(d2z / (1 + dz**2)**1.5, rel=1e-3, abs=1e-6)
+        z_batch, curvature_batch = geometry.calculate_elevation_batch([s])
+        assert curvature_batch[0] == approx(curvature, rel=1e-9)
@@ -16,6 +16,7 @@ from .helpers_test import params_input, get_heading_start
 
 from mathutils import Vector
 from pytest import approx
+import numpy as np
 
 
 def test_geometry_parampoly3():
@@ -47,3 +48,28 @@ def test_geometry_parampoly3():
     xyz_local_1, h_1, c_1 = geometry.sample_cross_section(s=length_1, t_vec=[0.0], with_lane_offset=False)
     xyz_global_1 = geometry.matrix_world @ Vector(xyz_local_1[0])
     assert [xyz_global_1.x, xyz_global_1.y, xyz_global_1.z] == approx([40.0, 0.0, 0.0], 1e-5)
+
+def test_geometry_parampoly3_arc_length():
+    ''' Check arc length and arc length parameterization of a 'parampoly3' geometry '''
+    geometry = DSC_geometry_parampoly3()
+
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((40.0, 30.0, 0.0))]
+    params_input['heading_start'] = 0.0
+    params_input['heading_end'] = 2.0
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+
+    # Compare with the length of a dense polyline
+    p_values = np.linspace(0.0, 1.0, 100001)
+    coeffs_u = geometry.sections[0]['coefficients_u']
+    coeffs_v = geometry.sections[0]['coefficients_v']
+    x = coeffs_u['a'] + coeffs_u['b'] * p_values + coeffs_u['c'] * p_values**2 + coeffs_u['d'] * p_values**3
+    y = coeffs_v['a'] + coeffs_v['b'] * p_values + coeffs_v['c'] * p_values**2 + coeffs_v['d'] * p_values**3
+    length_polyline = np.sum(np.hypot(np.diff(x), np.diff(y)))
+    assert geometry.total_length == approx(length_polyline, 1e-6)
+
+    # Equally spaced s values need to result in equally spaced points
+    s_values = np.linspace(0.0, geometry.total_length, 201)
+    x_s, y_s, hdg, curvature = geometry.sample_plan_view_batch(s_values)
+    distances = np.hypot(np.diff(x_s), np.diff(y_s))
+    assert distances.tolist() == approx([geometry.total_length / 200] * 200, 1e-4)
@@ -0,0 +1,68 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.geometry_arc import DSC_geometry_arc
+from addon.geometry_clothoid import DSC_geometry_clothoid
+from . helpers_test import params_input, get_heading_start
+
+from mathutils import Vector
+from pytest import approx
+import numpy as np
+
+
+def get_closest_s_brute_force(geometry, point):
+    '''
+        Find the s value of the closest reference line point by dense sampling.
+    '''
+    point_local = geometry.matrix_world.inverted() @ point
+    s_values = np.linspace(0.0, geometry.total_length, int(geometry.total_length / 0.001) + 1)
+    x, y, hdg, curvature = geometry.sample_plan_view_batch(s_values)
+    distances = np.hypot(x - point_local.x, y - point_local.y)
+    return s_values[np.argmin(distances)], distances.min()
+
+def assert_projection_matches_brute_force(geometry, points):
+    '''
+        Compare projection results with the dense sampling results.
+    '''
+    for point in points:
+        closest_point, heading, s, t = geometry.get_closest_ref_line_x_y_heading_s_t(point)
+        s_brute_force, distance_brute_force = get_closest_s_brute_force(geometry, point)
+        assert s == approx(s_brute_force, abs=2e-3)
+        assert abs(t) == approx(distance_brute_force, abs=1e-4)
+        point_local = geometry.matrix_world.inverted() @ point
+        assert (point_local.to_2d() - closest_point).length == approx(abs(t), abs=1e-6)
+
+def test_geometry_projection_arc():
+    ''' Project points onto an 'arc' geometry '''
+    geometry = DSC_geometry_arc()
+    params_input['points'] = [Vector((10.0, 5.0, 0.0)), Vector((60.0, 45.0, 0.0))]
+    params_input['heading_start'] = 0.3
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    points = [Vector((20.0, 10.0, 0.0)), Vector((40.0, 30.0, 0.0)), Vector((55.0, 20.0, 0.0)),
+              Vector((5.0, 0.0, 0.0)), Vector((80.0, 60.0, 0.0))]
+    assert_projection_matches_brute_force(geometry, points)
+
+def test_geometry_projection_clothoid():
+    ''' Project points onto a two section 'clothoid' geometry '''
+    geometry = DSC_geometry_clothoid()
+    points_road = [Vector((0.0, 0.0, 0.0)), Vector((80.0, 30.0, 0.0)), Vector((150.0, -10.0, 0.0))]
+    params_input['heading_start'] = get_heading_start(points_road[0], points_road[1])
+    params_input['heading_end'] = 0.8
+    for idx in range(2, len(points_road) + 1):
+        params_input['points'] = points_road[:idx]
+        geometry.add_section()
+        geometry.update(params_input, 0.0, 0.0, 'hermite')
+    points = [Vector((30.0, 20.0, 0.0)), Vector((79.0, 31.0, 0.0)), Vector((120.0, -30.0, 0.0)),
+              Vector((100.0, 40.0, 0.0))]
+    assert_projection_matches_brute_force(geometry, points)
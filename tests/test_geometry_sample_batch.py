@@ -0,0 +1,97 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.geometry_line import DSC_geometry_line
+from addon.geometry_arc import DSC_geometry_arc
+from addon.geometry_clothoid import DSC_geometry_clothoid
+from addon.geometry_clothoid_triple import DSC_geometry_clothoid_triple
+from addon.geometry_parampoly3 import DSC_geometry_parampoly3
+from . helpers_test import params_input, get_heading_start
+
+from mathutils import Vector
+from pytest import approx
+import numpy as np
+
+
+def create_geometry(geometry, points, heading_end, solver):
+    '''
+        Create a geometry with one section per additional point.
+    '''
+    params_input['heading_start'] = get_heading_start(points[0], points[1])
+    params_input['heading_end'] = heading_end
+    for idx in range(2, len(points) + 1):
+        params_input['points'] = points[:idx]
+        geometry.add_section()
+        geometry.update(params_input, 0.0, 0.0, solver)
+    return geometry
+
+def assert_batch_equals_scalar(geometry):
+    '''
+        Compare batch sampling results with the scalar sampling results.
+    '''
+    s_values = np.linspace(0.0, geometry.total_length, 57)
+    x, y, hdg, curvature = geometry.sample_plan_view_batch(s_values)
+    for idx, s in enumerate(s_values):
+        x_s, y_s, hdg_s, curvature_s = geometry.sample_plan_view(s)
+        assert [x[idx], y[idx], hdg[idx], curvature[idx]] \
+            == approx([x_s, y_s, hdg_s, curvature_s], rel=1e-6, abs=1e-6)
+
+def test_geometry_sample_batch_line():
+    ''' Compare batch and scalar sampling of a 'line' geometry '''
+    points = [Vector((2.0, 1.0, 0.0)), Vector((6.0, 3.0, 0.0)), Vector((10.0, 5.0, 0.0))]
+    geometry = create_geometry(DSC_geometry_line(), points, 0.0, None)
+    assert_batch_equals_scalar(geometry)
+
+def test_geometry_sample_batch_arc():
+    ''' Compare batch and scalar sampling of an 'arc' geometry '''
+    points = [Vector((0.0, 0.0, 0.0)), Vector((20.0, 10.0, 0.0)),
+              Vector((30.0, 0.0, 0.0)), Vector((50.0, 0.0, 0.0))]
+    geometry = create_geometry(DSC_geometry_arc(), points, 0.0, None)
+    assert_batch_equals_scalar(geometry)
+
+def test_geometry_sample_batch_clothoid():
+    ''' Compare batch and scalar sampling of a 'clothoid' geometry '''
+    points = [Vector((0.0, 0.0, 0.0)), Vector((20.0, 10.0, 0.0)), Vector((50.0, 5.0, 0.0))]
+    geometry = create_geometry(DSC_geometry_clothoid(), points, 0.5, 'hermite')
+    assert_batch_equals_scalar(geometry)
+
+def test_geometry_sample_batch_clothoid_triple():
+    ''' Compare batch and scalar sampling of a 'clothoid_triple' geometry '''
+    points = [Vector((0.0, 0.0, 0.0)), Vector((40.0, 20.0, 0.0))]
+    geometry = create_geometry(DSC_geometry_clothoid_triple(), points, 1.2, None)
+    assert_batch_equals_scalar(geometry)
+
+def test_geometry_sample_batch_parampoly3():
+    ''' Compare batch and scalar sampling of a 'parampoly3' geometry '''
+    points = [Vector((0.0, 0.0, 0.0)), Vector((30.0, 10.0, 0.0))]
+    geometry = create_geometry(DSC_geometry_parampoly3(), points, 1.0, None)
+    assert_batch_equals_scalar(geometry)
+
+def test_geometry_sample_cross_section_grid():
+    ''' Compare grid and scalar sampling of cross sections with lane offset '''
+    points = [Vector((0.0, 0.0, 0.0)), Vector((20.0, 10.0, 2.0)), Vector((50.0, 5.0, 3.0))]
+    geometry = DSC_geometry_clothoid()
+    params_input['heading_start'] = get_heading_start(points[0], points[1])
+    params_input['heading_end'] = 0.5
+    for idx in range(2, len(points) + 1):
+        params_input['points'] = points[:idx]
+        geometry.add_section()
+        geometry.update(params_input, 0.5, -1.0, 'hermite')
+    s_values = np.linspace(0.0, geometry.total_length, 23)
+    t_matrix = [[3.5 + 0.1 * idx, 0.0, -3.5] for idx in range(len(s_values))]
+    xyz, hdg, curvature_abs = geometry.sample_cross_section_grid(s_values, t_matrix, True)
+    assert xyz.shape == (len(s_values), 3, 3)
+    for idx, s in enumerate(s_values):
+        xyz_s, hdg_s, curvature_abs_s = geometry.sample_cross_section(s, t_matrix[idx], True)
+        assert xyz[idx].ravel().tolist() == approx(np.ravel(xyz_s).tolist(), rel=1e-6, abs=1e-6)
+        assert [hdg[idx], curvature_abs[idx]] == approx([hdg_s, curvature_abs_s], rel=1e-6, abs=1e-6)
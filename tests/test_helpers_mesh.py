@@ -0,0 +1,54 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon import helpers
+
+import bpy
+
+
+def test_replace_mesh_in_place():
+    '''
+        Check that replacing a mesh keeps the datablock of the object and
+        removes the temporary mesh
+    '''
+    mesh_stencil = bpy.data.meshes.new('dsc_stencil_test')
+    mesh_stencil.from_pydata([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0)], [[0, 1]], [])
+    obj = bpy.data.objects.new('dsc_stencil_test', mesh_stencil)
+    mesh = bpy.data.meshes.new('temp')
+    mesh.from_pydata([(0.0, 0.0, 0.0), (2.0, 0.0, 0.0), (2.0, 1.0, 0.0), (0.0, 1.0, 0.0)], [], [[0, 1, 2, 3]])
+    num_meshes = len(bpy.data.meshes)
+    helpers.replace_mesh(obj, mesh)
+    assert obj.data == mesh_stencil
+    assert len(bpy.data.meshes) == num_meshes - 1
+    assert len(obj.data.vertices) == 4
+    assert len(obj.data.polygons) == 1
+    assert obj.data.vertices[2].co[:] == (2.0, 1.0, 0.0)
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh_stencil)
+
+
+def test_purge_orphan_temp_meshes():
+    '''
+        Check that only unused temporary meshes are purged
+    '''
+    mesh_used = bpy.data.meshes.new('temp_road')
+    obj = bpy.data.objects.new('road_test', mesh_used)
+    mesh_stencil = bpy.data.meshes.new('dsc_stencil')
+    mesh_stencil.use_fake_user = True
+    bpy.data.meshes.new('temp')
+    bpy.data.meshes.new('road_mesh')
+    num_meshes = len(bpy.data.meshes)
+    assert helpers.purge_orphan_temp_meshes() == 2
+    assert len(bpy.data.meshes) == num_meshes - 2
+    assert obj.data == mesh_used
+    bpy.data.objects.remove(obj)
@@ -0,0 +1,61 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.lane_snapshot import get_lanes_snapshot, get_lanes_snapshot_from_road_object
+from . helpers_test import get_lanes_cross_section
+
+from pytest import raises
+
+
+def test_lane_snapshot_immutable():
+    '''
+        Check that lane snapshots can neither be changed nor extended
+    '''
+    lanes = get_lanes_cross_section('two_lanes_default')
+    with raises(AttributeError):
+        lanes[0].width_start = 1.0
+    with raises(AttributeError):
+        lanes[0].width = 1.0
+    assert get_lanes_snapshot(lanes) == lanes
+    assert hash(get_lanes_snapshot(lanes)) == hash(lanes)
+
+
+def test_lane_snapshot_from_road_object():
+    '''
+        Check that the lanes of a road object are restored in the order of
+        the road properties lanes
+    '''
+    lanes = get_lanes_cross_section('two_lanes_turning_lane_offset_left_open')
+    lanes_left = [lane for lane in lanes if lane.side == 'left'][::-1]
+    lanes_right = [lane for lane in lanes if lane.side == 'right']
+    lane_center = [lane for lane in lanes if lane.side == 'center'][0]
+    obj = {'lanes_left_num': len(lanes_left), 'lanes_right_num': len(lanes_right)}
+    for side, lanes_side in [('left', lanes_left), ('right', lanes_right)]:
+        for key, attribute in [('types', 'type'), ('widths_start', 'width_start'),
+                               ('widths_end', 'width_end'), ('road_mark_types', 'road_mark_type'),
+                               ('road_mark_weights', 'road_mark_weight'),
+                               ('road_mark_widths', 'road_mark_width'),
+                               ('road_mark_colors', 'road_mark_color'), ('guard_rails', 'guard_rail'),
+                               ('guard_rail_lateral_offsets', 'guard_rail_lateral_offset')]:
+            obj['lanes_{}_{}'.format(side, key)] = [getattr(lane, attribute) for lane in lanes_side]
+    for attribute in ['road_mark_type', 'road_mark_weight', 'road_mark_width', 'road_mark_color']:
+        obj['lane_center_' + attribute] = getattr(lane_center, attribute)
+    lanes_restored = get_lanes_snapshot_from_road_object(obj)
+    assert len(lanes_restored) == len(lanes)
+    for lane_restored, lane in zip(lanes_restored, lanes):
+        if lane.side == 'center':
+            # The guard rail offset of the center lane is not stored
+            assert lane_restored.road_mark_type == lane.road_mark_type
+            assert lane_restored.road_mark_width == lane.road_mark_width
+        else:
+            assert lane_restored == lane
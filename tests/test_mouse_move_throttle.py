@@ -0,0 +1,53 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.mouse_move_throttle import mouse_move_throttle
+
+from types import SimpleNamespace
+
+
+def get_event(event_type, mouse_x, mouse_y):
+    '''
+        Return a minimal stand-in for a Blender event.
+    '''
+    return SimpleNamespace(type=event_type, mouse_x=mouse_x, mouse_y=mouse_y)
+
+
+def test_mouse_move_throttle_pixel_threshold():
+    '''
+        Check that small mouse moves are dropped until they add up
+    '''
+    throttle = mouse_move_throttle(pixel_threshold=3, rate_max=1e9)
+    assert throttle.is_update_due(get_event('MOUSEMOVE', 100, 100))
+    assert not throttle.is_update_due(get_event('MOUSEMOVE', 101, 102))
+    assert not throttle.is_update_due(get_event('MOUSEMOVE', 102, 99))
+    assert throttle.is_update_due(get_event('MOUSEMOVE', 103, 100))
+    assert not throttle.is_update_due(get_event('TIMER', 103, 100))
+    assert not throttle.is_update_due(get_event('LEFTMOUSE', 110, 100))
+
+
+def test_mouse_move_throttle_rate():
+    '''
+        Check that early mouse moves are postponed to the next timer event
+    '''
+    throttle = mouse_move_throttle(pixel_threshold=1, rate_max=1.0)
+    assert throttle.is_update_due(get_event('MOUSEMOVE', 0, 0))
+    assert not throttle.is_update_due(get_event('MOUSEMOVE', 10, 0))
+    assert not throttle.is_update_due(get_event('MOUSEMOVE', 20, 0))
+    assert not throttle.is_update_due(get_event('TIMER', 20, 0))
+    # Pretend the interval has passed
+    throttle.time_last -= 1.0
+    assert throttle.is_update_due(get_event('TIMER', 20, 0))
+    assert throttle.mouse_last == (20, 0)
+    throttle.time_last -= 1.0
+    assert not throttle.is_update_due(get_event('TIMER', 20, 0))
@@ -0,0 +1,92 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from addon import helpers
+
+import bpy
+
+
+def get_collection_opendrive():
+    '''
+        Return the OpenDRIVE collection, create it if necessary.
+    '''
+    collection = bpy.data.collections.get('OpenDRIVE')
+    if collection is None:
+        collection = bpy.data.collections.new('OpenDRIVE')
+        bpy.context.scene.collection.children.link(collection)
+    return collection
+
+
+def test_object_xodr_index_lookup():
+    '''
+        Check that lookups by ID follow new, renamed and removed objects
+    '''
+    collection = get_collection_opendrive()
+    obj_a = bpy.data.objects.new('road_index_a', None)
+    obj_a['id_odr'] = 9001
+    collection.objects.link(obj_a)
+    assert helpers.get_object_xodr_by_id(9001) == obj_a
+    assert helpers.get_object_xodr_by_id(9002) is None
+    obj_b = bpy.data.objects.new('road_index_b', None)
+    obj_b['id_odr'] = 9002
+    collection.objects.link(obj_b)
+    assert helpers.get_object_xodr_by_id(9002) == obj_b
+    obj_a.name = 'road_index_a_renamed'
+    assert helpers.get_object_xodr_by_id(9001) == obj_a
+    bpy.data.objects.remove(obj_a)
+    assert helpers.get_object_xodr_by_id(9001) is None
+    # Same number of objects but another ID
+    obj_b['id_odr'] = 9003
+    assert helpers.get_object_xodr_by_id(9002) is None
+    # Duplicate one object and remove another one
+    obj_c = obj_b.copy()
+    obj_c['id_odr'] = 9004
+    collection.objects.link(obj_c)
+    assert helpers.get_object_xodr_by_id(9003) == obj_b
+    obj_d = obj_b.copy()
+    obj_d['id_odr'] = 9005
+    collection.objects.link(obj_d)
+    bpy.data.objects.remove(obj_c)
+    assert helpers.get_object_xodr_by_id(9005) == obj_d
+    bpy.data.objects.remove(obj_d)
+    bpy.data.objects.remove(obj_b)
+    helpers.invalidate_object_xodr_index()
+    assert helpers.get_object_xodr_by_id(9003) is None
+
+
+def test_remove_orphaned_road_parts():
+    '''
+        Check that parts of a road are removed once the road is gone
+    '''
+    collection = get_collection_opendrive()
+    obj_road = bpy.data.objects.new('road_parts_test', None)
+    obj_road['id_odr'] = 9101
+    collection.objects.link(obj_road)
+    mesh_poles = bpy.data.meshes.new('guard_rail_poles_9101')
+    obj_poles = bpy.data.objects.new('guard_rail_poles_9101', mesh_poles)
+    obj_poles['guard_rail_poles_road_id'] = 9101
+    obj_poles.parent = obj_road
+    collection.objects.link(obj_poles)
+    mesh_chunk = bpy.data.meshes.new('mesh_chunk_1_road_parts_test')
+    obj_chunk = bpy.data.objects.new('mesh_chunk_1_road_parts_test', mesh_chunk)
+    obj_chunk['road_chunk_id_odr'] = 9101
+    obj_chunk.parent = obj_road
+    collection.objects.link(obj_chunk)
+    assert helpers.remove_orphaned_road_parts(collection) == 0
+    bpy.data.objects.remove(obj_road)
+    assert helpers.remove_orphaned_road_parts(collection) == 2
+    assert 'guard_rail_poles_9101' not in bpy.data.objects
+    assert 'guard_rail_poles_9101' not in bpy.data.meshes
+    assert 'mesh_chunk_1_road_parts_test' not in bpy.data.objects
+    assert 'mesh_chunk_1_road_parts_test' not in bpy.data.meshes
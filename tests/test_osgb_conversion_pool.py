@@ -0,0 +1,82 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from addon.osgb_conversion_pool import osgb_conversion_pool
+
+
+def get_pool_fake_osgconv(tmp_path, script):
+    '''
+        Return a conversion pool which runs a shell script instead of osgconv.
+    '''
+    file_path_script = tmp_path / 'osgconv'
+    file_path_script.write_text('#!/bin/sh\n' + script + '\n')
+    file_path_script.chmod(0o755)
+    pool = osgb_conversion_pool(max_workers=2, timeout=5.0)
+    pool.executable = str(file_path_script)
+    return pool
+
+
+def add_model(pool, tmp_path, name, file_path_texture):
+    '''
+        Write the intermediate files of a model and queue its conversion.
+    '''
+    file_path_obj = tmp_path / (name + '.obj')
+    file_path_mtl = tmp_path / (name + '.mtl')
+    file_path_obj.write_text('')
+    file_path_mtl.write_text('')
+    file_path_texture.write_text('')
+    pool.add(file_path_obj, [file_path_obj, file_path_mtl, file_path_texture])
+    return file_path_obj
+
+
+def test_osgb_conversion_pool_success(tmp_path):
+    '''
+        Check that all models are converted and intermediate files including
+        shared textures are removed
+    '''
+    pool = get_pool_fake_osgconv(tmp_path, 'cp "$1" "$2"')
+    file_path_texture = tmp_path / 'texture.png'
+    file_paths_obj = [add_model(pool, tmp_path, 'model_' + str(idx), file_path_texture) for idx in range(5)]
+    assert pool.run() == []
+    for file_path_obj in file_paths_obj:
+        assert file_path_obj.with_suffix('.osgb').exists()
+        assert not file_path_obj.exists()
+        assert not file_path_obj.with_suffix('.mtl').exists()
+    assert not file_path_texture.exists()
+    assert pool.run() == []
+
+
+def test_osgb_conversion_pool_errors(tmp_path):
+    '''
+        Check that failed, timed out and impossible conversions are reported
+        and leave no stale result behind
+    '''
+    pool = get_pool_fake_osgconv(tmp_path, 'echo "cannot read $1" >&2\nexit 3')
+    file_path_obj = add_model(pool, tmp_path, 'model', tmp_path / 'texture.png')
+    (tmp_path / 'model.osgb').write_text('')
+    pool.add(file_path_obj, [])
+    errors = pool.run()
+    assert len(errors) == 2
+    assert 'exit code 3' in errors[0] and 'cannot read' in errors[0]
+    assert not (tmp_path / 'model.osgb').exists()
+    assert not file_path_obj.exists()
+    pool = get_pool_fake_osgconv(tmp_path, 'sleep 10')
+    pool.timeout = 0.1
+    add_model(pool, tmp_path, 'model', tmp_path / 'texture.png')
+    errors = pool.run()
+    assert len(errors) == 1 and 'timed out' in errors[0]
+    pool = osgb_conversion_pool()
+    pool.executable = str(tmp_path / 'missing')
+    add_model(pool, tmp_path, 'model', tmp_path / 'texture.png')
+    assert 'openscenegraph' in pool.run()[0]
@@ -0,0 +1,71 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.preview_worker import preview_worker
+
+from threading import Event
+
+
+def poll_until_idle(worker):
+    '''
+        Call the timer callback of the worker until all work is done.
+    '''
+    while worker.future is not None or worker.snapshot_pending is not None:
+        worker.future.result()
+        worker.poll()
+
+
+def test_preview_worker_latest_snapshot():
+    '''
+        Check that waiting snapshots are replaced by newer ones and results
+        are applied in order
+    '''
+    started = Event()
+    release = Event()
+    def compute(snapshot):
+        if snapshot == 1:
+            started.set()
+            release.wait()
+        return 10 * snapshot
+    results = []
+    worker = preview_worker(compute, results.append)
+    worker.submit(1)
+    started.wait()
+    worker.submit(2)
+    worker.submit(3)
+    release.set()
+    poll_until_idle(worker)
+    assert results == [10, 30]
+    worker.cancel()
+
+
+def test_preview_worker_discard():
+    '''
+        Check that results of discarded snapshots are dropped
+    '''
+    release = Event()
+    def compute(snapshot):
+        release.wait()
+        return snapshot
+    results = []
+    worker = preview_worker(compute, results.append)
+    worker.submit('old')
+    worker.discard()
+    release.set()
+    poll_until_idle(worker)
+    assert results == []
+    worker.submit('new')
+    poll_until_idle(worker)
+    assert results == ['new']
+    worker.cancel()
+    assert worker.executor is None
@@ -0,0 +1,159 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+from addon.geometry_line import DSC_geometry_line
+from addon.lane_snapshot import lane_snapshot
+from addon.road import road
+from . helpers_test import params_input, get_heading_start, get_lanes_cross_section
+
+from mathutils import Vector
+from pytest import approx
+import numpy as np
+
+
+def get_road_guard_rails():
+    '''
+        Return a road model with two sections and the lanes of a cross section
+        with an opening lane and guard rails on both sides.
+    '''
+    geometry = DSC_geometry_line()
+    points = [Vector((0.0, 0.0, 0.0)), Vector((40.0, 0.0, 0.0)), Vector((100.0, 20.0, 3.0))]
+    for idx_point in range(2, len(points) + 1):
+        params_input['points'] = points[:idx_point]
+        params_input['heading_start'] = get_heading_start(points[0], points[1])
+        params_input['heading_end'] = 0.0
+        geometry.add_section()
+        geometry.update(params_input, 0.0, 0.0, None)
+    road_model = road(None, 'road_straight', geometry, None)
+    lanes = []
+    for lane in get_lanes_cross_section('two_lanes_turning_lane_offset_left_open'):
+        values = list(lane.astuple())
+        # Guard rails on the outer borders, the right one behind the opening lane
+        if lane.type == 'border':
+            values[-2:] = [True, 0.3]
+        lanes.append(lane_snapshot(*values))
+    return road_model, tuple(lanes)
+
+
+def get_guard_rail_geometry_reference(road_model, lanes, vertex_offset):
+    '''
+        Return vertices, faces, pole center points and headings of the guard rails
+        calculated point by point like the original implementation.
+    '''
+    geometry = road_model.geometry
+    length = geometry.total_length
+    lanes_sides = {'left': [lane for lane in lanes if lane.side == 'left'][::-1],
+                   'right': [lane for lane in lanes if lane.side == 'right']}
+    s_rail = []
+    s = 0.0
+    while s < length:
+        s_rail.append(s)
+        s += 1.0
+    if s_rail[-1] < length:
+        s_rail.append(length)
+    vertices = []
+    faces = []
+    pole_centers = []
+    pole_headings = []
+    for side in ['left', 'right']:
+        for lane_idx, lane in enumerate(lanes_sides[side]):
+            if not lane.guard_rail:
+                continue
+            sign = 1.0 if side == 'left' else -1.0
+
+            def calc_t_center(s_val):
+                s_norm = s_val / length
+                interp = 3.0 * s_norm**2 - 2.0 * s_norm**3
+                t_c = 0.0
+                for lane_inner in lanes_sides[side][:lane_idx]:
+                    t_c += lane_inner.width_start + interp * (lane_inner.width_end - lane_inner.width_start)
+                return sign * (t_c + lane.guard_rail_lateral_offset)
+
+            rail_base = vertex_offset + len(vertices)
+            for s_val in s_rail:
+                t_center = calc_t_center(s_val)
+                xyz, _, _ = geometry.sample_cross_section(s_val, [t_center - sign * 0.04, t_center + sign * 0.04], True)
+                pt_in, pt_out = xyz[0], xyz[1]
+                vertices += [(pt_in[0], pt_in[1], pt_in[2] + 0.44), (pt_out[0], pt_out[1], pt_out[2] + 0.44),
+                             (pt_out[0], pt_out[1], pt_out[2] + 0.75), (pt_in[0], pt_in[1], pt_in[2] + 0.75)]
+            for idx in range(len(s_rail) - 1):
+                a = rail_base + idx * 4
+                b = a + 4
+                faces += [[a+0, b+0, b+3, a+3], [a+1, a+2, b+2, b+1], [a+3, b+3, b+2, a+2], [a+0, a+1, b+1, b+0]]
+            pole_s = 0.0
+            while pole_s <= length:
+                t_center = calc_t_center(pole_s)
+                xyz_c, hdg, _ = geometry.sample_cross_section(pole_s, [t_center], True)
+                pole_centers.append(xyz_c[0])
+                pole_headings.append(hdg)
+                xyz_b, _, _ = geometry.sample_cross_section(max(pole_s - 0.03, 0.0),
+                    [t_center - sign * 0.03, t_center + sign * 0.03], True)
+                xyz_f, _, _ = geometry.sample_cross_section(min(pole_s + 0.03, length),
+                    [t_center - sign * 0.03, t_center + sign * 0.03], True)
+                p = vertex_offset + len(vertices)
+                vertices += [xyz_b[0], xyz_b[1], (xyz_b[1][0], xyz_b[1][1], xyz_b[1][2] + 0.75),
+                             (xyz_b[0][0], xyz_b[0][1], xyz_b[0][2] + 0.75),
+                             xyz_f[0], xyz_f[1], (xyz_f[1][0], xyz_f[1][1], xyz_f[1][2] + 0.75),
+                             (xyz_f[0][0], xyz_f[0][1], xyz_f[0][2] + 0.75)]
+                faces += [[p+0, p+1, p+2, p+3], [p+4, p+7, p+6, p+5], [p+0, p+3, p+7, p+4], [p+1, p+5, p+6, p+2]]
+                pole_s += 2.0
+    return np.array(vertices, dtype=float), np.array(faces), \
+        (np.array(pole_centers, dtype=float), np.array(pole_headings, dtype=float))
+
+
+def test_guard_rail_geometry_mesh_poles():
+    '''
+        Check guard rails on both sides of a road with changing lane width
+        against the point by point calculation
+    '''
+    road_model, lanes = get_road_guard_rails()
+    vertices, faces, poles = road_model.get_guard_rail_geometry(lanes, 10)
+    vertices_ref, faces_ref, poles_ref = get_guard_rail_geometry_reference(road_model, lanes, 10)
+    num_rail = int(np.ceil(road_model.geometry.total_length)) + 1
+    num_poles = int(road_model.geometry.total_length // 2.0) + 1
+    assert poles is None
+    assert len(vertices) == len(vertices_ref) == 2 * (4 * num_rail + 8 * num_poles)
+    assert len(faces) == len(faces_ref) == 2 * (4 * (num_rail - 1) + 4 * num_poles)
+    assert np.asarray(vertices, dtype=float).ravel() == approx(vertices_ref.ravel(), abs=1e-5)
+    assert np.array_equal(faces, faces_ref)
+    # Left rail behind the left lane, right rail behind both right lanes
+    # which widen from 3.5 m to 7 m
+    assert vertices[0][1] == approx(3.5 + 0.3 - 0.04)
+    idx_right = 4 * num_rail + 8 * num_poles
+    assert vertices[idx_right][1] == approx(-(3.5 + 0.3 - 0.04))
+
+
+def test_guard_rail_geometry_instanced_poles():
+    '''
+        Check that instanced poles are placed on the guard rail centers and
+        only the rails are meshed
+    '''
+    road_model, lanes = get_road_guard_rails()
+    vertices, faces, poles = road_model.get_guard_rail_geometry(lanes, 0, poles_as_instances=True)
+    vertices_ref, faces_ref, (pole_centers_ref, pole_headings_ref) = \
+        get_guard_rail_geometry_reference(road_model, lanes, 0)
+    num_rail = int(np.ceil(road_model.geometry.total_length)) + 1
+    num_poles = int(road_model.geometry.total_length // 2.0) + 1
+    assert len(vertices) == 2 * 4 * num_rail
+    assert len(faces) == 2 * 4 * (num_rail - 1)
+    # The rails of both sides are the first vertices of each side in the
+    # reference which also contains the pole boxes
+    num_side_ref = 4 * num_rail + 8 * num_poles
+    vertices_rails_ref = np.concatenate((vertices_ref[:4 * num_rail],
+                                         vertices_ref[num_side_ref:num_side_ref + 4 * num_rail]))
+    assert np.asarray(vertices, dtype=float).ravel() == approx(vertices_rails_ref.ravel(), abs=1e-5)
+    pole_positions, pole_headings = poles
+    assert len(pole_positions) == len(pole_headings) == 2 * num_poles
+    assert np.asarray(pole_positions).ravel() == approx(pole_centers_ref.ravel(), abs=1e-5)
+    assert np.asarray(pole_headings) == approx(pole_headings_ref)
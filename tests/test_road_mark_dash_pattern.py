@@ -0,0 +1,76 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.road_mark_dash_pattern import get_dash_pattern, get_dash_phase_end, get_dash_phase_reversed
+
+from pytest import approx
+
+
+def is_dash(dash_start, s_boundaries, s):
+    '''
+        Return True if s lies on a dash of the pattern.
+    '''
+    idx_face = sum(1 for s_boundary in s_boundaries[1:-1] if s_boundary <= s)
+    return dash_start == (idx_face % 2 == 0)
+
+
+def test_dash_pattern_road_start():
+    '''
+        Check that a pattern without phase starts with a full dash
+    '''
+    dash_start, s_boundaries = get_dash_pattern(20.0, 3.0, 6.0, 0.0)
+    assert dash_start
+    assert list(s_boundaries) == approx([0.0, 3.0, 9.0, 12.0, 18.0, 20.0])
+    dash_start, s_boundaries = get_dash_pattern(18.0, 3.0, 6.0, 0.0)
+    assert list(s_boundaries) == approx([0.0, 3.0, 9.0, 12.0, 18.0])
+
+
+def test_dash_pattern_phase():
+    '''
+        Check that the phase shifts the pattern into the gap and back
+    '''
+    dash_start, s_boundaries = get_dash_pattern(10.0, 3.0, 6.0, 4.0)
+    assert not dash_start
+    assert list(s_boundaries) == approx([0.0, 5.0, 8.0, 10.0])
+    dash_start, s_boundaries = get_dash_pattern(10.0, 3.0, 6.0, 11.0)
+    assert dash_start
+    assert list(s_boundaries) == approx([0.0, 1.0, 7.0, 10.0])
+
+
+def test_dash_pattern_continuity():
+    '''
+        Check that two consecutive roads continue the dashes of one long road
+    '''
+    length_a = 13.7
+    length_b = 25.1
+    pattern_long = get_dash_pattern(length_a + length_b, 3.0, 6.0, 0.0)
+    pattern_a = get_dash_pattern(length_a, 3.0, 6.0, 0.0)
+    pattern_b = get_dash_pattern(length_b, 3.0, 6.0, get_dash_phase_end(length_a, 3.0, 6.0, 0.0))
+    for s in [0.5 + 0.25 * idx for idx in range(150)]:
+        if s < length_a:
+            assert is_dash(*pattern_a, s) == is_dash(*pattern_long, s)
+        else:
+            assert is_dash(*pattern_b, s - length_a) == is_dash(*pattern_long, s)
+
+
+def test_dash_pattern_reversed():
+    '''
+        Check that walking a pattern backwards hits the same dashes
+    '''
+    length = 30.0
+    phase = 2.0
+    pattern = get_dash_pattern(length, 3.0, 6.0, phase)
+    pattern_reversed = get_dash_pattern(length, 3.0, 6.0, get_dash_phase_reversed(
+        3.0, 6.0, get_dash_phase_end(length, 3.0, 6.0, phase)))
+    for s in [0.3 + 0.5 * idx for idx in range(59)]:
+        assert is_dash(*pattern, s) == is_dash(*pattern_reversed, length - s)
@@ -0,0 +1,176 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon import export
+from addon import helpers
+from addon.geometry_line import DSC_geometry_line
+from addon.road import road
+from . helpers_test import params_input, get_heading_start, get_lanes_cross_section
+
+import bpy
+from mathutils import Vector
+from pytest import approx
+import numpy as np
+
+from types import SimpleNamespace
+
+
+def get_road_line(length):
+    '''
+        Return a road model with a straight line geometry of the given length.
+    '''
+    geometry = DSC_geometry_line()
+    params_input['points'] = [Vector((0.0, 0.0, 0.0)), Vector((length, 0.0, 0.0))]
+    params_input['heading_start'] = get_heading_start(params_input['points'][0], params_input['points'][1])
+    geometry.add_section()
+    geometry.update(params_input, 0.0, 0.0, None)
+    return road(None, 'road_straight', geometry, None)
+
+
+def test_road_mesh_chunks_s_ranges():
+    '''
+        Check the s ranges of the mesh chunks of a road
+    '''
+    road_model = get_road_line(1250.0)
+    assert road_model.get_mesh_chunks_s_ranges(0.0) == [(0.0, approx(1250.0))]
+    assert road_model.get_mesh_chunks_s_ranges(2000.0) == [(0.0, approx(1250.0))]
+    s_ranges = road_model.get_mesh_chunks_s_ranges(500.0)
+    assert [s_start for s_start, s_end in s_ranges] == approx([0.0, 500.0, 1000.0])
+    assert [s_end for s_start, s_end in s_ranges] == approx([500.0, 1000.0, 1250.0])
+
+
+def test_road_mesh_chunks_clip_strips():
+    '''
+        Check that clipped broken lines keep their dash and gap order
+    '''
+    road_model = get_road_line(30.0)
+    strips_s_boundaries = [(True, [0.0, 3.0, 9.0, 12.0, 18.0, 21.0, 27.0, 30.0]), (True, [0.0, 30.0])]
+    strips_clipped = road_model.clip_strips_s_boundaries(strips_s_boundaries, 10.0, 20.0)
+    # Dash from 9 to 12, gap from 12 to 18 and dash from 18 to 21
+    assert strips_clipped[0][0] == True
+    assert strips_clipped[0][1] == approx([10.0, 12.0, 18.0, 20.0])
+    assert strips_clipped[1][1] == approx([10.0, 20.0])
+    strips_clipped = road_model.clip_strips_s_boundaries(strips_s_boundaries, 5.0, 10.0)
+    assert strips_clipped[0][0] == False
+    assert strips_clipped[0][1] == approx([5.0, 9.0, 10.0])
+
+
+def test_road_s_samples_range():
+    '''
+        Check that sampling a range of sections gives the samples of the
+        whole road inside this range
+    '''
+    geometry = DSC_geometry_line()
+    points = [Vector((0.0, 0.0, 0.0)), Vector((40.0, 0.0, 0.0)), Vector((100.0, 0.0, 3.0))]
+    for idx_point in range(2, len(points) + 1):
+        params_input['points'] = points[:idx_point]
+        params_input['heading_start'] = get_heading_start(points[0], points[1])
+        params_input['heading_end'] = 0.0
+        geometry.add_section()
+        geometry.update(params_input, 0.0, 0.0, None)
+    road_model = road(None, 'road_straight', geometry, None)
+    lanes = get_lanes_cross_section('two_lanes_default')
+    s_samples = road_model.get_road_s_samples(lanes, 0.01, 0.001)
+    s_samples_range = road_model.get_road_s_samples(lanes, 0.01, 0.001, (40.0, 100.0))
+    assert s_samples_range == approx([s for s in s_samples if s >= 40.0])
+
+
+def test_road_sample_points_s_events():
+    '''
+        Check that the merged s events contain every density sample and strip
+        boundary exactly once and that each face spans its strip boundaries
+    '''
+    road_model = get_road_line(100.0)
+    # Broken center line and a right lane opening from 0 to 3.5 m
+    lanes = get_lanes_cross_section('two_lanes_turning_lane_offset_left_open')
+    strips_s_boundaries = road_model.get_strips_s_boundaries(lanes, 3.0, 6.0)
+    assert any(len(s_boundaries) > 2 for line_toggle, s_boundaries in strips_s_boundaries)
+    s_samples = road_model.get_road_s_samples(lanes, 0.01, 0.001)
+    s_events, strips_s_cuts = road_model.get_road_s_events(s_samples, strips_s_boundaries)
+    assert np.all(np.diff(s_events) > 0)
+    s_events_set = set(s_events.tolist())
+    assert set(float(s) for s in s_samples) <= s_events_set
+    for line_toggle, s_boundaries in strips_s_boundaries:
+        assert set(float(s) for s in s_boundaries) <= s_events_set
+    # The straight road runs along the local x axis, hence x equals s
+    points, sample_points = road_model.get_road_sample_points(lanes, strips_s_boundaries, 0.01, 0.001)
+    for idx_strip, (line_toggle, s_boundaries) in enumerate(strips_s_boundaries):
+        for idx_side in range(2):
+            faces = sample_points[2 * idx_strip + idx_side]
+            assert len(faces) == len(s_boundaries) - 1
+            for face, s_start, s_end in zip(faces, s_boundaries[:-1], s_boundaries[1:]):
+                x_face = points[face][:, 0]
+                assert x_face[0] == approx(s_start)
+                assert x_face[-1] == approx(s_end)
+                assert np.all(np.diff(x_face) > 0)
+
+
+class road_model_chunks_counting:
+    '''
+        Road model building a quad for each chunk and counting the rebuilds.
+    '''
+    def __init__(self):
+        self.num_meshes = 0
+
+    def get_mesh_from_object(self, context, obj, lod, s_range):
+        self.num_meshes += 1
+        mesh = bpy.data.meshes.new('temp_chunk')
+        mesh.from_pydata([(s_range[0], -1.0, 0.0), (s_range[1], -1.0, 0.0),
+            (s_range[1], 1.0, 0.0), (s_range[0], 1.0, 0.0)], [], [(0, 1, 2, 3)])
+        return mesh
+
+
+def test_road_chunk_mesh_export_rebuild():
+    '''
+        Check that only chunks of changed roads are rebuilt for export and
+        that unchanged chunks get the mesh of the last export
+    '''
+    dsc_properties = SimpleNamespace(road_mesh_max_chordal_deviation=0.01,
+        road_mesh_max_elevation_deviation=0.001, road_mesh_lod_export_factor=0.5)
+    context = SimpleNamespace(scene=SimpleNamespace(dsc_properties=dsc_properties),
+        view_layer=bpy.context.view_layer)
+    export.invalidate_road_chunk_export_meshes()
+    obj = bpy.data.objects.new('road_chunks_test', bpy.data.meshes.new('road_chunks_test'))
+    obj['id_odr'] = 9201
+    obj['road_mesh_chunks_s_ranges'] = [[0.0, 10.0], [10.0, 15.0]]
+    obj_chunk = bpy.data.objects.new('mesh_chunk_1_road_chunks_test', bpy.data.meshes.new('mesh_chunk'))
+    obj_chunk['road_chunk_id_odr'] = 9201
+    obj_chunk['road_chunk_s_range'] = [10.0, 15.0]
+    obj_chunk.parent = obj
+    for obj_mesh in [obj, obj_chunk]:
+        bpy.context.scene.collection.objects.link(obj_mesh)
+    objs_chunks = export.get_road_chunk_objects(obj)
+    assert objs_chunks == [(obj, (0.0, 10.0)), (obj_chunk, (10.0, 15.0))]
+    road_model = road_model_chunks_counting()
+    meshes_viewport = [obj_mesh.data for obj_mesh in [obj, obj_chunk]]
+    for obj_mesh, s_range in objs_chunks:
+        assert export.replace_road_chunk_mesh_export(context, road_model, obj, obj_mesh, s_range)
+    vertices_export = [helpers.get_mesh_buffers(obj_mesh.data)[0] for obj_mesh in [obj, obj_chunk]]
+    for obj_mesh, mesh_viewport in zip([obj, obj_chunk], meshes_viewport):
+        obj_mesh.data = mesh_viewport
+    # Unchanged road
+    for obj_mesh, s_range in objs_chunks:
+        assert not export.replace_road_chunk_mesh_export(context, road_model, obj, obj_mesh, s_range)
+    assert road_model.num_meshes == 2
+    for obj_mesh, vertices in zip([obj, obj_chunk], vertices_export):
+        assert helpers.get_mesh_buffers(obj_mesh.data)[0] == approx(vertices)
+        assert obj_mesh.data.materials[0].name == 'road_asphalt'
+    # Changed road and changed mesh settings
+    obj['road_mark_line_length'] = 4.0
+    assert export.replace_road_chunk_mesh_export(context, road_model, obj, obj_chunk, (10.0, 15.0))
+    dsc_properties.road_mesh_lod_export_factor = 0.25
+    assert export.replace_road_chunk_mesh_export(context, road_model, obj, obj_chunk, (10.0, 15.0))
+    assert road_model.num_meshes == 4
+    bpy.data.objects.remove(obj_chunk)
+    bpy.data.objects.remove(obj)
+    export.invalidate_road_chunk_export_meshes()
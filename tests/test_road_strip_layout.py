@@ -0,0 +1,47 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from addon.road_strip_layout import road_strip_layout, get_strips_t_values_for_widths
+from . helpers_test import get_lanes_cross_section
+
+from pytest import approx
+
+
+def test_road_strip_layout_constant_width():
+    '''
+        Check the strip borders of the default cross section along the road
+    '''
+    lanes = get_lanes_cross_section('two_lanes_default')
+    strip_layout = road_strip_layout(lanes, 100.0)
+    t_values = strip_layout.get_t_values([0.0, 30.0, 100.0])
+    t_values_expected = [3.70, 3.56, 3.44, 0.06, -0.06, -3.44, -3.56, -3.70]
+    for t_values_s in t_values:
+        assert t_values_s.tolist() == approx(t_values_expected, abs=1e-12)
+
+
+def test_road_strip_layout_width_blend():
+    '''
+        Check the strip borders of a cross section with an opening lane
+    '''
+    lanes = get_lanes_cross_section('two_lanes_turning_lane_offset_left_open')
+    length = 80.0
+    strip_layout = road_strip_layout(lanes, length)
+    t_values = strip_layout.get_t_values([0.0, length / 4.0, length / 2.0, length])
+    t_values_start = get_strips_t_values_for_widths(lanes, [lane.width_start for lane in lanes])
+    t_values_end = get_strips_t_values_for_widths(lanes, [lane.width_end for lane in lanes])
+    assert t_values[0].tolist() == approx(t_values_start, abs=1e-12)
+    assert t_values[-1].tolist() == approx(t_values_end, abs=1e-12)
+    # Cubic blend 3 s^2 - 2 s^3 of the lane widths
+    for t_values_s, blend in zip(t_values[1:3], [5.0 / 32.0, 0.5]):
+        widths = [lane.width_start + blend * (lane.width_end - lane.width_start) for lane in lanes]
+        assert t_values_s.tolist() == approx(get_strips_t_values_for_widths(lanes, widths), abs=1e-12)